@@ -1,13 +1,32 @@
+import os
 import sys
 import click
 from pathlib import Path
 
+from utils.profiling import PROFILE_ENVVAR, ImportTimer, Profiler, profiling_requested
+
+# time the imports of the commands if the command is profiled, which has to be
+# decided before the options are parsed
+import_timer = (
+    ImportTimer().start() if profiling_requested(sys.argv, os.environ) else None
+)
+
+from commands.ls import ls
+from commands.cat import cat
+from commands.diff import diff
+from commands.notifications import notifications
 from commands.show import show
+from commands.flush import flush
+from commands.index import index
+from commands.bench import bench
 from commands.login import login
 from commands.logout import logout
 from commands.upload import upload
 from commands.revise import revise
 from commands.config import config
+from commands.search import search
+
+from utils.client import DEFAULT_SERVER
 
 
 if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
@@ -18,8 +37,20 @@ else:
 
 
 @click.group()
+@click.option(
+    "--server",
+    envvar="IAMUS_SERVER",
+    help="Name of the server profile to use, see `config --server`",
+    type=str,
+)
+@click.option(
+    "--profile",
+    envvar=PROFILE_ENVVAR,
+    help="Write a profile of the command to this file, to attach to a bug report",
+    type=click.Path(dir_okay=False, writable=True),
+)
 @click.pass_context
-def cli(ctx: click.core.Context) -> None:
+def cli(ctx: click.core.Context, server: str, profile: str) -> None:
     """Main CLI command which reads the config file and set the global variables.
 
     \b
@@ -30,16 +61,32 @@ def cli(ctx: click.core.Context) -> None:
     Args:
         ctx (click.core.Context): Context object to share global variables with
             subcommands.
+        server (str): The name of the server profile to use, the default server
+            is used if it is None.
+        profile (str): The path of the file the profile of the command is
+            written to, the command is not profiled if it is None.
     """
     # ensure that ctx.obj exists and is a dict (in case `cli()` is called
     # by means other than the `if` block below)
     ctx.ensure_object(dict)
 
     ctx.obj["CLI_PATH"] = cli_path
+    ctx.obj["SERVER"] = None if server == DEFAULT_SERVER else server
 
     # create config directory if it doesn't exist
     Path(cli_path / "config").mkdir(exist_ok=True)
 
+    if profile is not None:
+        profiler = Profiler(import_timer)
+        profiler.start()
+
+        @ctx.call_on_close
+        def write_profile() -> None:
+            profiler.write(profile, sys.argv)
+            click.echo(f"Profile written to {profile}", err=True)
+    elif import_timer is not None:
+        import_timer.stop()
+
 
 cli.add_command(show)
 cli.add_command(login)
@@ -47,6 +94,14 @@ cli.add_command(logout)
 cli.add_command(upload)
 cli.add_command(revise)
 cli.add_command(config)
+cli.add_command(ls)
+cli.add_command(cat)
+cli.add_command(flush)
+cli.add_command(index)
+cli.add_command(bench)
+cli.add_command(search)
+cli.add_command(diff)
+cli.add_command(notifications)
 
 if __name__ == "__main__":
     cli(obj={})
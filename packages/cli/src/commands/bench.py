@@ -0,0 +1,210 @@
+import json
+import click
+import threading
+from functools import partial
+
+from utils.auth import authenticated
+from utils.client import IamusClient, IamusError
+from utils.base_url import pass_base_url
+from utils.callback import callback_wrapper, zipfile_validator
+from utils.bench import (
+    DEFAULT_MIX,
+    PERCENTILES,
+    Bench,
+    BenchStats,
+    VirtualUser,
+    parse_mix,
+)
+
+
+def optional_zipfile_validator(value: str) -> str:
+    return None if value is None else zipfile_validator(value)
+
+
+def mix_validator(value: str) -> dict[str, int]:
+    if value is None:
+        return DEFAULT_MIX
+    try:
+        return parse_mix(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def echo_summary(summary: dict[str, object]) -> None:
+    columns = ["count", "errors", "throughput", "mean"]
+    columns += [f"p{percent}" for percent in PERCENTILES] + ["max"]
+    header = f"{'operation':<10}" + "".join(f"{column:>11}" for column in columns)
+    click.echo(header)
+
+    rows = list(summary["operations"].items()) + [("total", summary["total"])]
+    for operation, stats in rows:
+        cells = [
+            f"{stats['count']:>11d}",
+            f"{stats['errors']:>11d}",
+            f"{stats['throughput']:>9.1f}/s",
+        ]
+        cells += [f"{stats[column]:>9.1f}ms" for column in columns[3:]]
+        click.echo(f"{operation:<10}" + "".join(cells))
+
+    total = summary["total"]
+    click.echo(
+        f"{total['count']} operations in {summary['duration']:.1f}s, "
+        f"error rate {total['errorRate']:.1%}"
+    )
+    for message, count in sorted(summary["errors"].items(), key=lambda e: -e[1]):
+        click.echo(f"{count:>6d} x {message}")
+
+
+def echo_tick(stats: BenchStats) -> None:
+    total = stats.summary()["total"]
+    click.echo(
+        f"\r{total['count']} operations, {total['throughput']:.1f}/s, "
+        f"p95 {total['p95']:.1f}ms, {total['errors']} errors\033[K",
+        nl=False,
+        err=True,
+    )
+
+
+@click.command()
+@click.option("--users", default=10, show_default=True, help="Virtual users", type=int)
+@click.option(
+    "--duration",
+    default=30.0,
+    show_default=True,
+    help="Seconds to run for, including the ramp-up",
+    type=float,
+)
+@click.option(
+    "--ramp-up",
+    default=0.0,
+    show_default=True,
+    help="Seconds over which the virtual users are started",
+    type=float,
+)
+@click.option("--rate", help="Target operations per second of all users", type=float)
+@click.option(
+    "--concurrency",
+    help="Maximum operations in flight, defaults to the number of users",
+    type=int,
+)
+@click.option(
+    "--mix",
+    help="Weighted operations of login, show, lookup, revise and upload, e.g. "
+    "show=6,lookup=3,login=1, defaults to show only",
+    type=str,
+    callback=callback_wrapper(mix_validator),
+)
+@click.option("--name", help="Publication to look up, revise and upload to", type=str)
+@click.option(
+    "--file",
+    help="Zipfile uploaded to new revisions by the revise and upload operations",
+    type=str,
+    callback=callback_wrapper(optional_zipfile_validator),
+)
+@click.option("--password", help="Password used by the login operation", type=str)
+@click.option("--seed", help="Seed of the random choice of operations", type=int)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+@click.pass_context
+@pass_base_url
+@authenticated
+def bench(
+    ctx: click.core.Context,
+    users: int,
+    duration: float,
+    ramp_up: float,
+    rate: float,
+    concurrency: int,
+    mix: dict[str, int],
+    name: str,
+    file: str,
+    password: str,
+    seed: int,
+    as_json: bool,
+    client: IamusClient = None,
+) -> None:
+    """CLI command measuring how much load a server can handle.
+
+    \b
+    Virtual users run a random mix of operations with the logged in account
+    until the duration has elapsed, then the latency percentiles, throughput
+    and error rate of every operation are reported. Run it against a local
+    server, or a server profile configured for one, since `revise` and `upload`
+    change the publication.
+
+    \b
+    Usage:
+        $ iamus bench [--users <users>] [--duration <seconds>]
+
+    \b
+        To ramp up 100 users over 10 seconds at a rate of 50 operations per
+        second, with at most 20 operations in flight, use:
+        $ iamus bench --users 100 --ramp-up 10 --rate 50 --concurrency 20
+
+    \b
+        To include lookups and uploads to new revisions of a publication, use:
+        $ iamus bench --mix show=5,lookup=3,upload=1 --name <name> --file <file>
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        users (int): The number of virtual users.
+        duration (float): The number of seconds to run for.
+        ramp_up (float): The number of seconds over which users are started.
+        rate (float): The target number of operations per second, or None to
+            run as fast as possible.
+        concurrency (int): The maximum number of operations in flight.
+        mix (dict[str, int]): The weights of the operations.
+        name (str): The publication used by the lookup, revise and upload
+            operations.
+        file (str): The zipfile uploaded to new revisions by the revise and
+            upload operations.
+        password (str): The password used by the login operation.
+        seed (int): The seed of the random choice of operations.
+        as_json (bool): Whether to print the report as JSON.
+        client (IamusClient): The authenticated client.
+    """
+    if users < 1 or (concurrency is not None and concurrency < 1):
+        raise click.BadParameter("--users and --concurrency must be positive")
+    if name is None and {"lookup", "revise", "upload"} & set(mix):
+        raise click.BadParameter("The mix needs a publication, use --name")
+    if file is None and {"revise", "upload"} & set(mix):
+        raise click.BadParameter(
+            "The revise and upload operations need a zipfile, use --file"
+        )
+    if password is None and "login" in mix:
+        password = click.prompt("Password", hide_input=True)
+
+    archive = None
+    if {"revise", "upload"} & set(mix):
+        try:
+            publication = client.resolve(name=name)
+        except IamusError as e:
+            click.echo(f"Response Error: {e}")
+            return
+        if publication["draft"]:
+            click.echo(
+                f"The current revision of {name} is a draft, upload its sources first"
+            )
+            return
+        with open(file, "rb") as f:
+            archive = f.read()
+
+    runner = Bench(users, duration, mix, ramp_up, rate, concurrency, seed)
+    create_user = partial(
+        VirtualUser, client, name, archive, password, threading.Lock()
+    )
+    click.echo(
+        f"Running {users} virtual users against {client.base_url} "
+        f"for {duration:.0f}s",
+        err=True,
+    )
+    stats = runner.run(create_user, None if as_json else echo_tick)
+    if not as_json:
+        click.echo(err=True)
+
+    summary = stats.summary()
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        echo_summary(summary)
@@ -0,0 +1,72 @@
+import click
+
+from utils.auth import authenticated
+from utils.client import IamusClient
+from utils.base_url import pass_base_url
+from utils.mutually_exclusive_options import MutuallyExclusiveOptions
+
+from commands.ls import get_tree_browser
+
+
+@click.command()
+@click.argument("path", type=str)
+@click.option("--revision", help="Publication Revision", type=str)
+@click.option(
+    "--id",
+    "pub_id",
+    prompt="Publication ID",
+    help="Publication ID",
+    cls=MutuallyExclusiveOptions,
+    type=str,
+    not_required_if=["name"],
+)
+@click.option(
+    "--name",
+    prompt="Publication Name",
+    help="Publication Name",
+    cls=MutuallyExclusiveOptions,
+    type=str,
+    not_required_if=["pub_id"],
+)
+@click.pass_context
+@pass_base_url
+@authenticated
+def cat(
+    ctx: click.core.Context,
+    path: str,
+    revision: str,
+    pub_id: str = None,
+    name: str = None,
+    client: IamusClient = None,
+) -> None:
+    """CLI command printing a single file of a publication.
+
+    \b
+    Only the requested file is downloaded, not the whole publication archive.
+
+    \b
+    Usage:
+        $ iamus cat <path> --id <id>
+        or
+        $ iamus cat <path> --name <name> [--revision <revision>]
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        path (str): The path of the file within the publication archive.
+        revision (str): The revision of the publication, the current revision
+            is used if it is not specified.
+        pub_id (str, optional): The id of the publication specified by the user,
+            it is required if `name` is not specified.
+        name (str, optional): The name of the publication specified by the user,
+            it is required if `pub_id` is not specified.
+        client (IamusClient): The authenticated client.
+    """
+    # no listings are read, so the persisted listing cache is not loaded
+    browser = get_tree_browser(ctx, client, pub_id, name, revision, 1, cached=False)
+    if browser is None:
+        return
+
+    with browser:
+        click.echo(browser.read(path), nl=False)
@@ -1,6 +1,7 @@
 import json
 import click
 
+from utils.client import DEFAULT_SERVER
 from utils.callback import callback_wrapper, url_validator
 
 
@@ -13,30 +14,49 @@ from utils.callback import callback_wrapper, url_validator
     type=str,
     callback=callback_wrapper(url_validator),
 )
+@click.option(
+    "--server",
+    help="Name of the server profile to configure instead of the default server",
+    type=str,
+)
 @click.pass_context
-def config(ctx: click.core.Context, base_url: str) -> None:
+def config(ctx: click.core.Context, base_url: str, server: str = None) -> None:
     """CLI command for the user to configure the base url of the server.
 
     \b
     Usage:
         $ iamus config --base-url <url>
 
+    \b
+        To configure a named server profile, which has its own login, use:
+        $ iamus config --server <name> --base-url <url>
+        $ iamus --server <name> login
+
     \f
     Args:
         ctx (click.core.Context): Context object to share global variables with
             subcommands.
         base_url (str): The base url of the server specified by the user.
+        server (str, optional): The name of the server profile specified by the
+            user, the default server is configured if it is not specified.
     """
     config_file = ctx.obj["CLI_PATH"] / "config/config.json"
     try:
         with open(config_file, "r") as f:
             config = json.load(f)
-        click.echo(f"The current base url is {config['baseUrl']}")
+    except FileNotFoundError:
+        config = {}
+
+    if server is None or server == DEFAULT_SERVER:
+        profile = config
+    else:
+        profile = config.setdefault("profiles", {}).setdefault(server, {})
+
+    if "baseUrl" in profile:
+        click.echo(f"The current base url is {profile['baseUrl']}")
         click.confirm(f"Do you want to change it to {base_url} ?", abort=True)
-    except (KeyError, FileNotFoundError):
-        pass
 
-    config = {"baseUrl": base_url}
+    profile["baseUrl"] = base_url
     with open(config_file, "w") as f:
         json.dump(config, f)
     click.echo(f"The base url is set to {base_url}")
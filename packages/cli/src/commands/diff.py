@@ -0,0 +1,171 @@
+import click
+import difflib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.auth import authenticated
+from utils.index import get_index
+from utils.client import IamusClient, IamusError
+from utils.base_url import pass_base_url
+from utils.delta import compare_members
+from utils.transfer import format_size
+from utils.publication import get_publication
+from utils.remote_zip import read_central_directory
+
+# Members larger than this are compared by their size and CRC only, by default
+MAX_DIFF_SIZE = 1024 * 1024
+
+
+def diff_content(
+    path: str, old: bytes, new: bytes, old_label: str, new_label: str
+) -> str:
+    """Get the unified diff of two versions of a member, or note that it is binary."""
+    try:
+        old_lines = old.decode().splitlines(keepends=True)
+        new_lines = new.decode().splitlines(keepends=True)
+    except UnicodeDecodeError:
+        return f"Binary files {old_label}/{path} and {new_label}/{path} differ\n"
+
+    lines = difflib.unified_diff(
+        old_lines, new_lines, f"{old_label}/{path}", f"{new_label}/{path}"
+    )
+    return "".join(line if line.endswith("\n") else f"{line}\n" for line in lines)
+
+
+@click.command()
+@click.argument("name", type=str)
+@click.argument("old_revision", type=str)
+@click.argument("new_revision", type=str)
+@click.option("--stat", is_flag=True, help="Only list the changed members")
+@click.option(
+    "--max-size",
+    default=MAX_DIFF_SIZE,
+    show_default=True,
+    help="Members larger than this many bytes are not downloaded to be diffed",
+    type=click.IntRange(min=0),
+)
+@click.option(
+    "--jobs",
+    default=4,
+    show_default=True,
+    help="Concurrent member downloads",
+    type=click.IntRange(min=1),
+)
+@click.pass_context
+@pass_base_url
+@authenticated
+def diff(
+    ctx: click.core.Context,
+    name: str,
+    old_revision: str,
+    new_revision: str,
+    stat: bool,
+    max_size: int,
+    jobs: int,
+    client: IamusClient = None,
+) -> None:
+    """CLI command showing what changed between two revisions of a publication.
+
+    \b
+    Only the central directories of both zipfiles are downloaded to find the
+    members which were added, removed or modified, and only the modified
+    members are downloaded to be diffed.
+
+    \b
+    The changed members are listed in the following format:
+    A <path>                  added
+    D <path>                  removed
+    M <path> (<old> -> <new>) modified, with the old and new sizes
+
+    \b
+    Usage:
+        $ iamus diff <name> <old revision> <new revision>
+
+    \b
+        To only list the changed members, use:
+        $ iamus diff <name> <old revision> <new revision> --stat
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        name (str): The name of the publication.
+        old_revision (str): The revision which is compared from.
+        new_revision (str): The revision which is compared to.
+        stat (bool): Whether to only list the changed members.
+        max_size (int): The size above which members are not diffed.
+        jobs (int): The number of concurrent member downloads.
+        client (IamusClient): The authenticated client.
+    """
+    index = get_index(ctx)
+    publications = [
+        get_publication(client, None, name, revision, index)
+        for revision in (old_revision, new_revision)
+    ]
+    if None in publications:
+        return
+
+    try:
+        old_members, new_members = [
+            {info.filename: info for info in read_central_directory(client, pub["id"])}
+            for pub in publications
+        ]
+    except IamusError as e:
+        click.echo(f"Response Error: {e}")
+        return
+    except zipfile.BadZipFile as e:
+        click.echo(f"Error: {e}")
+        return
+
+    changed, removed = compare_members(
+        list(new_members.values()), list(old_members.values())
+    )
+    if not changed and not removed:
+        click.echo(f"No changes between {old_revision} and {new_revision}")
+        return
+
+    modified = []
+    for path in sorted(changed + removed):
+        if path not in old_members:
+            click.echo(f"A {path}")
+        elif path not in new_members:
+            click.echo(f"D {path}")
+        else:
+            old_size = old_members[path].file_size
+            new_size = new_members[path].file_size
+            click.echo(f"M {path} ({format_size(old_size)} -> {format_size(new_size)})")
+            if not path.endswith("/"):
+                modified.append(path)
+
+    if stat:
+        return
+
+    skipped = [
+        path
+        for path in modified
+        if max(old_members[path].file_size, new_members[path].file_size) > max_size
+    ]
+    modified = [path for path in modified if path not in skipped]
+    # both versions of every member are downloaded concurrently, and the
+    # diffs are printed in order as soon as they are available
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        downloads = [
+            (
+                path,
+                *(
+                    executor.submit(client.download, pub["id"], path)
+                    for pub in publications
+                ),
+            )
+            for path in modified
+        ]
+        for path, old, new in downloads:
+            click.echo()
+            click.echo(
+                diff_content(
+                    path, old.result(), new.result(), old_revision, new_revision
+                ),
+                nl=False,
+            )
+    for path in skipped:
+        click.echo(f"\n{path} is larger than --max-size, it was not downloaded")
@@ -0,0 +1,222 @@
+import time
+import click
+import requests
+from datetime import datetime
+from functools import partial
+from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.transfer import TokenBucket
+from utils.index import open_index
+from utils.upload_queue import UploadQueue
+from utils.client import IamusClient, IamusError
+
+# Maximum number of seconds to wait between two attempts
+MAX_BACKOFF = 60
+
+
+def wait_for_server(client: IamusClient, retries: int) -> bool:
+    """Wait with an exponential backoff until the server is reachable.
+
+    Args:
+        client (IamusClient): The client of the server.
+        retries (int): The number of attempts before giving up.
+
+    Returns:
+        bool: Whether the server is reachable.
+    """
+    for attempt in range(retries):
+        try:
+            client.check_health()
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(min(2**attempt, MAX_BACKOFF))
+    return False
+
+
+def send_job(
+    client: IamusClient,
+    retries: int,
+    job: dict[str, object],
+) -> Tuple[str, int, str]:
+    """Upload the archive of a queued job, retrying if the request fails.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        retries (int): The number of attempts before giving up.
+        job (dict[str, object]): The queued job.
+
+    Returns:
+        Tuple[str, int, str]: The status of the job, the total number of
+            attempts and a message describing the result.
+    """
+    bucket = TokenBucket(job["maxRate"]) if job["maxRate"] else None
+    message = ""
+    for attempt in range(1, retries + 1):
+        attempts = job["attempts"] + attempt
+        try:
+            pub_id = job["pubId"] or client.resolve(name=job["name"])["id"]
+            client.upload(pub_id, job["archive"], bucket)
+        except requests.exceptions.RequestException as e:
+            message = f"Error occurs when sending request: {e}"
+            if attempt < retries:
+                time.sleep(min(2**attempt, MAX_BACKOFF))
+            continue
+        except FileNotFoundError:
+            return "failed", attempts, "Queued archive is missing"
+        except IamusError as e:
+            if "file" in e.errors:
+                return "failed", attempts, e.errors["file"]["message"]
+            return "failed", attempts, str(e)
+
+        pub_url = client.url(f"publication/{pub_id}")
+        return "done", attempts, f"File uploaded to {pub_url}"
+
+    return "pending", job["attempts"] + retries, message
+
+
+def send_jobs(
+    ctx: click.core.Context,
+    upload_queue: UploadQueue,
+    server: str,
+    pending: list[dict[str, object]],
+    jobs: int,
+    retries: int,
+) -> None:
+    """Send the queued jobs of a server profile concurrently.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        upload_queue (UploadQueue): The queue the results are recorded in.
+        server (str): The name of the server profile, the default server is
+            used if it is None.
+        pending (list[dict[str, object]]): The jobs to be sent.
+        jobs (int): The number of concurrent uploads.
+        retries (int): The number of attempts per upload.
+    """
+    unreachable = "Base URL is not reachable, uploads are left in the queue"
+    try:
+        client = IamusClient.from_config(ctx.obj["CLI_PATH"], server)
+        index = open_index(ctx.obj["CLI_PATH"], server)
+    except (FileNotFoundError, KeyError):
+        click.echo(
+            "No valid config.json found. Please create one using `config` command."
+        )
+        return
+
+    if not wait_for_server(client, retries):
+        click.echo(unreachable)
+        return
+
+    try:
+        client.authenticate()
+    except requests.exceptions.RequestException:
+        click.echo(unreachable)
+        return
+    except (FileNotFoundError, KeyError, IamusError):
+        click.echo("Please login first")
+        return
+
+    send = partial(send_job, client, retries)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(send, job): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            job_status, attempts, message = future.result()
+            upload_queue.record(job["id"], job_status, attempts, message)
+            if job_status == "done" and index is not None:
+                index.invalidate(client.username, job["name"])
+            click.echo(f"{job['id']} [{job_status}] {message}")
+
+
+def show_status(upload_queue: UploadQueue) -> None:
+    jobs = upload_queue.jobs()
+    if not jobs:
+        click.echo("The upload queue is empty")
+        return
+
+    for job in jobs.values():
+        queued_at = datetime.fromtimestamp(job["queuedAt"]).strftime("%Y-%m-%d %H:%M")
+        target = job["name"] or job["pubId"]
+        if job["server"] is not None:
+            target += f" on {job['server']}"
+        click.echo(
+            f"{job['id']} [{job['status']}] {target} ({queued_at}, "
+            f"{job['attempts']} attempts) {job['message']}".rstrip()
+        )
+
+
+@click.command()
+@click.option(
+    "--jobs", default=2, show_default=True, help="Concurrent uploads", type=int
+)
+@click.option(
+    "--retries",
+    default=5,
+    show_default=True,
+    help="Attempts per upload before it is left in the queue",
+    type=int,
+)
+@click.option("--status", is_flag=True, help="Show the queued uploads and results")
+@click.option("--quiet", is_flag=True, help="Only report the result of uploads")
+@click.pass_context
+def flush(
+    ctx: click.core.Context, jobs: int, retries: int, status: bool, quiet: bool
+) -> None:
+    """CLI command sending the uploads queued with `upload --queue`.
+
+    \b
+    Uploads which still cannot be sent after all retries are left in the queue
+    for a later `flush`. A worker running this command is started in the
+    background whenever an upload is queued. Every upload is sent to the server
+    profile it was queued for.
+
+    \b
+    Usage:
+        $ iamus flush [--jobs <jobs>] [--retries <retries>]
+
+    \b
+        To show the queued uploads and their results, use:
+        $ iamus flush --status
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        jobs (int): The number of concurrent uploads.
+        retries (int): The number of attempts per upload.
+        status (bool): Whether to show the queue instead of draining it.
+        quiet (bool): Whether to only report the result of uploads.
+    """
+    upload_queue = UploadQueue(ctx.obj["CLI_PATH"])
+    if status:
+        show_status(upload_queue)
+        return
+
+    lock = upload_queue.lock()
+    if not lock.acquire():
+        click.echo("Another worker is already sending the queued uploads")
+        return
+
+    try:
+        # jobs which are queued while the queue is drained are sent as well
+        attempted = set()
+        while True:
+            pending = [
+                job for job in upload_queue.pending() if job["id"] not in attempted
+            ]
+            if not pending:
+                break
+            attempted.update(job["id"] for job in pending)
+
+            if not quiet:
+                click.echo(f"Sending {len(pending)} queued uploads")
+            servers = {}
+            for job in pending:
+                servers.setdefault(job["server"], []).append(job)
+            for server, server_jobs in servers.items():
+                send_jobs(ctx, upload_queue, server, server_jobs, jobs, retries)
+    finally:
+        upload_queue.compact()
+        lock.release()
@@ -0,0 +1,105 @@
+import os
+import json
+import click
+from datetime import datetime
+
+from utils.auth import authenticated
+from utils.client import IamusClient
+from utils.base_url import pass_base_url
+from utils.index import get_index, get_index_config
+
+
+@pass_base_url
+@authenticated
+def sync_index(ctx: click.core.Context, client: IamusClient = None) -> None:
+    """Sync the current publications of the logged in user to the index.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        client (IamusClient): The authenticated client.
+    """
+    changed = get_index(ctx).sync(client)
+    click.echo(f"The local index is synced, {changed} publications changed")
+
+
+@click.command()
+@click.option("--enable", is_flag=True, help="Enable the local index")
+@click.option("--disable", is_flag=True, help="Disable and remove the local index")
+@click.option(
+    "--max-age",
+    help="Seconds for which the index is used before it is synced again",
+    type=click.IntRange(min=0),
+)
+@click.option("--sync", is_flag=True, help="Sync the local index now")
+@click.pass_context
+def index(
+    ctx: click.core.Context, enable: bool, disable: bool, max_age: int, sync: bool
+) -> None:
+    """CLI command managing the local index of the publications of the user.
+
+    \b
+    While the index is fresh, `show`, `upload`, `revise`, `ls` and `cat`
+    resolve publication names from it instead of asking the server. It is
+    synced again once it is older than its maximum age, and after the CLI
+    itself revises a publication or uploads to it.
+
+    \b
+    Usage:
+        $ iamus index --enable [--max-age <seconds>]
+        $ iamus index --sync
+        $ iamus index --disable
+
+    \b
+        To show the status of the index, use:
+        $ iamus index
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        enable (bool): Whether to enable the index.
+        disable (bool): Whether to disable and remove the index.
+        max_age (int): The number of seconds the index is fresh for.
+        sync (bool): Whether to sync the index.
+    """
+    if enable and disable:
+        raise click.UsageError("--enable and --disable are mutually exclusive")
+
+    cli_path = ctx.obj["CLI_PATH"]
+    config_file = cli_path / "config/config.json"
+    try:
+        with open(config_file, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        click.echo("No config.json found. Please create one using `config` command.")
+        return
+
+    settings = get_index_config(cli_path)
+    if enable or disable or max_age is not None:
+        settings["enabled"] = (settings["enabled"] or enable) and not disable
+        if max_age is not None:
+            settings["maxAge"] = max_age
+        config["index"] = settings
+        with open(config_file, "w") as f:
+            json.dump(config, f)
+
+    if disable:
+        # the indexes of all server profiles are removed
+        for index_file in (cli_path / "config").glob("index*.db"):
+            os.remove(index_file)
+        click.echo("The local index is disabled")
+        return
+
+    if not settings["enabled"]:
+        click.echo("The local index is not enabled, use `index --enable` to enable it")
+        return
+
+    if sync:
+        sync_index(ctx)
+        return
+
+    click.echo(f"The local index is enabled, it is synced after {settings['maxAge']}s")
+    for scope, synced_at in get_index(ctx).syncs():
+        synced = datetime.fromtimestamp(synced_at).strftime("%Y-%m-%d %H:%M")
+        click.echo(f"{scope} synced at {synced}")
@@ -1,9 +1,6 @@
-import sys
-import json
 import click
-from posixpath import join as urljoin
 
-from utils.call_api import call_api
+from utils.client import IamusError
 from utils.base_url import pass_base_url
 
 
@@ -28,24 +25,10 @@ def login(ctx: click.core.Context, username: str, password: str) -> None:
         username (str): The username specified by the user.
         password (str): The password specified by the user.
     """
-    base_url = ctx.obj["BASE_URL"]
-    login_body = {"username": username, "password": password}
     try:
-        login_api = urljoin(base_url, "auth/login")
-        login_res = call_api("POST", login_api, data=login_body)
-    except Exception as e:
-        click.echo(f"Unexpected error occurs: {e}")
-        sys.exit(1)
-
-    if login_res["status"] == "ok":
-        data = {
-            "username": login_res["user"]["username"],
-            "token": login_res["token"],
-            "refreshToken": login_res["refreshToken"],
-        }
-        auth_file = ctx.obj["CLI_PATH"] / "config/auth.json"
-        with open(auth_file, "w") as f:
-            json.dump(data, f)
-        click.echo("Login successfully")
-    else:
+        ctx.obj["CLIENT"].login(username, password)
+    except IamusError:
         click.echo("Login failed")
+        return
+
+    click.echo("Login successfully")
@@ -1,6 +1,8 @@
 import os
 import click
 
+from utils.client import get_auth_file
+
 
 @click.command()
 @click.pass_context
@@ -17,7 +19,7 @@ def logout(ctx: click.core.Context) -> None:
             subcommands.
     """
     try:
-        auth_file = ctx.obj["CLI_PATH"] / "config/auth.json"
+        auth_file = get_auth_file(ctx.obj["CLI_PATH"], ctx.obj.get("SERVER"))
         os.remove(auth_file)
         click.echo("Logout successfully")
     except FileNotFoundError:
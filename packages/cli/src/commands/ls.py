@@ -0,0 +1,141 @@
+import click
+import posixpath
+
+from utils.auth import authenticated
+from utils.base_url import pass_base_url
+from utils.index import get_index
+from utils.publication import get_publication
+from utils.client import IamusClient
+from utils.tree import ListingCache, TreeBrowser
+from utils.mutually_exclusive_options import MutuallyExclusiveOptions
+
+
+def get_tree_browser(
+    ctx: click.core.Context,
+    client: IamusClient,
+    pub_id: str = None,
+    name: str = None,
+    revision: str = None,
+    jobs: int = 8,
+    cached: bool = True,
+) -> TreeBrowser:
+    """Create a browser of the archive of the specified publication.
+
+    The listing cache is persisted in the config directory unless the
+    publication is a draft, whose sources may still change, or the browser
+    does not list directories.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        client (IamusClient): The authenticated client.
+        pub_id (str, optional): The id of the publication specified by the user.
+        name (str, optional): The name of the publication specified by the user.
+        revision (str, optional): The revision of the publication specified by
+            the user.
+        jobs (int, optional): Number of concurrent requests.
+        cached (bool, optional): Whether to use the persisted listing cache.
+
+    Returns:
+        TreeBrowser: The browser, or None if the publication could not be found.
+    """
+    publication = get_publication(client, pub_id, name, revision, get_index(ctx))
+    if publication is None:
+        return
+
+    cache_file = None
+    if cached and not publication["draft"]:
+        cache_file = ctx.obj["CLI_PATH"] / "config/tree_cache.json"
+    return TreeBrowser(client, publication, ListingCache(cache_file), jobs)
+
+
+def format_entry(entry: dict[str, object]) -> str:
+    filename = posixpath.basename(entry["filename"].rstrip("/"))
+    return filename + "/" if entry["type"] == "directory" else filename
+
+
+@click.command()
+@click.argument("path", default="", type=str)
+@click.option("-R", "--recursive", is_flag=True, help="List subdirectories recursively")
+@click.option("--revision", help="Publication Revision", type=str)
+@click.option(
+    "--jobs", default=8, show_default=True, help="Concurrent requests", type=int
+)
+@click.option(
+    "--id",
+    "pub_id",
+    prompt="Publication ID",
+    help="Publication ID",
+    cls=MutuallyExclusiveOptions,
+    type=str,
+    not_required_if=["name"],
+)
+@click.option(
+    "--name",
+    prompt="Publication Name",
+    help="Publication Name",
+    cls=MutuallyExclusiveOptions,
+    type=str,
+    not_required_if=["pub_id"],
+)
+@click.pass_context
+@pass_base_url
+@authenticated
+def ls(
+    ctx: click.core.Context,
+    path: str,
+    recursive: bool,
+    revision: str,
+    jobs: int,
+    pub_id: str = None,
+    name: str = None,
+    client: IamusClient = None,
+) -> None:
+    """CLI command listing the files of a publication without downloading it.
+
+    \b
+    Directories are shown with a trailing slash.
+
+    \b
+    Usage:
+        $ iamus ls [<path>] --id <id>
+        or
+        $ iamus ls [<path>] --name <name> [--revision <revision>]
+
+    \b
+        To list all subdirectories as well, use:
+        $ iamus ls -R [<path>] --name <name>
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        path (str): The path within the publication archive, the root of the
+            archive is listed if it is not specified.
+        recursive (bool): Whether subdirectories are listed as well.
+        revision (str): The revision of the publication, the current revision
+            is used if it is not specified.
+        jobs (int): The number of concurrent requests.
+        pub_id (str, optional): The id of the publication specified by the user,
+            it is required if `name` is not specified.
+        name (str, optional): The name of the publication specified by the user,
+            it is required if `pub_id` is not specified.
+        client (IamusClient): The authenticated client.
+    """
+    browser = get_tree_browser(ctx, client, pub_id, name, revision, jobs)
+    if browser is None:
+        return
+
+    with browser:
+        if not recursive:
+            entry = browser.listing(path)
+            for child in entry.get("entries", [entry]):
+                click.echo(format_entry(child))
+            return
+
+        for i, (current, entries) in enumerate(browser.walk(path)):
+            if i > 0:
+                click.echo()
+            click.echo(f"{current or '.'}:")
+            for child in entries:
+                click.echo(format_entry(child))
@@ -0,0 +1,102 @@
+import json
+import click
+
+from utils.auth import authenticated
+from utils.client import IamusClient
+from utils.base_url import pass_base_url
+from utils.notifications import (
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    PAGE_SIZE,
+    follow_notifications,
+    get_cursor_file,
+    load_cursor,
+    save_cursor,
+)
+
+
+def echo_notifications(notifications: list[dict[str, object]]) -> None:
+    for notification in notifications:
+        click.echo(json.dumps(notification))
+
+
+@click.command()
+@click.option(
+    "--follow",
+    is_flag=True,
+    help="Keep polling and print the notifications as they arrive",
+)
+@click.option(
+    "--interval",
+    default=MIN_INTERVAL,
+    show_default=True,
+    help="Seconds between polls while notifications arrive",
+    type=click.FloatRange(min=0.1),
+)
+@click.option(
+    "--max-interval",
+    default=MAX_INTERVAL,
+    show_default=True,
+    help="Seconds between polls at most, when there are no new notifications",
+    type=click.FloatRange(min=0.1),
+)
+@click.pass_context
+@pass_base_url
+@authenticated
+def notifications(
+    ctx: click.core.Context,
+    follow: bool,
+    interval: float,
+    max_interval: float,
+    client: IamusClient = None,
+) -> None:
+    """CLI command printing the notifications which are not viewed yet.
+
+    \b
+    Every notification is printed as a line of JSON, oldest first.
+
+    \b
+    With --follow, the command keeps polling for notifications which arrive
+    after the newest one it printed, and waits longer between polls while
+    none arrive. The newest printed notification is saved, so a restarted
+    command only prints the notifications which arrived since.
+
+    \b
+    Usage:
+        $ iamus notifications
+
+    \b
+        To keep printing new notifications, use:
+        $ iamus notifications --follow
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        follow (bool): Whether to keep polling for new notifications.
+        interval (float): The seconds between polls while notifications arrive.
+        max_interval (float): The seconds between polls at most.
+        client (IamusClient): The authenticated client.
+    """
+    if not follow:
+        offset = 0
+        while True:
+            page = client.list_notifications(offset, PAGE_SIZE)
+            echo_notifications(page)
+            offset += len(page)
+            if len(page) < PAGE_SIZE:
+                return
+
+    cursor_file = get_cursor_file(ctx.obj["CLI_PATH"], ctx.obj.get("SERVER"))
+    cursor = load_cursor(cursor_file)
+    try:
+        for new, cursor in follow_notifications(
+            client,
+            cursor,
+            min_interval=interval,
+            max_interval=max(interval, max_interval),
+        ):
+            echo_notifications(new)
+            save_cursor(cursor_file, cursor)
+    except KeyboardInterrupt:
+        pass
@@ -1,9 +1,8 @@
-import sys
 import click
-from posixpath import join as urljoin
 
-from utils.call_api import call_api
 from utils.auth import authenticated
+from utils.client import IamusClient, IamusError
+from utils.index import get_index
 from utils.publication import get_id_name
 from utils.base_url import pass_base_url
 from utils.mutually_exclusive_options import MutuallyExclusiveOptions
@@ -47,8 +46,7 @@ def revise(
     changelog: str,
     pub_id: str = None,
     name: str = None,
-    username: str = None,
-    headers: dict[str, str] = None,
+    client: IamusClient = None,
 ) -> str:
     """CLI command for user to revise a specified publication.
 
@@ -73,35 +71,29 @@ def revise(
             it is required if `name` is not specified.
         name (str, optional): The name of the publication specified by the user,
             it is required if `pub_id` is not specified.
-        username (str): The username obtained from the auth file.
-        headers (dict[str, str]): The headers obtained from the auth file, which
-            contains token for sending the request.
+        client (IamusClient): The authenticated client.
 
     Returns:
         str: The new publication id is returned if the revise is successful, it
             is only used when invoked by `upload` command.
     """
-    base_url = ctx.obj["BASE_URL"]
-
-    pub_id, name = get_id_name(base_url, username, headers, pub_id, name)
+    index = get_index(ctx)
+    pub_id, name = get_id_name(client, pub_id, name, index)
     if not all([pub_id, name]):
         return
 
-    revise_api = urljoin(base_url, f"publication/{username}/{name}/revise")
-    data = {"revision": revision, "changelog": changelog}
-
     try:
-        revise_res = call_api("POST", revise_api, data=data, headers=headers)
-        new_id = revise_res["publication"]["id"]
-        old_pub_url = urljoin(base_url, f"publication/{pub_id}")
-        new_pub_url = urljoin(base_url, f"publication/{new_id}")
-        click.echo(
-            f"Success: Revision of {name}({old_pub_url}) is now at {new_pub_url}"
-        )
-        return new_id
-    except KeyError:
-        click.echo(f"Response Error: {revise_res['message']}")
-        click.echo(revise_res["errors"]["revision"]["message"])
-    except Exception as e:
-        click.echo(f"Unexpected error occurs: {e}")
-        sys.exit(1)
+        new_id = client.revise(name, revision, changelog)["id"]
+    except IamusError as e:
+        click.echo(f"Response Error: {e}")
+        if "revision" in e.errors:
+            click.echo(e.errors["revision"]["message"])
+        return
+
+    if index is not None:
+        index.invalidate(client.username, name)
+
+    old_pub_url = client.url(f"publication/{pub_id}")
+    new_pub_url = client.url(f"publication/{new_id}")
+    click.echo(f"Success: Revision of {name}({old_pub_url}) is now at {new_pub_url}")
+    return new_id
@@ -0,0 +1,101 @@
+import click
+from posixpath import join as urljoin
+
+from utils.base_url import pass_base_url
+from utils.search import (
+    PAGE_SIZE,
+    SEARCH_CACHE_TTL,
+    SearchCache,
+    get_search_cache_file,
+    search_pages,
+)
+
+
+def echo_result(base_url: str, kind: str, result: dict[str, object]) -> None:
+    if kind == "user":
+        name = f" ({result['name']})" if result.get("name") else ""
+        click.echo(f"{result['username']}{name}")
+        return
+
+    pub_url = urljoin(base_url, f"publication/{result['id']}")
+    owner = result["owner"]
+    owner = owner["username"] if isinstance(owner, dict) else owner
+    click.echo(
+        f"{owner}/{result['name']} ({result['revision']}) "
+        f"{result.get('title', '')} - {pub_url}"
+    )
+
+
+@click.command()
+@click.argument("query")
+@click.option("--users", is_flag=True, help="Search users instead of publications")
+@click.option(
+    "--take",
+    default=PAGE_SIZE,
+    show_default=True,
+    help="Results per page",
+    type=click.IntRange(1, 200),
+)
+@click.option("--limit", help="Maximum number of results", type=click.IntRange(min=1))
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help=f"Do not answer from the pages cached in the last {SEARCH_CACHE_TTL}s",
+)
+@click.pass_context
+@pass_base_url
+def search(
+    ctx: click.core.Context,
+    query: str,
+    users: bool,
+    take: int,
+    limit: int,
+    no_cache: bool,
+) -> None:
+    """CLI command searching the publications or users visible to everyone.
+
+    \b
+    The results are printed page by page, best match first, while the next
+    page is fetched. Recent pages are cached for a short time, so a repeated
+    search is answered at once.
+
+    \b
+    Usage:
+        $ iamus search <query>
+
+    \b
+        To search users, use:
+        $ iamus search <query> --users
+
+    \b
+        To show at most 10 results, use:
+        $ iamus search <query> --limit 10
+
+    \f
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        query (str): The text searched for.
+        users (bool): Whether to search users instead of publications.
+        take (int): The number of results per page.
+        limit (int): The maximum number of results, all of them are shown if it
+            is None.
+        no_cache (bool): Whether to fetch every page from the server.
+    """
+    client, kind = ctx.obj["CLIENT"], "user" if users else "publication"
+    cache = SearchCache(
+        get_search_cache_file(ctx.obj["CLI_PATH"], ctx.obj.get("SERVER"))
+    )
+    try:
+        total = 0
+        for results, total in search_pages(
+            client, kind, query, take, limit, None if no_cache else cache
+        ):
+            for result in results:
+                echo_result(client.base_url, kind, result)
+        if total == 0:
+            click.echo(f"No {kind}s found")
+        elif limit is not None and limit < total:
+            click.echo(f"Showing {limit} of {total} {kind}s, use --limit to show more")
+    finally:
+        cache.close()
@@ -1,18 +1,168 @@
-import sys
+import json
 import click
+from datetime import datetime
+from typing import Iterator, Tuple
 from posixpath import join as urljoin
 
-from utils.call_api import call_api
 from utils.auth import authenticated
+from utils.index import get_index
+from utils.details import fetch_details
+from utils.client import (
+    POOL_SIZE,
+    IamusClient,
+    IamusError,
+    create_session,
+    get_auth_file,
+    get_base_url,
+)
 from utils.base_url import pass_base_url
+from utils.mutually_exclusive_options import MutuallyExclusiveOptions
+
+
+def echo_publications(
+    base_url: str,
+    publications: list[dict[str, object]],
+    name: str = None,
+    details: Iterator[Tuple[dict[str, object], dict[str, str]]] = None,
+) -> None:
+    if name is None:
+        click.echo("Listing all publications of the latest version:")
+    else:
+        click.echo(f"Listing all revisions of {name}:")
+
+    rows = details if details is not None else ((pub, None) for pub in publications)
+    for pub, pub_details in rows:
+        pub_url = urljoin(base_url, f"publication/{pub['id']}")
+        current = " [current]" if name is not None and pub["current"] else ""
+        click.echo(f"{pub['name']} ({pub['revision']}){current} - {pub_url}")
+        if pub_details is not None:
+            click.echo(
+                "    "
+                + ", ".join(f"{key}: {value}" for key, value in pub_details.items())
+            )
 
 
-@click.command()
-@click.pass_context
 @pass_base_url
 @authenticated
+def show_online(
+    ctx: click.core.Context,
+    name: str = None,
+    jobs: int = None,
+    client: IamusClient = None,
+) -> None:
+    """Show the publications or revisions, from the index while it is fresh.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        name (str, optional): The name of the publication whose revisions are
+            shown, the current publications are shown if it is None.
+        jobs (int, optional): The number of concurrent requests fetching the
+            details of the publications, they are not shown if it is None.
+        client (IamusClient): The authenticated client.
+    """
+    index = get_index(ctx)
+    try:
+        if index is None:
+            publications = (
+                client.list_publications()
+                if name is None
+                else client.list_revisions(name)
+            )
+        elif name is None:
+            if not index.is_fresh(client.username):
+                index.sync(client)
+            publications = index.publications(client.username)
+        else:
+            if not index.is_fresh(client.username, name):
+                index.sync_revisions(client, name)
+            publications = index.revisions(client.username, name)
+    except IamusError:
+        click.echo("No publications found")
+        return
+
+    details = None
+    if jobs is not None:
+        if jobs > POOL_SIZE:
+            client.session = create_session(pool_size=jobs)
+        details = fetch_details(client, publications, jobs)
+    echo_publications(client.base_url, publications, name, details)
+
+
+def show_offline(ctx: click.core.Context, name: str = None) -> None:
+    """Show the publications or revisions from the index only.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+        name (str, optional): The name of the publication whose revisions are
+            shown, the current publications are shown if it is None.
+    """
+    index = get_index(ctx)
+    if index is None:
+        click.echo("The local index is not enabled, use `index --enable` to enable it")
+        return
+
+    cli_path, server = ctx.obj["CLI_PATH"], ctx.obj.get("SERVER")
+    try:
+        with open(get_auth_file(cli_path, server), "r") as f:
+            username = json.load(f)["username"]
+        base_url = get_base_url(cli_path, server)
+    except (FileNotFoundError, KeyError, ValueError):
+        click.echo("Please login first")
+        return
+
+    synced_at = index.synced_at(username, name) or index.synced_at(username)
+    if synced_at is None:
+        click.echo("The local index is not synced, use `index --sync` to sync it")
+        return
+
+    if name is None:
+        publications = index.publications(username)
+    else:
+        publications = index.revisions(username, name)
+    if not publications:
+        click.echo("No publications found")
+        return
+
+    synced = datetime.fromtimestamp(synced_at).strftime("%Y-%m-%d %H:%M")
+    click.echo(f"Offline: the local index was synced at {synced}")
+    echo_publications(base_url, publications, name)
+
+
+@click.command()
+@click.option(
+    "--revisions",
+    "name",
+    help="Name of the publication whose revisions are shown",
+    type=str,
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Answer from the local index without contacting the server",
+)
+@click.option(
+    "--details",
+    is_flag=True,
+    help="Show the revision count, sources and reviews of every publication",
+    cls=MutuallyExclusiveOptions,
+    not_required_if=["offline"],
+)
+@click.option(
+    "--jobs",
+    default=POOL_SIZE,
+    show_default=True,
+    help="Concurrent requests fetching the details",
+    type=click.IntRange(min=1),
+)
+@click.pass_context
 def show(
-    ctx: click.core.Context, username: str = None, headers: dict[str, str] = None
+    ctx: click.core.Context,
+    name: str = None,
+    offline: bool = False,
+    details: bool = False,
+    jobs: int = POOL_SIZE,
 ) -> None:
     """CLI command showing all publications the current user is owning.
 
@@ -24,28 +174,33 @@ def show(
     Usage:
         $ iamus show
 
+    \b
+        To show all revisions of a publication, use:
+        $ iamus show --revisions <name>
+
+    \b
+        To show the publications from the local index without contacting the
+        server, use:
+        $ iamus show --offline
+
+    \b
+        To also show the number of revisions, the top-level sources and the
+        reviews of every publication, fetched concurrently, use:
+        $ iamus show --details [--jobs <jobs>]
+
     \f
     Args:
         ctx (click.core.Context): Context object to share global variables with
             subcommands.
-        username (str): The username obtained from the auth file.
-        headers (dict[str, str]): The headers obtained from the auth file, which
-            contains token for sending the request.
+        name (str, optional): The name of the publication whose revisions are
+            shown, the current publications are shown if it is None.
+        offline (bool, optional): Whether to only use the local index.
+        details (bool, optional): Whether to show the details of every
+            publication.
+        jobs (int, optional): The number of concurrent requests fetching the
+            details.
     """
-    base_url = ctx.obj["BASE_URL"]
-
-    show_api = urljoin(base_url, f"publication/{username}")
-    try:
-        show_res = call_api("GET", show_api, headers=headers)
-    except Exception as e:
-        click.echo(f"Unexpected error occurs: {e}")
-        sys.exit(1)
-
-    if show_res["status"] == "ok":
-        publications = show_res["publications"]
-        click.echo("Listing all publications of the latest version:")
-        for pub in publications:
-            pub_url = urljoin(base_url, f"publication/{pub['id']}")
-            click.echo(f"{pub['name']} ({pub['revision']}) - {pub_url}")
+    if offline:
+        show_offline(ctx, name)
     else:
-        click.echo("No publications found")
+        show_online(ctx, name, jobs if details else None)
@@ -1,49 +1,96 @@
-import sys
 import click
-from posixpath import join as urljoin
+import zipfile
+from typing import Optional
 
-from utils.call_api import call_api
 from utils.auth import authenticated
+from utils.client import IamusClient, IamusError
 from utils.base_url import pass_base_url
+from utils.index import get_index
 from utils.publication import get_id_name
+from utils.delta import plan_delta
+from utils.fanout import fan_out
+from utils.upload_queue import queueable
+from utils.transfer import ProgressReporter, TokenBucket, format_size
 from utils.mutually_exclusive_options import MutuallyExclusiveOptions
-from utils.callback import callback_wrapper, zipfile_validator, changelog_editor
+from utils.callback import (
+    callback_wrapper,
+    rate_validator,
+    zipfile_validator,
+    changelog_editor,
+)
 
 from commands.revise import revise
 
 
 def call_upload_api(
-    base_url: str, pub_id: str, name: str, file: str, headers: dict[str, str]
-) -> dict[str, object]:
+    client: IamusClient,
+    pub_id: str,
+    name: str,
+    file: str,
+    max_rate: int = None,
+    quiet: bool = False,
+    delta: bool = False,
+) -> Optional[IamusError]:
     """Call the upload API to upload a zipfile to the server.
 
+    The zipfile is streamed to the server while its progress is reported, and
+    the upload rate is limited if `max_rate` is specified. With `delta`, only
+    the members which differ from the previous revision are sent, the whole
+    zipfile is sent if that is not possible.
+
     Args:
-        base_url (str): The base URL of the server.
+        client (IamusClient): The authenticated client.
         pub_id (str): The id of the publication to be uploaded.
         name (str): The name of the publication to be uploaded.
         file (str): The path of the zipfile which is to be uploaded.
-        headers (dict[str, str]): The headers obtained from the auth file, which
-            contains token for sending the request.
+        max_rate (int, optional): The maximum upload rate in bytes per second.
+        quiet (bool, optional): Whether the progress is reported as periodic
+            JSON events instead of a progress line.
+        delta (bool, optional): Whether to upload only the changes against the
+            previous revision.
 
     Returns:
-        dict[str, object]: The response of the upload API in JSON format, it is
-            returned only when request fails.
+        Optional[IamusError]: The error of the upload API, it is returned only
+            when request fails.
     """
-    upload_api = urljoin(base_url, f"resource/upload/publication/{pub_id}")
-    upload_body = {"file": (file, open(file, "rb"), "application/zip")}
-    try:
-        upload_res = call_api("POST", upload_api, files=upload_body, headers=headers)
-    except Exception as e:
-        click.echo(f"Unexpected error occurs: {e}")
-        sys.exit(1)
-
-    if upload_res["status"] == "ok":
-        pub_url = urljoin(base_url, f"publication/{pub_id}")
-        click.echo(f"Success: File uploaded to {name}({pub_url})")
-        sys.exit(1)
+    bucket = TokenBucket(max_rate) if max_rate else None
+    progress = ProgressReporter(label=name, quiet=quiet)
+    plan = None
+    if delta:
+        try:
+            plan = plan_delta(client, pub_id, name, file)
+        except (IamusError, zipfile.BadZipFile) as e:
+            click.echo(f"Cannot compare to the previous revision: {e}")
+        if plan is None:
+            click.echo("Uploading the whole zipfile")
 
-    click.echo(f"Response Error: {upload_res['message']}")
-    return upload_res
+    try:
+        if plan is not None:
+            base, changed, data, manifest = plan
+            click.echo(
+                f"Uploading the changes against {base['revision']}: "
+                f"{len(changed)} added or changed and {len(manifest['removed'])} "
+                f"removed members, {format_size(len(data))}"
+            )
+            try:
+                client.upload(pub_id, file, bucket, progress, data, manifest)
+            except IamusError as e:
+                if e.status_code != 404:
+                    raise
+                # the publication exists, so the server has no delta endpoint
+                client.resolve(pub_id=pub_id)
+                click.echo(
+                    "The server does not accept deltas, uploading the whole zipfile"
+                )
+                plan, progress = None, ProgressReporter(label=name, quiet=quiet)
+        if plan is None:
+            client.upload(pub_id, file, bucket, progress)
+    except IamusError as e:
+        click.echo(f"Response Error: {e}")
+        return e
+
+    pub_url = client.url(f"publication/{pub_id}")
+    click.echo(f"Success: File uploaded to {name}({pub_url})")
 
 
 @click.command()
@@ -71,16 +118,44 @@ def call_upload_api(
     type=str,
     not_required_if=["pub_id"],
 )
+@click.option(
+    "--max-rate",
+    help="Maximum upload rate in bytes per second, e.g. 512K or 2M",
+    type=str,
+    callback=callback_wrapper(rate_validator),
+)
+@click.option("--quiet", is_flag=True, help="Report progress as periodic JSON events")
+@click.option(
+    "--queue",
+    is_flag=True,
+    help="Queue the upload and send it in the background",
+)
+@click.option(
+    "--to",
+    help="Comma separated server profiles to upload to concurrently, or all",
+    type=str,
+)
+@click.option(
+    "--delta",
+    is_flag=True,
+    help="Upload only the members which changed since the previous revision",
+    cls=MutuallyExclusiveOptions,
+    not_required_if=["queue", "to"],
+)
 @click.pass_context
+@queueable
+@fan_out
 @pass_base_url
 @authenticated
 def upload(
     ctx: click.core.Context,
     file: str,
+    max_rate: int,
+    quiet: bool,
+    delta: bool,
     pub_id: str = None,
     name: str = None,
-    username: str = None,
-    headers: dict[str, str] = None,
+    client: IamusClient = None,
 ) -> None:
     """CLI command for the user to upload a zipfile to a specified publication.
 
@@ -90,36 +165,55 @@ def upload(
         or
         $ iamus upload --file <file> --name <name>
 
+    \b
+        To limit the upload rate and report progress as JSON events, use:
+        $ iamus upload --file <file> --name <name> --max-rate 2M --quiet
+
+    \b
+        To queue the upload and send it in the background, use:
+        $ iamus upload --file <file> --name <name> --queue
+
+    \b
+        To upload to every configured server concurrently, use:
+        $ iamus upload --file <file> --name <name> --to all
+
+    \b
+        To upload only the members which changed since the previous revision,
+        use:
+        $ iamus upload --file <file> --name <name> --delta
+
     \f
     Args:
         ctx (click.core.Context): Context object to share global variables with
             subcommands.
         file (str): The path of the zipfile specified by the user.
+        max_rate (int): The maximum upload rate in bytes per second, the rate
+            is not limited if it is None.
+        quiet (bool): Whether the progress is reported as periodic JSON events.
+        delta (bool): Whether to upload only the changes against the previous
+            revision.
         pub_id (str, optional): The id of the publication specified by the user,
             it is required if `name` is not specified.
         name (str, optional): The name of the publication specified by the user,
             it is required if `pub_id` is not specified.
-        username (str): The username obtained from the auth file.
-        headers (dict[str, str]): The headers obtained from the auth file, which
-            contains token for sending the request.
+        client (IamusClient): The authenticated client.
     """
-    base_url = ctx.obj["BASE_URL"]
-
-    pub_id, name = get_id_name(base_url, username, headers, pub_id, name)
+    index = get_index(ctx)
+    pub_id, name = get_id_name(client, pub_id, name, index)
     if not all([pub_id, name]):
         return
 
     # upload
-    upload_res = call_upload_api(base_url, pub_id, name, file, headers)
-    try:
-        assert upload_res["errors"]["file"]["code"] == 100
-    except KeyError:
+    upload_error = call_upload_api(client, pub_id, name, file, max_rate, quiet, delta)
+    if upload_error is None and index is not None:
+        index.invalidate(client.username, name)
+    if upload_error is None or "file" not in upload_error.errors:
         return
-    except AssertionError:
-        click.echo(f"Error: {upload_res['errors']['file']['message']}")
+    if upload_error.code("file") != 100:
+        click.echo(f"Error: {upload_error.errors['file']['message']}")
         return
 
-    click.echo(upload_res["errors"]["file"]["message"])
+    click.echo(upload_error.errors["file"]["message"])
     click.confirm("Do you want to upload it to a new revision?", abort=True)
 
     # revise
@@ -139,4 +233,6 @@ def upload(
         return
 
     # upload to the new publication
-    call_upload_api(base_url, new_id, name, file, headers)
+    upload_error = call_upload_api(client, new_id, name, file, max_rate, quiet, delta)
+    if upload_error is None and index is not None:
+        index.invalidate(client.username, name)
@@ -0,0 +1,506 @@
+"""A stand-in for the Iamus API to run the CLI against without a real server.
+
+It implements the routes the CLI uses with in-memory state, so tests and
+benchmarks can run offline. It can also be started on its own:
+
+    $ python -m tests.stand_in --port 5000
+    $ iamus config --server stand-in --base-url http://localhost:5000/
+    $ iamus --server stand-in login --username user --password password
+"""
+
+import io
+import re
+import json
+import time
+import uuid
+import zipfile
+import argparse
+import threading
+from email.parser import BytesParser
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInState:
+    """The users, tokens and publications of the stand-in."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.users = {"user": "password"}
+        self.tokens = {}
+        self.publications = {}
+        self.archives = {}
+        self.reviews = {}
+        self.notifications = []
+        # handlers of routes answered with a 404, to mimic older servers
+        self.missing_routes = set()
+        # bytes of response bodies sent, to measure the bandwidth of a command
+        self.sent = 0
+        self.lock = threading.RLock()
+
+    def add_publication(
+        self,
+        name: str,
+        revision: str = "v1",
+        owner: str = "user",
+        draft: bool = False,
+        files: dict[str, bytes] = None,
+    ) -> dict[str, object]:
+        """Add the current revision of a publication, with its sources."""
+        with self.lock:
+            for pub in self.publications.values():
+                if pub["owner"] == owner and pub["name"] == name:
+                    pub["current"] = False
+
+            now = int(time.time() * 1000)
+            pub = {
+                "id": uuid.uuid4().hex[:24],
+                "owner": owner,
+                "name": name,
+                "title": name.title(),
+                "revision": revision,
+                "draft": draft,
+                "current": True,
+                "createdAt": now,
+                "updatedAt": now,
+            }
+            self.publications[pub["id"]] = pub
+            if files is not None:
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w") as archive:
+                    for filename, content in files.items():
+                        archive.writestr(filename, content)
+                self.archives[pub["id"]] = buffer.getvalue()
+            return pub
+
+    def add_review(
+        self, pub_id: str, owner: str = "user", status: str = "started"
+    ) -> dict[str, object]:
+        """Add a review on a publication."""
+        with self.lock:
+            review = {"id": uuid.uuid4().hex[:24], "owner": owner, "status": status}
+            self.reviews.setdefault(pub_id, []).append(review)
+            return review
+
+    def add_notification(
+        self, tagging: str = "user", author: str = "user"
+    ) -> dict[str, object]:
+        """Add a notification tagging a user in a comment."""
+        with self.lock:
+            now = int(time.time() * 1000)
+            if self.notifications:
+                # keep the notifications in the order they were created
+                now = max(now, self.notifications[-1]["createdAt"] + 1)
+            notification = {
+                # ids increase like object ids, so they can be compared
+                "id": f"{len(self.notifications) + 1:024x}",
+                "commentId": uuid.uuid4().hex[:24],
+                "tagging": {"username": tagging},
+                "author": {"username": author},
+                "createdAt": now,
+                "updatedAt": now,
+            }
+            self.notifications.append({**notification, "viewed": False})
+            return notification
+
+    def view_notification(self, notification_id: str) -> None:
+        with self.lock:
+            for notification in self.notifications:
+                if notification["id"] == notification_id:
+                    notification["viewed"] = True
+
+    def find(self, owner: str, name: str, revision: str = None) -> dict[str, object]:
+        for pub in self.publications.values():
+            if pub["owner"] != owner or pub["name"] != name:
+                continue
+            if pub["revision"] == revision or (revision is None and pub["current"]):
+                return pub
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # send every response in one segment, instead of waiting for delayed ACKs
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    state: StandInState = None
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(
+        self, code: int, body: bytes, content_type: str, headers: dict = None
+    ) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.state.lock:
+            self.state.sent += len(body)
+
+    def ok(self, **data) -> None:
+        self._send(
+            200, json.dumps({"status": "ok", **data}).encode(), "application/json"
+        )
+
+    def error(self, code: int, message: str, errors: dict = None) -> None:
+        body = {"status": "error", "message": message}
+        if errors is not None:
+            body["errors"] = errors
+        self._send(code, json.dumps(body).encode(), "application/json")
+
+    def _user(self) -> str:
+        header = self.headers.get("Authorization", "")
+        return self.state.tokens.get(header.removeprefix("Bearer "))
+
+    def _form(self, body: bytes) -> dict[str, object]:
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser().parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            return {
+                part.get_param("name", header="content-disposition"): part.get_payload(
+                    decode=True
+                )
+                for part in message.get_payload()
+            }
+        if content_type.startswith("application/json"):
+            return json.loads(body or b"{}")
+        return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    def _handle(self, method: str) -> None:
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        url = urlparse(self.path)
+        path, query = url.path.strip("/"), {
+            key: values[0] for key, values in parse_qs(url.query).items()
+        }
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        form = self._form(body) if method == "POST" else {}
+
+        if path == "version":
+            return self.ok(version="stand-in")
+        if method == "POST" and path == "auth/login":
+            return self.login(form)
+        if method == "POST" and path == "auth/session":
+            return self.session(form)
+        search = re.fullmatch(r"search/(publication|user)", path)
+        if method == "GET" and search is not None:
+            with self.state.lock:
+                return self.search(None, query, form, search.group(1))
+
+        username = self._user()
+        if username is None:
+            return self.error(401, "Unauthorized")
+        with self.state.lock:
+            for pattern, handler in ROUTES:
+                match = re.fullmatch(pattern, f"{method} {path}")
+                if match and handler not in self.state.missing_routes:
+                    return handler(self, username, query, form, *match.groups())
+        self.error(404, "Resource not found")
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def login(self, form: dict[str, object]) -> None:
+        username = form.get("username")
+        if self.state.users.get(username) != form.get("password"):
+            return self.error(401, "Invalid username or password")
+        self.issue(username)
+
+    def session(self, form: dict[str, object]) -> None:
+        username = self.state.tokens.get(form.get("refreshToken"))
+        if username is None:
+            return self.error(401, "Invalid JWT")
+        self.issue(username)
+
+    def issue(self, username: str) -> None:
+        token, refresh_token = uuid.uuid4().hex, uuid.uuid4().hex
+        self.state.tokens[token] = self.state.tokens[refresh_token] = username
+        self.ok(token=token, refreshToken=refresh_token, user={"username": username})
+
+    def list_publications(self, username, query, form, owner) -> None:
+        skip, take = int(query.get("skip", 0)), int(query.get("take", 50))
+        pubs = [
+            pub
+            for pub in reversed(list(self.state.publications.values()))
+            if pub["owner"] == owner and pub["current"]
+        ]
+        self.ok(
+            publications=pubs[skip : skip + take], total=len(pubs), skip=skip, take=take
+        )
+
+    def get_publication(self, username, query, form, owner, name) -> None:
+        pub = self.state.find(owner, name, query.get("revision"))
+        if pub is None:
+            return self.error(404, "Publication not found")
+        self.ok(publication=pub)
+
+    def list_revisions(self, username, query, form, owner, name) -> None:
+        skip, take = int(query.get("skip", 0)), int(query.get("take", 50))
+        revisions = [
+            pub
+            for pub in reversed(list(self.state.publications.values()))
+            if pub["owner"] == owner and pub["name"] == name
+        ]
+        self.ok(revisions=revisions[skip : skip + take], skip=skip, take=take)
+
+    def revise(self, username, query, form, owner, name) -> None:
+        current = self.state.find(owner, name)
+        if current is None:
+            return self.error(404, "Publication not found")
+        if current["draft"]:
+            return self.error(400, "Publication is still drafted")
+        if self.state.find(owner, name, form.get("revision")) is not None:
+            return self.error(
+                400,
+                "Bad request",
+                {"revision": {"message": "Revision already exists"}},
+            )
+        pub = self.state.add_publication(name, form["revision"], owner, True)
+        self.ok(publication=pub)
+
+    def get_by_id(self, username, query, form, pub_id) -> None:
+        pub = self.state.publications.get(pub_id)
+        if pub is None:
+            return self.error(404, "Publication not found")
+        self.ok(publication=pub)
+
+    def list_reviews(self, username, query, form, pub_id) -> None:
+        if pub_id not in self.state.publications:
+            return self.error(404, "Publication not found")
+        self.ok(reviews=self.state.reviews.get(pub_id, []))
+
+    def search(self, username, query, form, kind) -> None:
+        skip, take = int(query.get("skip", 0)), int(query.get("take", 50))
+        words = query.get("query", "").lower().split()
+        if kind == "user":
+            key, results = "users", [{"username": user} for user in self.state.users]
+            fields = ["username"]
+        else:
+            key, fields = "publications", ["name", "title"]
+            results = [
+                pub
+                for pub in reversed(list(self.state.publications.values()))
+                if not pub["draft"]
+            ]
+        results = [
+            result
+            for result in results
+            if any(word in result[field].lower() for word in words for field in fields)
+        ]
+        self.ok(
+            **{key: results[skip : skip + take]},
+            total=len(results),
+            skip=skip,
+            take=take,
+        )
+
+    def list_notifications(self, username, query, form) -> None:
+        skip, take = int(query.get("skip", 0)), int(query.get("take", 50))
+        after = query.get("after", "")
+        notifications = [
+            {key: value for key, value in notification.items() if key != "viewed"}
+            for notification in self.state.notifications
+            if notification["tagging"]["username"] == username
+            and not notification["viewed"]
+            and notification["id"] > after
+        ]
+        self.ok(notifications=notifications[skip : skip + take])
+
+    def _archive(self, pub_id: str) -> zipfile.ZipFile:
+        if pub_id not in self.state.archives:
+            return None
+        return zipfile.ZipFile(io.BytesIO(self.state.archives[pub_id]))
+
+    def tree(self, username, query, form, pub_id, path) -> None:
+        archive = self._archive(pub_id)
+        if archive is None:
+            return self.error(404, "Resource not found")
+
+        path = path.strip("/")
+        for info in archive.infolist():
+            if info.filename == path:
+                entry = {"type": "file", "filename": path, "updatedAt": 0}
+                return self.ok(entry=entry)
+
+        prefix = f"{path}/" if path else ""
+        children = {}
+        for info in archive.infolist():
+            if not info.filename.startswith(prefix):
+                continue
+            child, _, rest = info.filename[len(prefix) :].partition("/")
+            if child:
+                children[child] = "directory" if rest or info.is_dir() else "file"
+        if not children:
+            return self.error(404, "Resource not found")
+
+        entries = [
+            {"type": kind, "filename": child, "updatedAt": 0}
+            for child, kind in sorted(children.items())
+        ]
+        self.ok(entry={"type": "directory", "filename": path, "entries": entries})
+
+    def download(self, username, query, form, pub_id, path) -> None:
+        archive = self._archive(pub_id)
+        try:
+            content = archive.read(path)
+        except (AttributeError, KeyError):
+            return self.error(404, "Resource not found")
+        self._send(200, content, "application/octet-stream")
+
+    def zip(self, username, query, form, pub_id) -> None:
+        if pub_id not in self.state.archives:
+            return self.error(404, "Resource not found")
+        archive = self.state.archives[pub_id]
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match is None:
+            return self._send(200, archive, "application/zip")
+
+        first, last = match.groups()
+        if not first:
+            first, last = max(len(archive) - int(last), 0), len(archive) - 1
+        first, last = int(first), min(int(last or len(archive) - 1), len(archive) - 1)
+        self._send(
+            206,
+            archive[first : last + 1],
+            "application/zip",
+            {"Content-Range": f"bytes {first}-{last}/{len(archive)}"},
+        )
+
+    def _draft(self, pub_id: str) -> dict[str, object]:
+        """Get a publication whose sources can be uploaded, or send the error."""
+        pub = self.state.publications.get(pub_id)
+        if pub is None:
+            return self.error(404, "Publication not found")
+        if not pub["draft"]:
+            return self.error(
+                400,
+                "Bad request",
+                {
+                    "file": {
+                        "code": 100,
+                        "message": "Cannot modify publication sources that "
+                        "aren't marked as draft.",
+                    }
+                },
+            )
+        return pub
+
+    def upload(self, username, query, form, pub_id) -> None:
+        pub = self._draft(pub_id)
+        if pub is None:
+            return
+        self.state.archives[pub_id] = form["file"]
+        pub["draft"] = False
+        pub["updatedAt"] = int(time.time() * 1000)
+        self.ok()
+
+    def upload_delta(self, username, query, form, pub_id) -> None:
+        """Rebuild the sources from those of a base publication and a delta.
+
+        The form has the `manifest` field, `{"base": <id>, "removed": [...]}`,
+        and the `file` field, a zipfile with the added and changed members.
+        """
+        pub = self._draft(pub_id)
+        if pub is None:
+            return
+        manifest = json.loads(form["manifest"])
+        base = self.state.publications.get(manifest["base"])
+        if base is None or (base["owner"], base["name"]) != (
+            pub["owner"],
+            pub["name"],
+        ):
+            return self.error(
+                400, "Bad request", {"base": {"message": "Not a revision"}}
+            )
+        if base["id"] not in self.state.archives:
+            return self.error(404, "Resource not found")
+
+        delta = zipfile.ZipFile(io.BytesIO(form["file"]))
+        replaced = set(manifest["removed"]) | set(delta.namelist())
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            source = self._archive(base["id"])
+            for info in source.infolist():
+                if info.filename not in replaced:
+                    archive.writestr(info, source.read(info))
+            for info in delta.infolist():
+                archive.writestr(info, delta.read(info))
+        self.state.archives[pub_id] = buffer.getvalue()
+        pub["draft"] = False
+        pub["updatedAt"] = int(time.time() * 1000)
+        self.ok()
+
+
+ROUTES = [
+    (r"GET publication/([^/]+)", StandInHandler.list_publications),
+    (r"GET publication/([^/]+)/([^/]+)", StandInHandler.get_publication),
+    (r"GET publication/([^/]+)/([^/]+)/revisions", StandInHandler.list_revisions),
+    (r"POST publication/([^/]+)/([^/]+)/revise", StandInHandler.revise),
+    (r"GET publication-by-id/([^/]+)", StandInHandler.get_by_id),
+    (r"GET publication-by-id/([^/]+)/reviews", StandInHandler.list_reviews),
+    (r"GET publication-by-id/([^/]+)/tree/?(.*)", StandInHandler.tree),
+    (r"GET publication-by-id/([^/]+)/download/(.+)", StandInHandler.download),
+    (r"GET publication-by-id/([^/]+)/zip", StandInHandler.zip),
+    (r"GET notifications", StandInHandler.list_notifications),
+    (r"POST resource/upload/publication/([^/]+)", StandInHandler.upload),
+    (r"POST resource/upload/publication/([^/]+)/delta", StandInHandler.upload_delta),
+]
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    # accept bursts of concurrent connections, which the default backlog of 5
+    # drops until the client retries a second later
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StandInServer:
+    """Run the stand-in on a free local port in a background thread.
+
+    Example:
+        with StandInServer() as server:
+            client = IamusClient(server.base_url)
+            client.login("user", "password")
+
+    Args:
+        latency (float, optional): Seconds every request is delayed by.
+        port (int, optional): Port to listen on, a free port is used if it is 0.
+    """
+
+    def __init__(self, latency: float = 0.0, port: int = 0) -> None:
+        self.state = StandInState(latency)
+        handler = type("Handler", (StandInHandler,), {"state": self.state})
+        self.httpd = StandInHTTPServer(("127.0.0.1", port), handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Iamus API stand-in")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandInServer(args.latency, args.port)
+    server.state.add_publication(
+        "example", draft=True, files={"README.md": b"# Example"}
+    )
+    print(f"Serving the Iamus API stand-in at {server.base_url}")
+    server.httpd.serve_forever()
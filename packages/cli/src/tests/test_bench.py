@@ -0,0 +1,104 @@
+import time
+import unittest
+import threading
+
+from utils.client import IamusClient
+from tests.stand_in import StandInServer
+from utils.bench import Bench, Pacer, VirtualUser, parse_mix, percentile
+
+
+class BenchTest(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("show=6, lookup"), {"show": 6, "lookup": 1})
+        with self.assertRaises(ValueError):
+            parse_mix("delete=1")
+        with self.assertRaises(ValueError):
+            parse_mix("show=0")
+
+    def test_percentile(self):
+        latencies = [i / 100 for i in range(1, 101)]
+        self.assertEqual(percentile(latencies, 50), 0.5)
+        self.assertEqual(percentile(latencies, 99), 0.99)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_pacer(self):
+        pacer = Pacer(rate=100)
+        started = time.monotonic()
+        for _ in range(20):
+            pacer.wait()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_latency_from_schedule(self):
+        class SlowUser(VirtualUser):
+            def __init__(self):
+                pass
+
+            def run(self, operation):
+                time.sleep(0.05)
+
+        # one operation at a time can only keep up with 20 of the 100 per second
+        bench = Bench(users=1, duration=0.5, mix={"show": 1}, rate=100)
+        stats = bench.run(SlowUser)
+
+        latencies = stats.latencies["show"]
+        self.assertGreater(len(latencies), 5)
+        # the time held back behind the slow operations counts towards latency
+        self.assertGreater(max(latencies), 0.2)
+        self.assertEqual(latencies, sorted(latencies))
+
+    def test_run_against_stand_in(self):
+        with StandInServer(latency=0.01) as server:
+            pub = server.state.add_publication("pub", files={"a": b"a"})
+            client = IamusClient(server.base_url)
+            client.login("user", "password")
+
+            bench = Bench(
+                users=4,
+                duration=0.5,
+                mix={"show": 2, "lookup": 1, "upload": 1, "login": 1},
+                ramp_up=0.1,
+                concurrency=2,
+                seed=1,
+            )
+            archive = server.state.archives[pub["id"]]
+            lock = threading.Lock()
+            stats = bench.run(
+                lambda: VirtualUser(client, "pub", archive, "password", lock)
+            )
+
+        summary = stats.summary()
+        self.assertGreater(summary["total"]["count"], 10)
+        self.assertEqual(summary["total"]["errors"], 0)
+        self.assertEqual(
+            set(summary["operations"]), {"show", "lookup", "upload", "login"}
+        )
+        # at most two operations of 10ms are in flight at a time
+        self.assertLessEqual(summary["total"]["throughput"], 2 / 0.01 * 1.1)
+
+    def test_uploads_to_new_revisions(self):
+        with StandInServer() as server:
+            pub = server.state.add_publication("pub", files={"a": b"a"})
+            client = IamusClient(server.base_url)
+            client.login("user", "password")
+
+            bench = Bench(users=4, duration=0.5, mix={"upload": 2, "revise": 1})
+            archive = server.state.archives[pub["id"]]
+            lock = threading.Lock()
+            stats = bench.run(lambda: VirtualUser(client, "pub", archive, None, lock))
+            revisions = [
+                revision
+                for revision in server.state.publications.values()
+                if revision["name"] == "pub"
+            ]
+
+        summary = stats.summary()
+        self.assertGreater(summary["operations"]["upload"]["count"], 3)
+        self.assertEqual(summary["total"]["errors"], 0)
+        # every upload and revise is made to a revision of its own, which is
+        # left live for the next one
+        self.assertEqual(len(revisions), summary["total"]["count"] + 1)
+        self.assertFalse(any(revision["draft"] for revision in revisions))
+
+
+if __name__ == "__main__":
+    unittest.main()
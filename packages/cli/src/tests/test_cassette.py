@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from utils.client import IamusClient, IamusError
+from tests.stand_in import StandInServer
+from utils.cassette import CASSETTE_ENVVAR, CASSETTE_MODE_ENVVAR, REDACTED, Cassette
+
+
+class CassetteTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cassette.jsonl")
+
+    def use_cassette(self, mode: str) -> None:
+        patcher = mock.patch.dict(
+            os.environ, {CASSETTE_ENVVAR: self.path, CASSETTE_MODE_ENVVAR: mode}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_commands(self, base_url: str) -> tuple:
+        client = IamusClient(base_url)
+        client.login("user", "password")
+        publications = client.list_publications(take=10)
+        content = client.download(publications[0]["id"], "a.bin")
+        with self.assertRaises(IamusError):
+            client.resolve(name="missing")
+        return publications, content
+
+    def test_record_and_replay(self):
+        self.use_cassette("record")
+        with StandInServer() as server:
+            server.state.add_publication("pub", files={"a.bin": b"\xff\x00"})
+            recorded = self.run_commands(server.base_url)
+            base_url = server.base_url
+
+        with open(self.path) as f:
+            login = json.loads(f.readline())
+        self.assertIn(["password", REDACTED], login["request"]["body"]["form"])
+        self.assertEqual(login["response"]["body"]["json"]["token"], REDACTED)
+
+        # the server is gone, every response comes from the cassette
+        self.use_cassette("replay")
+        self.assertEqual(self.run_commands(base_url), recorded)
+
+        client = IamusClient(base_url)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.list_revisions("pub")
+
+    def test_replay_latency(self):
+        with open(self.path, "w") as f:
+            exchange = {
+                "request": {"method": "GET", "url": "http://x/version", "body": None},
+                "response": {
+                    "status": 200,
+                    "reason": "OK",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": {"json": {"status": "ok", "version": "1"}},
+                    "elapsed": 0.05,
+                },
+            }
+            f.write(json.dumps(exchange) + "\n")
+
+        cassette = Cassette(self.path, "replay", "recorded")
+        request = requests.Request("GET", "http://x/version").prepare()
+        started = time.monotonic()
+        response = cassette.replay(request)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(response.json()["version"], "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.client import IamusClient, IamusError
+
+
+def response(status_code, body):
+    res = mock.Mock(status_code=status_code, ok=status_code < 400, reason="")
+    res.json.return_value = body
+    return res
+
+
+class IamusClientTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.auth_file = Path(self.tmp.name) / "auth.json"
+        self.session = mock.Mock()
+        self.client = IamusClient("http://iamus/", self.auth_file, self.session)
+        self.client.username = "user"
+        self.client.token, self.client.refresh_token = "expired", "refresh"
+
+    def test_refreshes_expired_token(self):
+        self.session.request.side_effect = [
+            response(401, {"status": "error", "message": "Unauthorized"}),
+            response(200, {"status": "ok", "publications": []}),
+        ]
+        self.session.post.return_value = response(
+            200, {"status": "ok", "token": "new", "refreshToken": "refresh2"}
+        )
+
+        self.assertEqual(self.client.list_publications(), [])
+        retry_headers = self.session.request.call_args.kwargs["headers"]
+        self.assertEqual(retry_headers["Authorization"], "Bearer new")
+        with open(self.auth_file) as f:
+            self.assertEqual(json.load(f)["refreshToken"], "refresh2")
+
+    def test_error_response(self):
+        self.session.request.return_value = response(
+            400,
+            {
+                "status": "error",
+                "message": "Bad request",
+                "errors": {"file": {"code": 100, "message": "Exists"}},
+            },
+        )
+
+        with self.assertRaises(IamusError) as cm:
+            self.client.resolve(name="publication")
+        self.assertEqual(cm.exception.message, "Bad request")
+        self.assertEqual(cm.exception.code("file"), 100)
+        self.assertIsNone(cm.exception.code("revision"))
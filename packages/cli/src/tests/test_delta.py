@@ -0,0 +1,161 @@
+import io
+import zipfile
+import contextlib
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Tuple
+from unittest import mock
+
+from utils.client import IamusClient
+from commands.upload import call_upload_api
+from tests.stand_in import StandInHandler, StandInServer
+from utils import delta
+from utils.delta import compare_members, find_base, plan_delta
+from utils.remote_zip import read_central_directory
+
+
+def make_archive(files: dict[str, bytes], prefix: bytes = b"") -> bytes:
+    buffer = io.BytesIO()
+    buffer.write(prefix)
+    with zipfile.ZipFile(buffer, "a" if prefix else "w", zipfile.ZIP_DEFLATED) as f:
+        for name, content in files.items():
+            f.writestr(name, content)
+    return buffer.getvalue()
+
+
+class DeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.state = self.server.state
+        self.client = IamusClient(self.server.base_url)
+        self.client.login("user", "password")
+
+    def assert_members(self, archive: bytes) -> None:
+        pub = self.state.add_publication("pub")
+        self.state.archives[pub["id"]] = archive
+        self.state.sent = 0
+
+        members = read_central_directory(self.client, pub["id"])
+        expected = zipfile.ZipFile(io.BytesIO(archive)).infolist()
+        self.assertEqual(
+            [(info.filename, info.CRC, info.file_size) for info in members],
+            [(info.filename, info.CRC, info.file_size) for info in expected],
+        )
+        for info in members:
+            offset = info.header_offset
+            self.assertEqual(archive[offset : offset + 4], b"PK\x03\x04")
+
+    def test_central_directory(self):
+        large = {f"file{i}.txt": b"x" * 1000 for i in range(500)}
+        # the central directory is larger than the first read
+        self.assert_members(make_archive(large))
+        self.assertLess(self.state.sent, 64 * 1024)
+        self.assert_members(make_archive({"a": b"a"}, prefix=b"#!/bin/sh\n"))
+        self.assert_members(make_archive({}))
+        with mock.patch.object(zipfile, "ZIP_FILECOUNT_LIMIT", 1):
+            self.assert_members(make_archive({"a": b"a", "b/c": b"c"}))
+
+    def test_compare_members(self):
+        old = zipfile.ZipFile(
+            io.BytesIO(make_archive({"a": b"a", "b": b"b", "c": b"c"}))
+        )
+        new = zipfile.ZipFile(
+            io.BytesIO(make_archive({"a": b"a", "b": b"B", "d": b""}))
+        )
+        self.assertEqual(
+            compare_members(new.infolist(), old.infolist()), (["b", "d"], ["c"])
+        )
+
+    def test_find_base_on_later_pages(self):
+        revisions = [
+            self.state.add_publication("pub", f"v{i}", files={"a": b"a"})
+            for i in range(7)
+        ]
+        # the target is the last revision of the second page, its base is the
+        # first revision of the third page
+        self.assertEqual(
+            find_base(self.client, revisions[3]["id"], "pub", page_size=2),
+            revisions[2],
+        )
+        self.assertEqual(
+            find_base(self.client, revisions[1]["id"], "pub", page_size=3),
+            revisions[0],
+        )
+        self.assertIsNone(find_base(self.client, revisions[0]["id"], "pub", 2))
+        self.assertIsNone(find_base(self.client, "missing", "pub", 2))
+
+    def test_delta_upload(self):
+        files = {f"data/{i}.bin": bytes([i]) * 100_000 for i in range(20)}
+        base = self.state.add_publication("pub", files=files)
+        target = self.state.add_publication("pub", "v2", draft=True)
+        self.assertEqual(find_base(self.client, target["id"], "pub"), base)
+        self.assertIsNone(find_base(self.client, base["id"], "pub"))
+
+        changed_files = dict(files)
+        changed_files["data/0.bin"] = b"changed"
+        del changed_files["data/1.bin"]
+        changed_files["new.txt"] = b"new"
+        with tempfile.TemporaryDirectory() as tmp:
+            file = Path(tmp) / "pub.zip"
+            file.write_bytes(make_archive(changed_files))
+
+            self.state.sent = 0
+            _, changed, data, manifest = plan_delta(
+                self.client, target["id"], "pub", str(file)
+            )
+            self.assertLess(self.state.sent, 16 * 1024)
+            self.assertEqual(changed, ["data/0.bin", "new.txt"])
+            self.assertEqual(manifest, {"base": base["id"], "removed": ["data/1.bin"]})
+            self.assertLess(len(data), 1024)
+
+            self.client.upload(target["id"], str(file), data=data, manifest=manifest)
+
+        rebuilt = zipfile.ZipFile(io.BytesIO(self.state.archives[target["id"]]))
+        self.assertEqual(
+            {name: rebuilt.read(name) for name in rebuilt.namelist()}, changed_files
+        )
+
+    def upload_changed(self, plan=plan_delta) -> Tuple[dict, bytes, object, str]:
+        base = self.state.add_publication("pub", files={"a": b"a", "b": b"b"})
+        target = self.state.add_publication("pub", "v2", draft=True)
+        archive = make_archive({"a": b"a", "b": b"B"})
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(
+            output
+        ), mock.patch("commands.upload.plan_delta", plan):
+            file = Path(tmp) / "pub.zip"
+            file.write_bytes(archive)
+            error = call_upload_api(
+                self.client, target["id"], "pub", str(file), quiet=True, delta=True
+            )
+        self.assertIn(
+            f"Uploading the changes against {base['revision']}", output.getvalue()
+        )
+        return target, archive, error, output.getvalue()
+
+    def test_delta_upload_without_endpoint(self):
+        self.state.missing_routes.add(StandInHandler.upload_delta)
+        target, archive, error, output = self.upload_changed()
+
+        self.assertIsNone(error)
+        self.assertIn("does not accept deltas", output)
+        self.assertEqual(self.state.archives[target["id"]], archive)
+
+    def test_delta_upload_of_deleted_publication(self):
+        def plan_then_delete(client, pub_id, name, file):
+            planned = delta.plan_delta(client, pub_id, name, file)
+            del self.state.publications[pub_id]
+            return planned
+
+        target, _, error, output = self.upload_changed(plan_then_delete)
+
+        self.assertEqual(error.status_code, 404)
+        self.assertNotIn("does not accept deltas", output)
+        self.assertNotIn(target["id"], self.state.archives)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import cli
+from click.testing import CliRunner
+from commands.diff import diff_content
+from tests.stand_in import StandInServer
+
+
+class DiffTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.state = self.server.state
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        (Path(tmp.name) / "config").mkdir()
+        with open(Path(tmp.name) / "config/config.json", "w") as f:
+            json.dump({"baseUrl": self.server.base_url}, f)
+        patcher = mock.patch.object(cli, "cli_path", Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.runner = CliRunner()
+        self.runner.invoke(
+            cli.cli, ["login", "--username", "user", "--password", "password"]
+        )
+
+    def test_diff_content(self):
+        self.assertEqual(
+            diff_content("a.txt", b"a\nb", b"a\nc", "v1", "v2"),
+            "--- v1/a.txt\n+++ v2/a.txt\n@@ -1,2 +1,2 @@\n a\n-b\n+c\n",
+        )
+        self.assertEqual(
+            diff_content("a.bin", b"\xff", b"\xfe", "v1", "v2"),
+            "Binary files v1/a.bin and v2/a.bin differ\n",
+        )
+
+    def test_diff(self):
+        large = {f"data/{i}.bin": bytes([i]) * 200_000 for i in range(10)}
+        files = {**large, "README.md": b"line1\nline2\n", "old.txt": b"old"}
+        self.state.add_publication("pub", files=files)
+        files = {**large, "README.md": b"line1\nline two\n", "new.txt": b"new"}
+        files["data/0.bin"] = b"\x00" * 300_000
+        self.state.add_publication("pub", "v2", files=files)
+
+        self.state.sent = 0
+        result = self.runner.invoke(
+            cli.cli, ["diff", "pub", "v1", "v2", "--max-size", "1000"]
+        )
+        self.assertEqual(result.exit_code, 0)
+        # neither zipfile nor the large member are downloaded
+        self.assertLess(self.state.sent, 32 * 1024)
+        lines = result.output.splitlines()
+        self.assertEqual(lines[0], "M README.md (12 B -> 15 B)")
+        self.assertEqual(lines[1].split(" (")[0], "M data/0.bin")
+        self.assertEqual(lines[2:4], ["A new.txt", "D old.txt"])
+        self.assertIn("-line2\n+line two\n", result.output)
+        self.assertIn("data/0.bin is larger than --max-size", result.output)
+
+        result = self.runner.invoke(cli.cli, ["diff", "pub", "v1", "v2", "--stat"])
+        self.assertEqual(len(result.output.splitlines()), 4)
+        result = self.runner.invoke(cli.cli, ["diff", "pub", "v2", "v2"])
+        self.assertEqual(result.output, "No changes between v2 and v2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
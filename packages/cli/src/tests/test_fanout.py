@@ -0,0 +1,101 @@
+import json
+import click
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils import fanout
+from utils.client import IamusError, get_auth_file, get_base_url
+
+
+class FanOutTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cli_path = Path(self.tmp.name)
+        (self.cli_path / "config").mkdir()
+        with open(self.cli_path / "config/config.json", "w") as f:
+            json.dump(
+                {
+                    "baseUrl": "http://main/",
+                    "profiles": {
+                        "mirror": {"baseUrl": "http://mirror/"},
+                        "backup": {"baseUrl": "http://backup/"},
+                    },
+                },
+                f,
+            )
+
+    def test_profiles(self):
+        self.assertEqual(get_base_url(self.cli_path), "http://main/")
+        self.assertEqual(get_base_url(self.cli_path, "mirror"), "http://mirror/")
+        self.assertNotEqual(
+            get_auth_file(self.cli_path), get_auth_file(self.cli_path, "mirror")
+        )
+        with self.assertRaises(KeyError):
+            get_base_url(self.cli_path, "unknown")
+
+    def test_targets(self):
+        self.assertEqual(
+            fanout.get_targets(self.cli_path, "all"), ["default", "mirror", "backup"]
+        )
+        self.assertEqual(
+            fanout.get_targets(self.cli_path, "mirror, default"), ["mirror", "default"]
+        )
+        with self.assertRaises(click.BadParameter):
+            fanout.get_targets(self.cli_path, "mirror,unknown")
+
+    @mock.patch.object(fanout, "IamusClient")
+    def test_upload_to_server(self, client_class):
+        client = client_class.from_config.return_value
+        client.resolve.return_value = {"id": "abc"}
+        client.url.return_value = "http://mirror/publication/abc"
+
+        success, message = fanout.upload_to_server(
+            self.cli_path, "mirror", "pub", "pub.zip"
+        )
+        self.assertTrue(success)
+        self.assertIn("http://mirror/publication/abc", message)
+        client_class.from_config.assert_called_once_with(self.cli_path, "mirror")
+        # every server streams the zipfile from disk instead of a copy in memory
+        self.assertEqual(client.upload.call_args.args[:2], ("abc", "pub.zip"))
+        self.assertEqual(len(client.upload.call_args.args), 4)
+
+        client.upload.side_effect = IamusError(
+            "Bad request", {"file": {"code": 100, "message": "Not a draft"}}
+        )
+        success, message = fanout.upload_to_server(
+            self.cli_path, "mirror", "pub", "pub.zip"
+        )
+        self.assertFalse(success)
+        self.assertIn("Not a draft", message)
+
+    @mock.patch.object(fanout, "IamusClient")
+    def test_upload_to_server_errors(self, client_class):
+        client = client_class.from_config.return_value
+        client.authenticate.side_effect = FileNotFoundError
+        self.assertEqual(
+            fanout.upload_to_server(self.cli_path, "mirror", "pub", "pub.zip"),
+            (False, "Please login first"),
+        )
+
+        client.authenticate.side_effect = None
+        client.resolve.return_value = {}
+        success, message = fanout.upload_to_server(
+            self.cli_path, "mirror", "pub", "pub.zip"
+        )
+        self.assertFalse(success)
+        self.assertIn("Missing key: 'id'", message)
+
+        client_class.from_config.side_effect = KeyError("profiles.mirror")
+        success, message = fanout.upload_to_server(
+            self.cli_path, "mirror", "pub", "pub.zip"
+        )
+        self.assertEqual(
+            message, "Config file is not valid. Missing key: 'profiles.mirror'"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
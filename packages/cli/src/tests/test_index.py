@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.client import IamusClient
+from utils.index import PublicationIndex
+
+
+def publication(pub_id, name, revision, current=True, updated_at=1):
+    return {
+        "id": pub_id,
+        "name": name,
+        "revision": revision,
+        "title": name.title(),
+        "draft": False,
+        "current": current,
+        "createdAt": updated_at,
+        "updatedAt": updated_at,
+    }
+
+
+class PublicationIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index = PublicationIndex(Path(self.tmp.name) / "index.db", max_age=60)
+        self.addCleanup(self.index.close)
+
+        self.client = mock.Mock(spec=IamusClient)
+        self.client.username = "user"
+        self.client.list_publications.return_value = [
+            publication("a2", "alpha", "v2"),
+            publication("b1", "beta", "v1"),
+        ]
+        self.client.list_revisions.return_value = [
+            publication("a2", "alpha", "v2"),
+            publication("a1", "alpha", "v1", current=False),
+        ]
+
+    def test_resolve_from_fresh_index(self):
+        self.assertEqual(self.index.resolve(self.client, "alpha")["id"], "a2")
+        self.assertEqual(self.index.resolve(self.client, "beta")["id"], "b1")
+        self.assertIsNone(self.index.resolve(self.client, "gamma"))
+        self.client.list_publications.assert_called_once()
+
+    def test_resolve_revision(self):
+        self.assertEqual(self.index.resolve(self.client, "alpha", "v1")["id"], "a1")
+        self.assertEqual(self.index.resolve(self.client, "alpha", "v1")["id"], "a1")
+        self.client.list_revisions.assert_called_once()
+
+    def test_sync_is_incremental(self):
+        self.assertEqual(self.index.sync(self.client), 2)
+        self.assertEqual(self.index.sync(self.client), 0)
+
+        self.client.list_publications.return_value = [
+            publication("a3", "alpha", "v3", updated_at=2),
+        ]
+        self.assertEqual(self.index.sync(self.client), 3)
+        self.assertEqual([pub["id"] for pub in self.index.publications("user")], ["a3"])
+        self.assertFalse(self.index.lookup("user", "alpha", "v2")["current"])
+
+    def test_invalidate(self):
+        self.index.sync(self.client)
+        self.index.sync_revisions(self.client, "alpha")
+        self.index.invalidate("user", "alpha")
+
+        self.assertFalse(self.index.is_fresh("user"))
+        self.assertFalse(self.index.is_fresh("user", "alpha"))
+        # the rows are kept for offline listings
+        self.assertEqual(len(self.index.revisions("user", "alpha")), 2)
+
+        self.index.resolve(self.client, "alpha")
+        self.assertEqual(self.client.list_publications.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.client import IamusClient, IamusError
+from tests.stand_in import StandInServer
+from utils.notifications import (
+    fetch_new,
+    follow_notifications,
+    load_cursor,
+    save_cursor,
+)
+
+
+class NotificationsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.state = self.server.state
+        self.client = IamusClient(self.server.base_url)
+        self.client.login("user", "password")
+
+    def add(self, count: int) -> list[str]:
+        return [self.state.add_notification()["id"] for _ in range(count)]
+
+    def fetch(self, cursor: dict, take: int = 5) -> tuple:
+        new, cursor = fetch_new(self.client, cursor, take)
+        return [notification["id"] for notification in new], cursor
+
+    def test_fetch_new(self):
+        first = self.add(12)
+        self.state.add_notification(tagging="other")
+        new, cursor = self.fetch(None)
+        self.assertEqual(new, first)
+        self.assertEqual(cursor, {"id": first[-1]})
+
+        # an idle poll returns an empty page
+        self.state.sent = 0
+        self.assertEqual(self.fetch(cursor), ([], cursor))
+        self.assertLess(self.state.sent, 128)
+
+        second = self.add(3)
+        new, cursor = self.fetch(cursor)
+        self.assertEqual(new, second)
+        self.assertEqual(cursor, {"id": second[-1]})
+
+    def test_viewed(self):
+        ids = self.add(4)
+        _, cursor = self.fetch(None)
+        # viewing notifications before the cursor does not move it
+        self.state.view_notification(ids[0])
+        new_ids = self.add(2)
+        new, cursor = self.fetch(cursor)
+        self.assertEqual(new, new_ids)
+
+        # nor does viewing the notification of the cursor
+        self.state.view_notification(new_ids[-1])
+        self.assertEqual(self.fetch(cursor)[0], [])
+        newest = self.add(1)
+        self.assertEqual(self.fetch(cursor)[0], newest)
+
+    def test_same_time(self):
+        ids = self.add(3)
+        for notification in self.state.notifications:
+            notification["createdAt"] = self.state.notifications[0]["createdAt"]
+        _, cursor = self.fetch({"id": ids[0]})
+        self.assertEqual(cursor, {"id": ids[-1]})
+
+        self.state.view_notification(ids[-1])
+        newest = self.add(1)
+        self.state.notifications[-1]["createdAt"] = self.state.notifications[0][
+            "createdAt"
+        ]
+        self.assertEqual(self.fetch(cursor)[0], newest)
+
+    def test_follow(self):
+        ids = self.add(2)
+        intervals = []
+
+        def sleep(interval):
+            intervals.append(interval)
+            if len(intervals) == 4:
+                ids.extend(self.add(1))
+
+        batches = follow_notifications(
+            self.client, None, min_interval=1, max_interval=5, sleep=sleep
+        )
+        new, _ = next(batches)
+        self.assertEqual([notification["id"] for notification in new], ids)
+        new, cursor = next(batches)
+        self.assertEqual([notification["id"] for notification in new], ids[2:])
+        # the interval grows while idle and is reset by new notifications
+        self.assertEqual(intervals, [1, 2, 4, 5])
+        self.assertEqual(cursor["id"], ids[-1])
+
+    def test_follow_errors(self):
+        ids = self.add(1)
+        failures = [IamusError("Unavailable", status_code=503)]
+        list_notifications = self.client.list_notifications
+
+        def fail_then_list(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return list_notifications(*args, **kwargs)
+
+        intervals = []
+        with mock.patch.object(self.client, "list_notifications", fail_then_list):
+            batches = follow_notifications(
+                self.client, None, min_interval=1, sleep=intervals.append
+            )
+            new, _ = next(batches)
+            # the failed poll counts as idle
+            self.assertEqual([notification["id"] for notification in new], ids)
+            self.assertEqual(intervals, [2])
+
+            failures.append(IamusError("Bad request", status_code=400))
+            with self.assertRaises(IamusError):
+                next(batches)
+
+    def test_cursor_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cursor_file = Path(tmp) / "notifications.json"
+            self.assertIsNone(load_cursor(cursor_file))
+            cursor = {"id": "a"}
+            save_cursor(cursor_file, cursor)
+            self.assertEqual(load_cursor(cursor_file), cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import json
+import time
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.profiling import ImportTimer, Profiler, profiling_requested
+
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name)
+
+    def test_profiling_requested(self):
+        self.assertTrue(profiling_requested(["cli.py", "--profile", "p.json"], {}))
+        self.assertTrue(profiling_requested(["cli.py", "--profile=p.json"], {}))
+        self.assertTrue(profiling_requested(["cli.py"], {"IAMUS_PROFILE": "p.json"}))
+        self.assertFalse(profiling_requested(["cli.py", "show"], {}))
+
+    def test_import_timer(self):
+        (self.path / "slow_parent.py").write_text(
+            "import time\nimport slow_child\ntime.sleep(0.02)\n"
+        )
+        (self.path / "slow_child.py").write_text("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, str(self.path))
+        self.addCleanup(sys.path.remove, str(self.path))
+        self.addCleanup(sys.modules.pop, "slow_parent", None)
+        self.addCleanup(sys.modules.pop, "slow_child", None)
+
+        timer = ImportTimer().start()
+        try:
+            import slow_parent  # noqa: F401
+        finally:
+            timer.stop()
+        self.assertNotIn(timer, sys.meta_path)
+
+        parent, child = timer.imports["slow_parent"], timer.imports["slow_child"]
+        self.assertGreaterEqual(child["self"], 0.05)
+        self.assertGreaterEqual(parent["cumulative"], 0.07)
+        self.assertLess(parent["self"], 0.05)
+        self.assertEqual(timer.report()[0]["module"], "slow_child")
+
+    def test_write(self):
+        def busy_worker():
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                sum(i * i for i in range(1000))
+
+        profiler = Profiler(interval=0.001)
+        profiler.start()
+        # the work of thread pools is profiled as well as the main thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(busy_worker).result()
+        profiler.write(str(self.path / "profile.json"), ["cli.py", "show"])
+
+        with open(self.path / "profile.json") as f:
+            report = json.load(f)
+        self.assertEqual(report["argv"], ["cli.py", "show"])
+        self.assertGreater(report["peakMemory"], 0)
+        [worker] = [
+            function
+            for function in report["functions"]
+            if function["function"].endswith("(busy_worker)")
+        ]
+        self.assertGreater(worker["samples"], 10)
+        self.assertGreater(worker["cumulative"], 100)
+
+        stats = pstats.Stats(str(self.path / "profile.json.prof"))
+        [function] = [key for key in stats.stats if key[2] == "busy_worker"]
+        callers = stats.stats[function][4]
+        self.assertEqual([caller[2] for caller in callers], ["run"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.client import IamusClient
+from tests.stand_in import StandInServer
+from utils.search import SearchCache, search_pages
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(latency=0.05)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        for i in range(25):
+            self.server.state.add_publication(f"graph-{i}")
+        self.server.state.add_publication("other")
+        self.client = IamusClient(self.server.base_url)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = SearchCache(Path(self.tmp.name) / "search.db")
+        self.addCleanup(self.cache.close)
+
+    def search(self, query: str, **kwargs) -> list[str]:
+        return [
+            result["name"]
+            for results, _ in search_pages(self.client, "publication", query, **kwargs)
+            for result in results
+        ]
+
+    def test_pages(self):
+        names = self.search("graph", take=10)
+        self.assertEqual(names, [f"graph-{i}" for i in reversed(range(25))])
+        self.assertEqual(len(self.search("graph", take=10, limit=12)), 12)
+        self.assertEqual(self.search("missing"), [])
+
+    def test_prefetch(self):
+        started = time.monotonic()
+        for _ in search_pages(self.client, "publication", "graph", take=5):
+            # the next page is fetched while the current one is used
+            time.sleep(0.05)
+        self.assertLess(time.monotonic() - started, 0.45)
+
+    def test_cache(self):
+        self.search("graph", take=10, cache=self.cache)
+        started = time.monotonic()
+        names = self.search(" Graph ", take=10, cache=self.cache)
+        self.assertLess(time.monotonic() - started, 0.05)
+        self.assertEqual(len(names), 25)
+
+        self.cache.ttl = 0
+        self.assertIsNone(self.cache.get("publication", "graph", 0, 10))
+
+    def test_users(self):
+        results, total = self.client.search("user", "use")
+        self.assertEqual((results, total), ([{"username": "user"}], 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import time
+import unittest
+
+from utils.client import IamusClient
+from tests.stand_in import StandInServer
+from utils.details import fetch_details
+
+
+class ShowDetailsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(latency=0.05)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.client = IamusClient(self.server.base_url)
+        self.client.login("user", "password")
+
+    def test_details(self):
+        state = self.server.state
+        state.add_publication("first", "v1")
+        first = state.add_publication("first", "v2", files={"a": b"a", "b/c": b"c"})
+        state.add_review(first["id"], status="completed")
+        state.add_review(first["id"])
+        second = state.add_publication("second")
+
+        details = dict(
+            (pub["name"], pub_details)
+            for pub, pub_details in fetch_details(self.client, [first, second], 4)
+        )
+        self.assertEqual(
+            details["first"],
+            {"revisions": "2", "sources": "2 entries", "reviews": "2 (1 completed)"},
+        )
+        self.assertEqual(
+            details["second"],
+            {"revisions": "1", "sources": "none", "reviews": "0 (0 completed)"},
+        )
+
+    def test_concurrent_in_order(self):
+        publications = [self.server.state.add_publication(f"pub{i}") for i in range(20)]
+        started = time.monotonic()
+        names = [pub["name"] for pub, _ in fetch_details(self.client, publications, 16)]
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(names, [pub["name"] for pub in publications])
+        # 60 requests of 50ms each, sent 16 at a time
+        self.assertLess(elapsed, 60 * 0.05 / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+import click
+import tempfile
+import unittest
+from email.parser import BytesParser
+
+from utils.callback import rate_validator
+from utils.transfer import MultipartFile, ProgressReporter, TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_limits_rate(self):
+        bucket = TokenBucket(100_000)
+        start = time.monotonic()
+        for _ in range(10):
+            bucket.consume(5_000)
+        # 50000 bytes minus the initial burst at 100000 bytes per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+
+class RateValidatorTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(rate_validator("512"), 512)
+        self.assertEqual(rate_validator("512K"), 512 * 1024)
+        self.assertEqual(rate_validator("2MB/s"), 2 * 1024**2)
+        self.assertIsNone(rate_validator(None))
+
+    def test_malformed(self):
+        with self.assertRaises(click.BadParameter):
+            rate_validator("fast")
+        for value in ("0", "0.5", "inf", "-inf", "nan", "infK"):
+            with self.assertRaises(click.BadParameter):
+                rate_validator(value)
+
+
+class MultipartFileTest(unittest.TestCase):
+    def test_body(self):
+        content = bytes(range(256)) * 100
+        with tempfile.NamedTemporaryFile(suffix=".zip") as f:
+            f.write(content)
+            f.flush()
+            progress = ProgressReporter(quiet=True, interval=3600)
+            with MultipartFile(
+                "file", f.name, "application/zip", progress=progress
+            ) as body:
+                chunks = iter(lambda: body.read(1000), b"")
+                data = b"".join(chunks)
+
+        self.assertEqual(len(data), len(body))
+        self.assertEqual(progress.sent, progress.total)
+        message = BytesParser().parsebytes(
+            f"Content-Type: {body.content_type}\r\n\r\n".encode() + data
+        )
+        part = message.get_payload()[0]
+        self.assertEqual(part.get_param("name", header="content-disposition"), "file")
+        self.assertEqual(part.get_payload(decode=True), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import cli
+from click.testing import CliRunner
+from tests.stand_in import StandInServer
+from utils.client import IamusError
+from utils.tree import ListingCache, TreeBrowser
+
+ARCHIVE = {
+    "": [("directory", "src"), ("directory", "docs"), ("file", "README.md")],
+    "src": [("directory", "lib"), ("file", "main.py")],
+    "src/lib": [("file", "util.py")],
+    "docs": [("file", "index.md")],
+}
+
+
+def fake_tree(pub_id, path=""):
+    if path not in ARCHIVE:
+        raise IamusError("Resource not found", status_code=404)
+    entries = [
+        {"type": kind, "filename": filename, "updatedAt": 0}
+        for kind, filename in ARCHIVE[path]
+    ]
+    return {"type": "directory", "entries": entries}
+
+
+class ListingCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_file = Path(__file__).parent / "config/tree_cache.json"
+
+    def tearDown(self):
+        if self.cache_file.exists():
+            os.remove(self.cache_file)
+
+    def test_evicts_least_recently_used(self):
+        cache = ListingCache(max_entries=2)
+        cache.put("a", {"type": "directory", "entries": []})
+        cache.put("b", {"type": "directory", "entries": []})
+        cache.get("a")
+        cache.put("c", {"type": "directory", "entries": []})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_persists_entries(self):
+        cache = ListingCache(self.cache_file)
+        cache.put("a", {"type": "directory", "entries": []})
+        cache.save()
+        self.assertEqual(
+            ListingCache(self.cache_file).get("a"), {"type": "directory", "entries": []}
+        )
+        self.assertFalse(
+            [
+                name
+                for name in os.listdir(self.cache_file.parent)
+                if name.endswith(".tmp")
+            ]
+        )
+
+    def test_trims_loaded_entries(self):
+        cache = ListingCache(self.cache_file)
+        for key in "abc":
+            cache.put(key, {"type": "directory", "entries": []})
+        cache.save()
+
+        cache = ListingCache(self.cache_file, max_entries=2)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+class TreeBrowserTest(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.tree.side_effect = fake_tree
+        self.cache = ListingCache()
+        self.publication = {"id": "1", "revision": "v1"}
+
+    def test_walk_in_depth_first_order(self):
+        with TreeBrowser(self.client, self.publication, self.cache) as browser:
+            paths = [path for path, _ in browser.walk()]
+        self.assertEqual(paths, ["", "src", "src/lib", "docs"])
+
+    def test_listing_is_cached(self):
+        with TreeBrowser(self.client, self.publication, self.cache) as browser:
+            browser.listing("docs")
+        calls = self.client.tree.call_count
+        with TreeBrowser(self.client, self.publication, self.cache) as browser:
+            entry = browser.listing("docs")
+        self.assertEqual(entry["entries"][0]["filename"], "index.md")
+        self.assertEqual(self.client.tree.call_count, calls)
+
+    def test_listing_prefetches_children(self):
+        with TreeBrowser(self.client, self.publication, self.cache) as browser:
+            browser.listing()
+        self.assertIsNotNone(self.cache.get(ListingCache.key("1", "v1", "src")))
+        self.assertIsNotNone(self.cache.get(ListingCache.key("1", "v1", "docs")))
+
+    def test_listing_missing_path(self):
+        with TreeBrowser(self.client, self.publication, self.cache) as browser:
+            with self.assertRaises(IamusError):
+                browser.listing("missing")
+
+
+class CatTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cli_path = Path(tmp.name)
+        (self.cli_path / "config").mkdir()
+        with open(self.cli_path / "config/config.json", "w") as f:
+            json.dump({"baseUrl": self.server.base_url}, f)
+        patcher = mock.patch.object(cli, "cli_path", self.cli_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.runner = CliRunner()
+        self.runner.invoke(
+            cli.cli, ["login", "--username", "user", "--password", "password"]
+        )
+
+    def test_cat_does_not_write_cache(self):
+        self.server.state.add_publication("pub", files={"README.md": b"# Pub"})
+        result = self.runner.invoke(cli.cli, ["cat", "README.md", "--name", "pub"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output, "# Pub")
+        self.assertFalse((self.cli_path / "config/tree_cache.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
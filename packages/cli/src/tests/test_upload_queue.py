@@ -0,0 +1,124 @@
+import os
+import zipfile
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+from unittest import mock
+
+from click.testing import CliRunner
+
+from utils import upload_queue
+from commands.upload import upload
+from utils.upload_queue import UploadQueue
+
+
+class UploadQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cli_path = Path(self.tmp.name)
+        self.archive = self.cli_path / "publication.zip"
+        with zipfile.ZipFile(self.archive, "w") as z:
+            z.writestr("README.md", "# Publication")
+        self.queue = UploadQueue(self.cli_path)
+
+    def test_enqueue_copies_archive(self):
+        job_id = self.queue.enqueue(str(self.archive), name="publication")
+        os.remove(self.archive)
+
+        [job] = self.queue.pending()
+        self.assertEqual(job["id"], job_id)
+        self.assertEqual(job["name"], "publication")
+        self.assertTrue(zipfile.is_zipfile(job["archive"]))
+
+    def test_record_results(self):
+        done = self.queue.enqueue(str(self.archive), name="done")
+        retried = self.queue.enqueue(str(self.archive), name="retried")
+        self.queue.record(done, "done", 1, "uploaded")
+        self.queue.record(retried, "pending", 5, "unreachable")
+
+        jobs = self.queue.jobs()
+        self.assertEqual(jobs[done]["status"], "done")
+        self.assertFalse(Path(jobs[done]["archive"]).exists())
+        self.assertEqual([job["id"] for job in self.queue.pending()], [retried])
+        self.assertEqual(jobs[retried]["attempts"], 5)
+
+    def test_ignores_truncated_record(self):
+        job_id = self.queue.enqueue(str(self.archive), name="publication")
+        with open(self.queue.journal, "a") as f:
+            f.write('{"op": "result", "id": "')
+
+        self.assertEqual([job["id"] for job in self.queue.pending()], [job_id])
+
+    def test_compact_keeps_pending_and_latest_results(self):
+        old_results = upload_queue.KEPT_RESULTS
+        upload_queue.KEPT_RESULTS = 1
+        self.addCleanup(setattr, upload_queue, "KEPT_RESULTS", old_results)
+
+        first = self.queue.enqueue(str(self.archive), name="first")
+        second = self.queue.enqueue(str(self.archive), name="second")
+        pending = self.queue.enqueue(str(self.archive), name="pending")
+        self.queue.record(first, "done", 1)
+        self.queue.record(second, "failed", 1, "archive exists")
+        jobs = self.queue.jobs()
+
+        self.queue.compact()
+        compacted = self.queue.jobs()
+        self.assertEqual(list(compacted), [second, pending])
+        self.assertEqual(compacted[second], jobs[second])
+        self.assertEqual(compacted[pending], jobs[pending])
+
+    def test_compact_keeps_jobs_queued_meanwhile(self):
+        queued = []
+        jobs = self.queue.jobs
+
+        def read_then_enqueue():
+            # another process queues a job after the journal was read for compacting
+            read = jobs()
+            other.start()
+            other.join(0.2)
+            return read
+
+        other = threading.Thread(
+            target=lambda: queued.append(
+                UploadQueue(self.cli_path).enqueue(str(self.archive), name="late")
+            )
+        )
+        with mock.patch.object(self.queue, "jobs", read_then_enqueue):
+            self.queue.compact()
+        other.join()
+
+        self.assertEqual([job["id"] for job in self.queue.pending()], queued)
+
+    def test_lock(self):
+        lock = self.queue.lock()
+        self.assertTrue(lock.acquire())
+        self.assertFalse(self.queue.lock().acquire())
+        lock.release()
+
+        # the lock file left behind by a worker which was killed is taken over
+        with open(lock.lock_file, "w") as f:
+            f.write("1")
+        lock = self.queue.lock()
+        self.assertTrue(lock.acquire())
+        self.assertFalse(self.queue.lock().acquire())
+        lock.release()
+
+    def test_queue_to_servers(self):
+        runner = CliRunner()
+        obj = {"CLI_PATH": self.cli_path}
+        args = ["--file", str(self.archive), "--queue", "--to", "all"]
+
+        result = runner.invoke(upload, args + ["--id", "abc"], obj=obj)
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("Publication ids differ between servers", result.output)
+
+        result = runner.invoke(upload, args + ["--name", "pub"], obj=obj)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("No config.json found", result.output)
+        self.assertEqual(self.queue.jobs(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,10 @@
 import sys
-import json
 import click
 import pathlib
 from functools import wraps
-from posixpath import join as urljoin
 from typing import Tuple, Callable
 
-from utils.call_api import call_api
+from utils.client import IamusClient, IamusError
 
 
 def get_auth(auth_file: pathlib.PosixPath, base_url: str) -> Tuple[str, dict[str, str]]:
@@ -19,68 +17,50 @@ def get_auth(auth_file: pathlib.PosixPath, base_url: str) -> Tuple[str, dict[str
     Returns:
         Tuple[str, dict[str, str]]: Returns username and headers.
     """
-    username, headers = None, None
+    client = IamusClient(base_url, auth_file)
+    authenticate(client)
+    return client.username, client.headers or None
+
+
+def authenticate(client: IamusClient) -> None:
+    """Authenticate the client, reporting why it failed if it did.
+
+    Args:
+        client (IamusClient): The client to be authenticated.
+    """
     try:
-        with open(auth_file, "r") as f:
-            data = json.load(f)
-            username = data.pop("username")
-
-        # refresh the token
-        refresh_api = urljoin(base_url, "auth/session")
-        refresh_res = call_api("POST", refresh_api, data=data)
-
-        new_token, new_refresh_token = (
-            refresh_res["token"],
-            refresh_res["refreshToken"],
-        )
-        headers = {"Authorization": f"Bearer {new_token}"}
-
-        # update the auth file
-        with open(auth_file, "w") as f:
-            json.dump(
-                {
-                    "username": username,
-                    "token": new_token,
-                    "refreshToken": new_refresh_token,
-                },
-                f,
-            )
+        client.authenticate()
     except FileNotFoundError:
         click.echo("Auth file not found")
-    except KeyError:
+    except (KeyError, IamusError):
         click.echo("Refresh token expired")
     except Exception as e:
         click.echo(f"Unexpected error occurs: {e}")
         sys.exit(1)
 
-    return username, headers
-
 
 def authenticated(func: Callable) -> Callable:
     """Decorator for commands that require authentication.
 
-    It calls `get_auth` to get username and headers from auth file and pass them
-    to decorated functions.
+    It authenticates the client created by `pass_base_url` using the tokens of
+    the auth file and passes it to decorated functions.
 
     Args:
         func (Callable): Function to be decorated.
 
     Returns:
-        Callable: Decorated function with additional arguments `username` and
-            `headers`.
+        Callable: Decorated function with additional argument `client`.
     """
 
     @wraps(func)
     def wrapper(ctx: click.core.Context, *args, **kwargs):
-        base_url = ctx.obj["BASE_URL"]
-        auth_file = ctx.obj["CLI_PATH"] / "config/auth.json"
-        username, headers = get_auth(auth_file, base_url)
-        if username is None or headers is None:
+        client = ctx.obj["CLIENT"]
+        authenticate(client)
+        if client.username is None:
             click.echo("Please login first")
             return
 
-        kwargs["username"] = username
-        kwargs["headers"] = headers
+        kwargs["client"] = client
         return func(ctx, *args, **kwargs)
 
     return wrapper
@@ -1,16 +1,18 @@
 import sys
-import json
 import click
 import requests
 from typing import Callable
 from functools import wraps
-from posixpath import join as urljoin
+
+from utils.client import IamusClient, IamusError
 
 
 def pass_base_url(func: Callable) -> Callable:
     """Decorator for commands that send a request to the server.
 
-    Checks if the base url of the server is reachable.
+    Checks if the base url of the server is reachable and creates the client
+    which the command sends its requests with. The client is shared by the
+    commands invoked from the decorated one.
 
     Args:
         func (Callable): Function to be decorated.
@@ -21,14 +23,13 @@ def pass_base_url(func: Callable) -> Callable:
 
     @wraps(func)
     def wrapper(ctx: click.core.Context, *args, **kwargs):
-        config_file = ctx.obj["CLI_PATH"] / "config/config.json"
         try:
-            with open(config_file, "r") as f:
-                config = json.load(f)
-                ctx.obj["BASE_URL"] = config["baseUrl"]
-
-            version_api = urljoin(ctx.obj["BASE_URL"], "version")
-            requests.get(version_api)
+            if "CLIENT" not in ctx.obj:
+                client = IamusClient.from_config(
+                    ctx.obj["CLI_PATH"], ctx.obj.get("SERVER")
+                )
+                client.check_health()
+                ctx.obj["BASE_URL"], ctx.obj["CLIENT"] = client.base_url, client
         except FileNotFoundError:
             click.echo(
                 "No config.json found. Please create one using `config` command."
@@ -42,7 +43,13 @@ def pass_base_url(func: Callable) -> Callable:
         except Exception as e:
             click.echo(f"Unexpected error occurs: {e}")
         else:
-            return func(ctx, *args, **kwargs)  # return if no error occurs
+            try:
+                return func(ctx, *args, **kwargs)  # return if no error occurs
+            except requests.exceptions.RequestException as e:
+                click.echo(f"Error occurs when sending request: {e}")
+            except IamusError as e:
+                click.echo(f"Response Error: {e}")
+                return
 
         sys.exit(1)
 
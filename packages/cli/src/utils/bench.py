@@ -0,0 +1,387 @@
+import time
+import uuid
+import math
+import random
+import requests
+import threading
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.client import IamusClient, IamusError, create_session
+
+# Operations a virtual user can run, in the order they are reported
+OPERATIONS = ["login", "show", "lookup", "revise", "upload"]
+
+# Mix of operations which is run if none is specified, it only reads
+DEFAULT_MIX = {"show": 1}
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse a mix of operations such as `show=6,lookup=3,upload=1`.
+
+    Args:
+        value (str): Comma separated operations and their weights, the weight
+            of an operation defaults to 1 if it is omitted.
+
+    Raises:
+        ValueError: Error raised if an operation is unknown or a weight is not
+            a positive integer.
+
+    Returns:
+        dict[str, int]: The weights by operation.
+    """
+    mix = {}
+    for item in value.split(","):
+        operation, _, weight = item.strip().partition("=")
+        if operation not in OPERATIONS:
+            raise ValueError(
+                f"Unknown operation {operation}, use one of {', '.join(OPERATIONS)}"
+            )
+        mix[operation] = int(weight or 1)
+        if mix[operation] < 1:
+            raise ValueError(f"The weight of {operation} must be positive")
+    return mix
+
+
+def percentile(latencies: list[float], percent: float) -> float:
+    """Get a percentile of sorted latencies using the nearest-rank method."""
+    if not latencies:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(latencies)), 1)
+    return latencies[rank - 1]
+
+
+class Pacer:
+    """Pace the operations of all virtual users to a target rate.
+
+    Every operation is given the next slot of a fixed schedule which starts
+    with the first operation, so the rate does not drift when operations are
+    slow. The slots are not moved when the users fall behind, operations whose
+    slot has passed start at once, so that the latency measured from the slot
+    includes the time the operation was held back by a slow server.
+
+    Args:
+        rate (float): Number of operations per second.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self._next = None
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Wait for the next slot of the schedule.
+
+        Returns:
+            float: The time of the slot, as given by `time.monotonic`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._next is None:
+                self._next = now
+            else:
+                self._next += self.interval
+            slot = self._next
+        time.sleep(max(slot - now, 0))
+        return slot
+
+
+class BenchStats:
+    """Thread-safe record of the latencies and errors of every operation."""
+
+    def __init__(self) -> None:
+        self.latencies = {operation: [] for operation in OPERATIONS}
+        self.errors = {operation: 0 for operation in OPERATIONS}
+        self.messages = {}
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, latency: float, error: str = None) -> None:
+        with self._lock:
+            self.latencies[operation].append(latency)
+            if error is not None:
+                self.errors[operation] += 1
+                self.messages[error] = self.messages.get(error, 0) + 1
+
+    def finish(self) -> None:
+        self.finished = time.monotonic()
+
+    def summary(self) -> dict[str, object]:
+        """Summarise the latencies, throughput and error rate per operation.
+
+        Returns:
+            dict[str, object]: The duration of the run, the summary of every
+                operation which was run and of all of them together, and the
+                number of times each error occurred. Latencies are in
+                milliseconds.
+        """
+        elapsed = (self.finished or time.monotonic()) - self.started
+
+        def summarise(latencies: list[float], errors: int) -> dict[str, object]:
+            latencies = sorted(latencies)
+            count = len(latencies)
+            return {
+                "count": count,
+                "errors": errors,
+                "errorRate": errors / count if count else 0.0,
+                "throughput": count / elapsed if elapsed > 0 else 0.0,
+                "mean": sum(latencies) / count * 1000 if count else 0.0,
+                **{
+                    f"p{percent}": percentile(latencies, percent) * 1000
+                    for percent in PERCENTILES
+                },
+                "max": latencies[-1] * 1000 if count else 0.0,
+            }
+
+        with self._lock:
+            operations = {
+                operation: summarise(latencies, self.errors[operation])
+                for operation, latencies in self.latencies.items()
+                if latencies
+            }
+            total = summarise(
+                [latency for values in self.latencies.values() for latency in values],
+                sum(self.errors.values()),
+            )
+            messages = dict(self.messages)
+        return {
+            "duration": elapsed,
+            "operations": operations,
+            "total": total,
+            "errors": messages,
+        }
+
+
+class VirtualUser:
+    """A simulated user running a random mix of operations against a server.
+
+    Every virtual user has its own session, like a real user running the CLI
+    has its own connections, and starts with the tokens of the benchmark's
+    client so that it does not have to log in first.
+
+    The server only accepts the sources of a draft revision and cannot revise
+    a publication whose current revision is a draft, so `revise` and `upload`
+    hold a lock shared by the users from when they are prepared until they are
+    finished. An upload is made to a new revision which is created when the
+    operation is prepared, and a new revision is given the zipfile when the
+    operation is finished, neither of which is part of the latency.
+
+    Args:
+        client (IamusClient): The authenticated client of the benchmark.
+        name (str, optional): The publication which is looked up, revised and
+            uploaded to.
+        archive (bytes, optional): The zipfile uploaded to new revisions, it is
+            required by the revise and upload operations.
+        password (str, optional): The password used by the login operation.
+        lock (threading.Lock, optional): The lock of the publication, shared by
+            every virtual user.
+    """
+
+    def __init__(
+        self,
+        client: IamusClient,
+        name: str = None,
+        archive: bytes = None,
+        password: str = None,
+        lock: threading.Lock = None,
+    ) -> None:
+        self.client = IamusClient(client.base_url, session=create_session(pool_size=1))
+        self.client.username = client.username
+        self.client.token, self.client.refresh_token = (
+            client.token,
+            client.refresh_token,
+        )
+        self.name = name
+        self.archive = archive
+        self.password = password
+        self.lock = lock or threading.Lock()
+        self.draft_id = None
+
+    def login(self) -> None:
+        self.client.login(self.client.username, self.password)
+
+    def show(self) -> None:
+        self.client.list_publications()
+
+    def lookup(self) -> None:
+        self.client.resolve(name=self.name)
+
+    def revise(self) -> None:
+        self.draft_id = self.client.revise(
+            self.name, f"bench-{uuid.uuid4().hex[:8]}", "Revision created by bench"
+        )["id"]
+
+    def upload(self) -> None:
+        self.client.upload(self.draft_id, "bench.zip", data=self.archive)
+
+    @staticmethod
+    def _attempt(operation: str, func: Callable[[], None]) -> Optional[str]:
+        try:
+            func()
+        except IamusError as e:
+            return f"{operation}: {e}"
+        except requests.exceptions.RequestException as e:
+            return f"{operation}: {type(e).__name__}"
+
+    def prepare(self, operation: str) -> Optional[str]:
+        """Prepare an operation before it is run and measured.
+
+        Args:
+            operation (str): The name of the operation.
+
+        Returns:
+            Optional[str]: The error of the preparation, or None if it
+                succeeded. The operation is not run if it failed.
+        """
+        if operation not in ("revise", "upload"):
+            return None
+        self.lock.acquire()
+        if operation == "upload":
+            error = self._attempt(operation, self.revise)
+            if error is not None:
+                self.lock.release()
+            return error
+        return None
+
+    def run(self, operation: str) -> Optional[str]:
+        """Run an operation.
+
+        Args:
+            operation (str): The name of the operation.
+
+        Returns:
+            Optional[str]: The error of the operation, or None if it succeeded.
+        """
+        return self._attempt(operation, getattr(self, operation))
+
+    def finish(self, operation: str) -> Optional[str]:
+        """Finish an operation after it was run, whether or not it succeeded.
+
+        Args:
+            operation (str): The name of the operation.
+
+        Returns:
+            Optional[str]: The error of the finishing, or None if it succeeded.
+        """
+        if operation not in ("revise", "upload"):
+            return None
+        try:
+            if operation == "revise" and self.draft_id is not None:
+                return self._attempt(operation, self.upload)
+        finally:
+            self.draft_id = None
+            self.lock.release()
+
+
+class Bench:
+    """Load generator running virtual users against a server.
+
+    Virtual users are started evenly over the ramp-up period and run
+    operations picked at random according to the mix until the duration has
+    elapsed. The number of operations in flight is bounded by `concurrency`,
+    and the operations of all users are paced to `rate` if it is specified.
+    Operations are prepared and finished by the users outside of these bounds.
+
+    Args:
+        users (int): The number of virtual users.
+        duration (float): Seconds for which the benchmark runs, including the
+            ramp-up period.
+        mix (dict[str, int]): The weights of the operations.
+        ramp_up (float, optional): Seconds over which the users are started.
+        rate (float, optional): Target number of operations per second of all
+            users together, the users run as fast as they can if it is None.
+        concurrency (int, optional): Maximum number of operations in flight,
+            defaults to the number of users.
+        seed (int, optional): Seed of the choice of operations.
+    """
+
+    def __init__(
+        self,
+        users: int,
+        duration: float,
+        mix: dict[str, int],
+        ramp_up: float = 0,
+        rate: float = None,
+        concurrency: int = None,
+        seed: int = None,
+    ) -> None:
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.operations = list(mix)
+        self.weights = [mix[operation] for operation in self.operations]
+        self.pacer = Pacer(rate) if rate else None
+        self.slots = threading.BoundedSemaphore(concurrency or users)
+        self.random = random.Random(seed)
+        self.stats = BenchStats()
+        self._stop = threading.Event()
+        self._random_lock = threading.Lock()
+
+    def _choose(self) -> str:
+        with self._random_lock:
+            return self.random.choices(self.operations, self.weights)[0]
+
+    def _run_user(self, user: VirtualUser, delay: float, deadline: float) -> None:
+        if self._stop.wait(delay):
+            return
+
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            operation = self._choose()
+            started = time.monotonic()
+            error = user.prepare(operation)
+            if error is not None:
+                self.stats.record(operation, time.monotonic() - started, error)
+                continue
+
+            # latencies are measured from when the operation was due, not from
+            # when it got a slot, so that queueing behind a slow server counts
+            if self.pacer is not None:
+                scheduled = self.pacer.wait()
+            else:
+                scheduled = time.monotonic()
+            with self.slots:
+                error = user.run(operation)
+                latency = time.monotonic() - scheduled
+            finished = user.finish(operation)
+            self.stats.record(operation, latency, error or finished)
+
+    def run(
+        self,
+        create_user: Callable[[], VirtualUser],
+        on_tick: Callable[[BenchStats], None] = None,
+        tick: float = 1.0,
+    ) -> BenchStats:
+        """Run the benchmark until the duration has elapsed.
+
+        Args:
+            create_user (Callable[[], VirtualUser]): Factory of the virtual users.
+            on_tick (Callable[[BenchStats], None], optional): Function called
+                every `tick` seconds while the benchmark runs, e.g. to report
+                its progress.
+            tick (float, optional): Seconds between calls of `on_tick`.
+
+        Returns:
+            BenchStats: The statistics of the run.
+        """
+        users = [create_user() for _ in range(self.users)]
+        self.stats = BenchStats()
+        deadline = self.stats.started + self.duration
+        with ThreadPoolExecutor(max_workers=self.users) as executor:
+            futures = [
+                executor.submit(
+                    self._run_user, user, self.ramp_up * i / self.users, deadline
+                )
+                for i, user in enumerate(users)
+            ]
+            try:
+                while not all(future.done() for future in futures):
+                    time.sleep(min(tick, max(deadline - time.monotonic(), 0.05)))
+                    if on_tick is not None:
+                        on_tick(self.stats)
+            finally:
+                self._stop.set()
+        self.stats.finish()
+        return self.stats
@@ -1,3 +1,4 @@
+import math
 import click
 from functools import wraps
 from zipfile import is_zipfile
@@ -102,3 +103,37 @@ def zipfile_validator(value: str) -> str:
     if not is_zipfile(value):
         raise click.BadParameter("File must be a zip file")
     return value
+
+
+def rate_validator(value: str) -> int:
+    """Custom validation function.
+
+    It converts a transfer rate such as 512K or 2M (bytes per second, with an
+    optional binary unit suffix) into the number of bytes per second.
+
+    Args:
+        value (str): The rate specified by the user, None if it is not limited.
+
+    Raises:
+        click.BadParameter: Error raised if the given rate is malformed.
+
+    Returns:
+        int: Return the rate in bytes per second, or None if it is not limited.
+    """
+    if value is None:
+        return None
+
+    units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    rate = value.strip().upper().removesuffix("/S").removesuffix("B")
+    unit = rate[-1:] if rate[-1:] in units else ""
+    try:
+        rate = float(rate[: len(rate) - len(unit)]) * units[unit]
+    except ValueError:
+        raise click.BadParameter("The rate should be a number, e.g. 512K or 2M")
+
+    # float() also accepts inf and nan, which are not a rate
+    if not math.isfinite(rate):
+        raise click.BadParameter("The rate should be a number, e.g. 512K or 2M")
+    if int(rate) <= 0:
+        raise click.BadParameter("The rate should be at least one byte per second")
+    return int(rate)
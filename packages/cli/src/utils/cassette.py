@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import base64
+import requests
+import threading
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Environment variables which make every session record to or replay from a
+# cassette, e.g. IAMUS_CASSETTE=cassette.jsonl IAMUS_CASSETTE_MODE=replay
+CASSETTE_ENVVAR = "IAMUS_CASSETTE"
+CASSETTE_MODE_ENVVAR = "IAMUS_CASSETTE_MODE"
+CASSETTE_LATENCY_ENVVAR = "IAMUS_CASSETTE_LATENCY"
+
+MODES = ["record", "replay"]
+
+# Value of the latency which replays every response as slowly as it was recorded
+RECORDED_LATENCY = "recorded"
+
+REDACTED = "REDACTED"
+
+# Headers and fields of JSON or form bodies which are never written to a cassette
+SECRET_HEADERS = {"authorization", "cookie", "set-cookie"}
+SECRET_FIELDS = {"password", "token", "refreshToken"}
+
+# Headers describing how the body was sent, which do not apply to the recorded body
+TRANSPORT_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_cassettes: dict[tuple[str, str], "Cassette"] = {}
+_cassettes_lock = threading.Lock()
+
+
+def redact(value: object) -> object:
+    """Replace the secret fields of a JSON value, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in SECRET_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def normalise_url(url: str) -> str:
+    """Sort the query of a url, so that it matches regardless of its order."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query, fragment=""))
+
+
+def encode_body(body: Optional[bytes], content_type: str) -> Optional[dict]:
+    if body is None:
+        return None
+    if "json" in content_type:
+        try:
+            return {"json": redact(json.loads(body))}
+        except ValueError:
+            pass
+    if "x-www-form-urlencoded" in content_type:
+        fields = parse_qsl(body.decode(), keep_blank_values=True)
+        return {
+            "form": [
+                [key, REDACTED if key in SECRET_FIELDS else item]
+                for key, item in fields
+            ]
+        }
+    try:
+        return {"text": body.decode()}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode()}
+
+
+def decode_body(body: Optional[dict]) -> bytes:
+    if body is None:
+        return b""
+    if "json" in body:
+        return json.dumps(body["json"]).encode()
+    if "form" in body:
+        return urlencode(body["form"]).encode()
+    if "text" in body:
+        return body["text"].encode()
+    return base64.b64decode(body["base64"])
+
+
+class Cassette:
+    """A file of recorded request and response exchanges.
+
+    Every exchange is appended to the file as a line of JSON as soon as it is
+    recorded, so the sessions of several clients can record to the same
+    cassette. Secret headers and fields are redacted before they are written.
+    Streamed request bodies, such as uploaded zipfiles, are not recorded.
+
+    When the cassette is replayed, requests are matched by their method and
+    url, and the responses recorded for the same request are served in the
+    order they were recorded. The last one is served again once they have all
+    been served.
+
+    Args:
+        path (str): The path of the cassette file.
+        mode (str): Either `record` or `replay`.
+        latency (str, optional): Seconds every replayed response is delayed by,
+            or `recorded` to delay it by the time it took when it was recorded.
+    """
+
+    def __init__(self, path: str, mode: str, latency: str = None) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode}, use one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency = None if latency in (None, "") else latency
+        if self.latency not in (None, RECORDED_LATENCY):
+            self.latency = float(self.latency)
+        self._lock = threading.Lock()
+        self._exchanges: dict[tuple[str, str], list[dict]] = {}
+
+        if mode == "record":
+            open(path, "w").close()
+            return
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    exchange = json.loads(line)
+                    key = (exchange["request"]["method"], exchange["request"]["url"])
+                    self._exchanges.setdefault(key, []).append(exchange)
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Get the cassette configured by the environment, if there is one.
+
+        Sessions created while the same cassette is configured share it.
+        """
+        path = os.environ.get(CASSETTE_ENVVAR)
+        if not path:
+            return None
+        mode = os.environ.get(CASSETTE_MODE_ENVVAR, "replay")
+        with _cassettes_lock:
+            if (path, mode) not in _cassettes:
+                _cassettes[(path, mode)] = cls(
+                    path, mode, os.environ.get(CASSETTE_LATENCY_ENVVAR)
+                )
+            return _cassettes[(path, mode)]
+
+    def record(
+        self, request: requests.PreparedRequest, response: requests.Response
+    ) -> None:
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        exchange = {
+            "request": {
+                "method": request.method,
+                "url": normalise_url(request.url),
+                "body": encode_body(
+                    body if isinstance(body, bytes) else None,
+                    request.headers.get("Content-Type", ""),
+                ),
+            },
+            "response": {
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {
+                    key: value
+                    for key, value in response.headers.items()
+                    if key.lower() not in SECRET_HEADERS | TRANSPORT_HEADERS
+                },
+                "body": encode_body(
+                    response.content, response.headers.get("Content-Type", "")
+                ),
+                "elapsed": response.elapsed.total_seconds(),
+            },
+        }
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(exchange) + "\n")
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        key = (request.method, normalise_url(request.url))
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                raise requests.exceptions.ConnectionError(
+                    f"No recorded response for {request.method} {request.url}",
+                    request=request,
+                )
+            exchange = exchanges.pop(0) if len(exchanges) > 1 else exchanges[0]
+
+        recorded = exchange["response"]
+        if self.latency == RECORDED_LATENCY:
+            time.sleep(recorded["elapsed"])
+        elif self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = decode_body(recorded["body"])
+        response._content_consumed = True
+        return response
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter recording exchanges to or replaying them from a cassette.
+
+    Args:
+        cassette (Cassette): The cassette.
+        adapter (BaseAdapter): The adapter requests are sent with while they are
+            recorded.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: BaseAdapter) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.cassette.mode == "replay":
+            return self.cassette.replay(request)
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
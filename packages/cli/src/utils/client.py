@@ -0,0 +1,613 @@
+import os
+import re
+import json
+import pathlib
+import requests
+import threading
+from typing import Optional, Tuple
+from posixpath import join as urljoin
+from requests.adapters import HTTPAdapter
+
+from utils.cassette import REDACTED, Cassette, CassetteAdapter
+from utils.transfer import MultipartFile, ProgressReporter, TokenBucket
+
+# Maximum number of pooled connections kept open per host, this should be at
+# least the number of worker threads that send requests with the same client.
+POOL_SIZE = 16
+
+
+# Name of the server profile whose base url is configured with `config`
+DEFAULT_SERVER = "default"
+
+
+def get_servers(cli_path: pathlib.PosixPath) -> dict[str, str]:
+    """Get the base urls of all server profiles from the config file.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+
+    Raises:
+        FileNotFoundError: Error raised if the config file does not exist.
+
+    Returns:
+        dict[str, str]: The base urls by the name of their profile, starting
+            with the default server if it is configured.
+    """
+    with open(cli_path / "config/config.json", "r") as f:
+        config = json.load(f)
+
+    servers = {}
+    if "baseUrl" in config:
+        servers[DEFAULT_SERVER] = config["baseUrl"]
+    for name, profile in config.get("profiles", {}).items():
+        servers[name] = profile["baseUrl"]
+    return servers
+
+
+def get_base_url(cli_path: pathlib.PosixPath, server: str = None) -> str:
+    """Get the base url of a server profile from the config file.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Raises:
+        FileNotFoundError: Error raised if the config file does not exist.
+        KeyError: Error raised if the config file does not contain the base url.
+
+    Returns:
+        str: The base url of the server.
+    """
+    servers = get_servers(cli_path)
+    if server is None or server == DEFAULT_SERVER:
+        return servers[DEFAULT_SERVER]
+    try:
+        return servers[server]
+    except KeyError:
+        raise KeyError(f"profiles.{server}")
+
+
+def get_auth_file(cli_path: pathlib.PosixPath, server: str = None) -> pathlib.Path:
+    """Get the path of the auth file which the tokens for a server are kept in.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Returns:
+        pathlib.Path: The path of the auth file.
+    """
+    if server is None or server == DEFAULT_SERVER:
+        return cli_path / "config/auth.json"
+    return cli_path / f"config/auth-{server}.json"
+
+
+def create_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Create a session which keeps up to `pool_size` connections alive.
+
+    If a cassette is configured by the environment, the requests of the session
+    are recorded to it or replayed from it instead.
+
+    Args:
+        pool_size (int, optional): Number of pooled connections per host.
+
+    Returns:
+        requests.Session: The created session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette, adapter)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class IamusError(Exception):
+    """Error raised when the server rejects a request.
+
+    Args:
+        message (str): The message of the error response.
+        errors (dict[str, dict], optional): The errors of the response by field.
+        status_code (int, optional): The HTTP status code of the response.
+    """
+
+    def __init__(
+        self, message: str, errors: dict[str, dict] = None, status_code: int = None
+    ) -> None:
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or {}
+        self.status_code = status_code
+
+    def code(self, field: str) -> Optional[int]:
+        """Get the error code of a field of the request, if there is one."""
+        return self.errors.get(field, {}).get("code")
+
+
+class IamusClient:
+    """Client of the Iamus API which the CLI commands are built on.
+
+    The client holds a single pooled session and the tokens of the logged in
+    user, so scripts can send any number of requests without paying for the
+    connection, config parsing and token refresh each time. The token is
+    refreshed again whenever the server reports that it has expired.
+
+    Request exceptions raised by `requests` are not handled by the client, and
+    responses which are not `ok` raise an `IamusError`.
+
+    Example:
+        client = IamusClient.from_config(Path("path/to/cli"))
+        client.authenticate()
+        for pub in client.list_publications():
+            print(pub["name"], pub["revision"])
+
+    Args:
+        base_url (str): The base URL of the server.
+        auth_file (pathlib.PosixPath, optional): Path to the auth file the
+            tokens are loaded from and saved to.
+        session (requests.Session, optional): The session to send requests
+            with, a pooled session is created if it is not specified.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        auth_file: pathlib.PosixPath = None,
+        session: requests.Session = None,
+    ) -> None:
+        self.base_url = base_url
+        self.auth_file = auth_file
+        self.session = session or create_session()
+        self.username = None
+        self.token = None
+        self.refresh_token = None
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls, cli_path: pathlib.PosixPath, server: str = None
+    ) -> "IamusClient":
+        """Create a client using the config and auth files of the CLI.
+
+        Every client has its own pooled session, so the clients of different
+        server profiles can be used concurrently.
+
+        Args:
+            cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+            server (str, optional): The name of the server profile, the default
+                server is used if it is not specified.
+
+        Raises:
+            FileNotFoundError: Error raised if the config file does not exist.
+            KeyError: Error raised if the config file does not contain the
+                base url.
+
+        Returns:
+            IamusClient: The created client.
+        """
+        return cls(get_base_url(cli_path, server), get_auth_file(cli_path, server))
+
+    @property
+    def headers(self) -> dict[str, str]:
+        if self.token is None:
+            return {}
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def url(self, path: str) -> str:
+        return urljoin(self.base_url, path)
+
+    def send(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request to the API, refreshing the token if it has expired.
+
+        Args:
+            method (str): The HTTP method of the request.
+            path (str): The path of the API relative to the base url.
+
+        Returns:
+            requests.Response: The raw response of the API.
+        """
+        headers = kwargs.pop("headers", {})
+        token = self.token
+        res = self.session.request(
+            method, self.url(path), headers={**self.headers, **headers}, **kwargs
+        )
+        # a streamed body cannot be sent again, it is consumed by the first request
+        retry = not hasattr(kwargs.get("data"), "read")
+        if res.status_code == 401 and self.refresh_token is not None and retry:
+            with self._refresh_lock:
+                # the token may have been refreshed by another thread meanwhile
+                if self.token == token:
+                    self.refresh()
+            res = self.session.request(
+                method, self.url(path), headers={**self.headers, **headers}, **kwargs
+            )
+        return res
+
+    def request(self, method: str, path: str, **kwargs) -> dict[str, object]:
+        """Send a request to the API and check the status of its response.
+
+        Args:
+            method (str): The HTTP method of the request.
+            path (str): The path of the API relative to the base url.
+
+        Raises:
+            IamusError: Error raised if the status of the response is not `ok`.
+
+        Returns:
+            dict[str, object]: The response of the API in JSON format.
+        """
+        return self._check(self.send(method, path, **kwargs))
+
+    def _check(self, res: requests.Response) -> dict[str, object]:
+        try:
+            body = res.json()
+        except ValueError:
+            raise IamusError(res.reason, status_code=res.status_code)
+
+        if body.get("status") != "ok":
+            raise IamusError(
+                body.get("message", res.reason), body.get("errors"), res.status_code
+            )
+        return body
+
+    def check_health(self) -> None:
+        """Check that the server is reachable.
+
+        Raises:
+            requests.exceptions.RequestException: Error raised if the server is
+                not reachable.
+        """
+        self.session.get(self.url("version"))
+
+    def _set_tokens(self, username: str, token: str, refresh_token: str) -> None:
+        self.username, self.token, self.refresh_token = username, token, refresh_token
+        # the tokens replayed from a cassette are redacted, keep the saved ones
+        if self.auth_file is None or token == REDACTED:
+            return
+
+        with open(self.auth_file, "w") as f:
+            json.dump(
+                {"username": username, "token": token, "refreshToken": refresh_token},
+                f,
+            )
+
+    def login(self, username: str, password: str) -> dict[str, object]:
+        """Login and save the tokens of the user to the auth file.
+
+        Args:
+            username (str): The username of the user.
+            password (str): The password of the user.
+
+        Raises:
+            IamusError: Error raised if the credentials are not valid.
+
+        Returns:
+            dict[str, object]: The logged in user.
+        """
+        login_res = self.request(
+            "POST", "auth/login", data={"username": username, "password": password}
+        )
+        user = login_res["user"]
+        self._set_tokens(
+            user["username"], login_res["token"], login_res["refreshToken"]
+        )
+        return user
+
+    def logout(self) -> None:
+        """Forget the tokens of the user and remove the auth file.
+
+        Raises:
+            FileNotFoundError: Error raised if the user is not logged in.
+        """
+        self.username = self.token = self.refresh_token = None
+        os.remove(self.auth_file)
+
+    def refresh(self) -> None:
+        """Refresh the tokens of the user.
+
+        Raises:
+            IamusError: Error raised if the refresh token has expired.
+        """
+        session_res = self._check(
+            self.session.post(
+                self.url("auth/session"),
+                data={"token": self.token, "refreshToken": self.refresh_token},
+            )
+        )
+        self._set_tokens(
+            self.username, session_res["token"], session_res["refreshToken"]
+        )
+
+    def authenticate(self) -> str:
+        """Load the tokens of the user from the auth file and refresh them.
+
+        It does nothing if the client is already authenticated.
+
+        Raises:
+            FileNotFoundError: Error raised if the auth file does not exist.
+            IamusError: Error raised if the refresh token has expired.
+
+        Returns:
+            str: The username of the logged in user.
+        """
+        if self.username is not None:
+            return self.username
+
+        with open(self.auth_file, "r") as f:
+            data = json.load(f)
+
+        self.username = data["username"]
+        self.token, self.refresh_token = data["token"], data["refreshToken"]
+        try:
+            self.refresh()
+        except IamusError:
+            self.username = self.token = self.refresh_token = None
+            raise
+        return self.username
+
+    def list_publications(
+        self, username: str = None, skip: int = 0, take: int = None
+    ) -> list[dict[str, object]]:
+        """List the current revisions of the publications of a user.
+
+        Args:
+            username (str, optional): The owner of the publications, defaults
+                to the logged in user.
+            skip (int, optional): The number of publications to skip.
+            take (int, optional): The number of publications to list, the
+                server decides how many are listed if it is not specified.
+
+        Returns:
+            list[dict[str, object]]: The publications, newest first.
+        """
+        params = {"skip": skip} if take is None else {"skip": skip, "take": take}
+        show_res = self.request(
+            "GET", f"publication/{username or self.username}", params=params
+        )
+        return show_res["publications"]
+
+    def list_revisions(
+        self, name: str, username: str = None, skip: int = 0, take: int = None
+    ) -> list[dict[str, object]]:
+        """List the revisions of a publication of a user.
+
+        Args:
+            name (str): The name of the publication.
+            username (str, optional): The owner of the publication, defaults to
+                the logged in user.
+            skip (int, optional): The number of revisions to skip.
+            take (int, optional): The number of revisions to list, the server
+                decides how many are listed if it is not specified.
+
+        Returns:
+            list[dict[str, object]]: The revisions, newest first.
+        """
+        params = {"skip": skip} if take is None else {"skip": skip, "take": take}
+        revisions_res = self.request(
+            "GET",
+            f"publication/{username or self.username}/{name}/revisions",
+            params=params,
+        )
+        return revisions_res["revisions"]
+
+    def search(
+        self, kind: str, query: str, skip: int = 0, take: int = None
+    ) -> Tuple[list[dict[str, object]], int]:
+        """Search the publications or users which are visible to everyone.
+
+        Args:
+            kind (str): Either `publication` or `user`.
+            query (str): The text searched for.
+            skip (int, optional): The number of results to skip.
+            take (int, optional): The number of results to list, the server
+                decides how many are listed if it is not specified.
+
+        Returns:
+            Tuple[list[dict[str, object]], int]: The results, best match first,
+                and the total number of results.
+        """
+        params = {"query": query, "skip": skip}
+        if take is not None:
+            params["take"] = take
+        search_res = self.request("GET", f"search/{kind}", params=params)
+        return search_res[f"{kind}s"], search_res["total"]
+
+    def resolve(
+        self, pub_id: str = None, name: str = None, revision: str = None
+    ) -> dict[str, object]:
+        """Get a publication by its id, or by its name and revision.
+
+        Args:
+            pub_id (str, optional): The id of the publication, it is required if
+                `name` is not specified.
+            name (str, optional): The name of a publication of the logged in
+                user, it is required if `pub_id` is not specified.
+            revision (str, optional): The revision of the publication, the
+                current revision is used if it is not specified. It is ignored
+                if `pub_id` is specified since the id refers to a single
+                revision.
+
+        Returns:
+            dict[str, object]: The publication.
+        """
+        if pub_id:
+            get_pub_res = self.request("GET", f"publication-by-id/{pub_id}")
+        else:
+            params = {"revision": revision} if revision else {}
+            get_pub_res = self.request(
+                "GET", f"publication/{self.username}/{name}", params=params
+            )
+        return get_pub_res["publication"]
+
+    def revise(self, name: str, revision: str, changelog: str) -> dict[str, object]:
+        """Create a new revision of a publication of the logged in user.
+
+        Args:
+            name (str): The name of the publication.
+            revision (str): The new revision number, e.g. v1.0.
+            changelog (str): The change log of the revision.
+
+        Returns:
+            dict[str, object]: The publication of the new revision.
+        """
+        revise_res = self.request(
+            "POST",
+            f"publication/{self.username}/{name}/revise",
+            data={"revision": revision, "changelog": changelog},
+        )
+        return revise_res["publication"]
+
+    def list_reviews(self, pub_id: str) -> list[dict[str, object]]:
+        """List the reviews on a publication.
+
+        Args:
+            pub_id (str): The id of the publication.
+
+        Returns:
+            list[dict[str, object]]: The reviews, each with its `status`.
+        """
+        reviews_res = self.request("GET", f"publication-by-id/{pub_id}/reviews")
+        return reviews_res["reviews"]
+
+    def list_notifications(
+        self, skip: int = 0, take: int = None, after: str = None
+    ) -> list[dict[str, object]]:
+        """List the notifications of the logged in user which are not viewed.
+
+        Args:
+            skip (int, optional): The number of notifications to skip.
+            take (int, optional): The number of notifications to list, the
+                server decides how many are listed if it is not specified.
+            after (str, optional): The id of a notification, only those created
+                after it are listed.
+
+        Returns:
+            list[dict[str, object]]: The notifications, oldest first.
+        """
+        params = {"skip": skip} if take is None else {"skip": skip, "take": take}
+        if after is not None:
+            params["after"] = after
+        notifications_res = self.request("GET", "notifications", params=params)
+        return notifications_res["notifications"]
+
+    def upload(
+        self,
+        pub_id: str,
+        file: str,
+        bucket: TokenBucket = None,
+        progress: ProgressReporter = None,
+        data: bytes = None,
+        manifest: dict[str, object] = None,
+    ) -> dict[str, object]:
+        """Stream a zipfile to the sources of a publication.
+
+        Args:
+            pub_id (str): The id of the publication.
+            file (str): The path of the zipfile which is to be uploaded.
+            bucket (TokenBucket, optional): Bucket limiting the upload rate.
+            progress (ProgressReporter, optional): Reporter of the upload
+                progress.
+            data (bytes, optional): Content of the zipfile if it was already
+                read, the file is read if it is None.
+            manifest (dict[str, object], optional): Manifest of a delta upload,
+                see `utils.delta`. The zipfile then only contains the added and
+                changed members, and the sources are rebuilt by the server from
+                the `base` publication without the `removed` members.
+
+        Returns:
+            dict[str, object]: The response of the upload API in JSON format.
+        """
+        path = f"resource/upload/publication/{pub_id}"
+        fields = None
+        if manifest is not None:
+            path, fields = f"{path}/delta", {"manifest": json.dumps(manifest)}
+        with MultipartFile(
+            "file", file, "application/zip", bucket, progress, data, fields
+        ) as body:
+            res = self.send(
+                "POST",
+                path,
+                data=body,
+                headers={"Content-Type": body.content_type},
+            )
+        if progress is not None:
+            progress.finish()
+        return self._check(res)
+
+    def tree(self, pub_id: str, path: str = "") -> dict[str, object]:
+        """Get an entry of the archive of a publication, without its content.
+
+        Args:
+            pub_id (str): The id of the publication.
+            path (str, optional): The path within the archive.
+
+        Returns:
+            dict[str, object]: The entry, it contains the listing under
+                `entries` if the path is a directory.
+        """
+        tree_res = self.request(
+            "GET",
+            f"publication-by-id/{pub_id}/tree/{path.strip('/')}",
+            params={"noContent": "true"},
+        )
+        return tree_res["entry"]
+
+    def download_range(
+        self, pub_id: str, start: int, end: int = None
+    ) -> Tuple[bytes, int, int]:
+        """Download a byte range of the zipfile of a publication.
+
+        Args:
+            pub_id (str): The id of the publication.
+            start (int): The offset of the first byte, or if it is negative,
+                the number of bytes at the end of the zipfile.
+            end (int, optional): The offset of the last byte, the range ends at
+                the end of the zipfile if it is not specified.
+
+        Returns:
+            Tuple[bytes, int, int]: The content, its offset within the zipfile
+                and the size of the zipfile. The whole zipfile is returned if
+                the server does not support ranges.
+        """
+        if start < 0:
+            byte_range = f"bytes={start}"
+        else:
+            byte_range = f"bytes={start}-{'' if end is None else end}"
+        res = self.send(
+            "GET", f"publication-by-id/{pub_id}/zip", headers={"Range": byte_range}
+        )
+        if res.status_code != 206:
+            if not res.ok:
+                self._check(res)
+            return res.content, 0, len(res.content)
+
+        # Content-Range: bytes <first>-<last>/<size>
+        first, size = re.fullmatch(
+            r"bytes (\d+)-\d+/(\d+)", res.headers["Content-Range"]
+        ).groups()
+        return res.content, int(first), int(size)
+
+    def download(self, pub_id: str, path: str = None) -> bytes:
+        """Download a file of a publication, or its whole zipfile.
+
+        Args:
+            pub_id (str): The id of the publication.
+            path (str, optional): The path of the file within the archive, the
+                whole zipfile is downloaded if it is not specified.
+
+        Returns:
+            bytes: The content of the file.
+        """
+        if path is None:
+            res = self.send("GET", f"publication-by-id/{pub_id}/zip")
+        else:
+            res = self.send(
+                "GET", f"publication-by-id/{pub_id}/download/{path.strip('/')}"
+            )
+        if not res.ok:
+            self._check(res)
+        return res.content
@@ -0,0 +1,114 @@
+import io
+import zipfile
+from typing import Optional, Tuple
+
+from utils.client import IamusClient
+from utils.remote_zip import read_central_directory
+
+# Number of revisions requested per page while looking for the base revision
+PAGE_SIZE = 50
+
+
+def find_base(
+    client: IamusClient, pub_id: str, name: str, page_size: int = PAGE_SIZE
+) -> Optional[dict]:
+    """Find the revision which precedes a publication, if there is one.
+
+    The revisions are listed a page at a time until the publication and the
+    revision after it are found.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        pub_id (str): The id of the publication.
+        name (str): The name of the publication.
+        page_size (int, optional): The number of revisions listed per request.
+
+    Returns:
+        Optional[dict]: The previous revision, or None if the publication is
+            the first revision.
+    """
+    found, skip = False, 0
+    while True:
+        revisions = client.list_revisions(name, skip=skip, take=page_size)
+        for revision in revisions:
+            if found:
+                return revision
+            found = revision["id"] == pub_id
+        if len(revisions) < page_size:
+            return None
+        skip += page_size
+
+
+def compare_members(
+    local: list[zipfile.ZipInfo], remote: list[zipfile.ZipInfo]
+) -> Tuple[list[str], list[str]]:
+    """Compare the members of a local zipfile to those of a remote one.
+
+    Members are compared by their CRC and size, so their content is not read.
+
+    Args:
+        local (list[zipfile.ZipInfo]): The members of the local zipfile.
+        remote (list[zipfile.ZipInfo]): The members of the remote zipfile.
+
+    Returns:
+        Tuple[list[str], list[str]]: The names of the added or changed members,
+            and of the members which were removed.
+    """
+    remote_members = {info.filename: (info.CRC, info.file_size) for info in remote}
+    local_names = {info.filename for info in local}
+    changed = [
+        info.filename
+        for info in local
+        if remote_members.get(info.filename) != (info.CRC, info.file_size)
+    ]
+    removed = [name for name in remote_members if name not in local_names]
+    return changed, removed
+
+
+def build_delta(file: str, changed: list[str]) -> bytes:
+    """Build a zipfile with the given members of a local zipfile."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(file) as source, zipfile.ZipFile(buffer, "w") as delta:
+        for name in changed:
+            info = source.getinfo(name)
+            delta.writestr(info, source.read(info))
+    return buffer.getvalue()
+
+
+def plan_delta(
+    client: IamusClient, pub_id: str, name: str, file: str
+) -> Optional[Tuple[dict, list[str], bytes, dict[str, object]]]:
+    """Prepare a delta upload of a zipfile against the previous revision.
+
+    Only the central directory of the previous revision's zipfile is read, so
+    planning costs a few kilobytes however large the publication is. The delta
+    is sent to `resource/upload/publication/<id>/delta` with the manifest
+    `{"base": <id of the previous revision>, "removed": [<member>, ...]}`, and
+    the server rebuilds the sources from those of the previous revision.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        pub_id (str): The id of the publication the zipfile is uploaded to.
+        name (str): The name of the publication.
+        file (str): The path of the zipfile.
+
+    Raises:
+        IamusError: Error raised if the previous revision has no sources.
+        zipfile.BadZipFile: Error raised if its zipfile is malformed.
+
+    Returns:
+        Optional[Tuple[dict, list[str], bytes, dict[str, object]]]: The
+            previous revision, the names of the added and changed members, the
+            zipfile of these members and the manifest of the upload, or None if
+            there is no previous revision.
+    """
+    base = find_base(client, pub_id, name)
+    if base is None:
+        return None
+
+    remote = read_central_directory(client, base["id"])
+    with zipfile.ZipFile(file) as archive:
+        local = archive.infolist()
+    changed, removed = compare_members(local, remote)
+    manifest = {"base": base["id"], "removed": removed}
+    return base, changed, build_delta(file, changed), manifest
@@ -0,0 +1,92 @@
+import requests
+from typing import Callable, Iterable, Iterator, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils.client import IamusClient, IamusError
+
+# Maximum number of revisions counted per publication, more are shown as `200+`
+MAX_REVISIONS = 200
+
+
+def count_revisions(client: IamusClient, pub: dict[str, object]) -> str:
+    revisions = client.list_revisions(pub["name"], take=MAX_REVISIONS)
+    count = len(revisions)
+    return f"{count}+" if count >= MAX_REVISIONS else str(count)
+
+
+def count_sources(client: IamusClient, pub: dict[str, object]) -> str:
+    try:
+        entry = client.tree(pub["id"])
+    except IamusError as e:
+        if e.status_code == 404:
+            return "none"
+        raise
+    count = len(entry.get("entries", []))
+    return f"{count} {'entry' if count == 1 else 'entries'}"
+
+
+def count_reviews(client: IamusClient, pub: dict[str, object]) -> str:
+    reviews = client.list_reviews(pub["id"])
+    completed = sum(review.get("status") == "completed" for review in reviews)
+    return f"{len(reviews)} ({completed} completed)"
+
+
+# Details fetched for every publication, in the order they are shown
+DETAILS: dict[str, Callable[[IamusClient, dict[str, object]], str]] = {
+    "revisions": count_revisions,
+    "sources": count_sources,
+    "reviews": count_reviews,
+}
+
+
+def fetch_detail(
+    fetch: Callable[[IamusClient, dict[str, object]], str],
+    client: IamusClient,
+    pub: dict[str, object],
+) -> str:
+    """Fetch a detail of a publication, describing the error if it fails."""
+    try:
+        return fetch(client, pub)
+    except IamusError as e:
+        return f"error ({e})"
+    except requests.exceptions.RequestException as e:
+        return f"error ({type(e).__name__})"
+
+
+def fetch_details(
+    client: IamusClient, publications: Iterable[dict[str, object]], jobs: int
+) -> Iterator[Tuple[dict[str, object], dict[str, str]]]:
+    """Fetch the details of publications concurrently, yielding them in order.
+
+    The requests of all publications are submitted at once to a pool of `jobs`
+    threads, so the total time is bounded by the slowest requests rather than
+    their sum. Every publication is yielded as soon as its own details and
+    those of the publications before it have been fetched.
+
+    Args:
+        client (IamusClient): The authenticated client, its session should
+            pool at least `jobs` connections.
+        publications (Iterable[dict[str, object]]): The publications.
+        jobs (int): The maximum number of requests in flight.
+
+    Yields:
+        Tuple[dict[str, object], dict[str, str]]: Every publication with its
+            details by name.
+    """
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        pending: list[Tuple[dict[str, object], dict[str, Future]]] = [
+            (
+                pub,
+                {
+                    name: executor.submit(fetch_detail, fetch, client, pub)
+                    for name, fetch in DETAILS.items()
+                },
+            )
+            for pub in publications
+        ]
+        for pub, futures in pending:
+            yield pub, {name: future.result() for name, future in futures.items()}
+    finally:
+        # stop fetching if the consumer stops early, e.g. on a broken pipe
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,163 @@
+import os
+import sys
+import click
+import pathlib
+import requests
+from functools import wraps
+from typing import Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.index import open_index
+from utils.transfer import ProgressReporter, TokenBucket, format_size
+from utils.client import IamusClient, IamusError, get_servers
+
+
+def get_targets(cli_path: pathlib.PosixPath, to: str) -> list[str]:
+    """Get the names of the server profiles an upload is sent to.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        to (str): Either `all`, or a comma separated list of profile names
+            where `default` is the server configured without a name.
+
+    Raises:
+        FileNotFoundError: Error raised if the config file does not exist.
+        click.BadParameter: Error raised if a profile is not configured.
+
+    Returns:
+        list[str]: The names of the server profiles.
+    """
+    servers = get_servers(cli_path)
+    if to == "all":
+        return list(servers)
+
+    targets = [target.strip() for target in to.split(",") if target.strip()]
+    unknown = [target for target in targets if target not in servers]
+    if unknown:
+        raise click.BadParameter(
+            f"Unknown server profiles: {', '.join(unknown)}", param_hint="'--to'"
+        )
+    return targets
+
+
+def upload_to_server(
+    cli_path: pathlib.PosixPath,
+    server: str,
+    name: str,
+    file: str,
+    bucket: TokenBucket = None,
+    quiet: bool = False,
+) -> Tuple[bool, str]:
+    """Upload a zipfile to a publication on a server.
+
+    Every server is sent its requests with the client of its own profile, so
+    the uploads to different servers do not share connections or tokens. The
+    zipfile is streamed from disk, every upload reads it on its own.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str): The name of the server profile.
+        name (str): The name of the publication to upload to.
+        file (str): The path of the zipfile.
+        bucket (TokenBucket, optional): Bucket limiting the upload rate, it is
+            shared by all servers.
+        quiet (bool, optional): Whether to report the progress as JSON events.
+
+    Returns:
+        Tuple[bool, str]: Whether the upload succeeded and a message
+            describing the result.
+    """
+    progress = ProgressReporter(label=f"{name}@{server}", quiet=True) if quiet else None
+    try:
+        client = IamusClient.from_config(cli_path, server)
+    except KeyError as e:
+        return False, f"Config file is not valid. Missing key: {e}"
+    try:
+        try:
+            client.authenticate()
+        except (FileNotFoundError, KeyError):
+            return False, "Please login first"
+        index = open_index(cli_path, server)
+        publication = index.resolve(client, name) if index is not None else None
+        pub_id = (publication or client.resolve(name=name))["id"]
+        client.upload(pub_id, file, bucket, progress)
+    except KeyError as e:
+        return False, f"Response is not valid. Missing key: {e}"
+    except requests.exceptions.RequestException as e:
+        return False, f"Error occurs when sending request: {e}"
+    except IamusError as e:
+        if "file" in e.errors:
+            return False, f"Response Error: {e.errors['file']['message']}"
+        return False, f"Response Error: {e}"
+
+    if index is not None:
+        index.invalidate(client.username, name)
+    return True, f"File uploaded to {name}({client.url(f'publication/{pub_id}')})"
+
+
+def fan_out(func: Callable) -> Callable:
+    """Decorator for the upload command to send the upload to several servers.
+
+    If the `to` option is set, the archive is streamed from disk to every
+    target server concurrently, instead of being uploaded to the current
+    server only. It must be applied before `pass_base_url`, since
+    every target is sent its requests with the client of its own profile.
+
+    Args:
+        func (Callable): Function to be decorated.
+
+    Returns:
+        Callable: Decorated function which handles the `to` option.
+    """
+
+    @wraps(func)
+    def wrapper(ctx: click.core.Context, *args, to: str = None, **kwargs):
+        if to is None:
+            return func(ctx, *args, **kwargs)
+
+        cli_path, name, file = ctx.obj["CLI_PATH"], kwargs["name"], kwargs["file"]
+        if kwargs.get("pub_id"):
+            raise click.UsageError("Publication ids differ between servers, use --name")
+        try:
+            targets = get_targets(cli_path, to)
+        except FileNotFoundError:
+            click.echo(
+                "No config.json found. Please create one using `config` command."
+            )
+            sys.exit(1)
+        if not targets:
+            click.echo("No servers are configured, use `config` to add one")
+            sys.exit(1)
+
+        click.echo(
+            f"Uploading {name} ({format_size(os.path.getsize(file))}) "
+            f"to {len(targets)} servers"
+        )
+
+        max_rate = kwargs.get("max_rate")
+        bucket = TokenBucket(max_rate) if max_rate else None
+        failed = 0
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = {
+                executor.submit(
+                    upload_to_server,
+                    cli_path,
+                    server,
+                    name,
+                    file,
+                    bucket,
+                    kwargs.get("quiet", False),
+                ): server
+                for server in targets
+            }
+            for future in as_completed(futures):
+                success, message = future.result()
+                failed += not success
+                status = "done" if success else "failed"
+                click.echo(f"{futures[future]} [{status}] {message}")
+
+        if failed:
+            click.echo(f"Upload failed on {failed} of {len(targets)} servers")
+            sys.exit(1)
+
+    return wrapper
@@ -0,0 +1,412 @@
+import json
+import time
+import click
+import pathlib
+import sqlite3
+from functools import partial
+from typing import Callable, Iterator, Optional, Tuple
+
+from utils.client import DEFAULT_SERVER, IamusClient
+
+# Seconds for which the index answers lookups before it is synced again
+INDEX_MAX_AGE = 300
+
+# Number of publications requested per page when the index is synced
+PAGE_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    title TEXT,
+    draft INTEGER NOT NULL,
+    current INTEGER NOT NULL,
+    created_at INTEGER,
+    updated_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS publications_by_name ON publications (owner, name);
+CREATE TABLE IF NOT EXISTS syncs (
+    scope TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO publications
+    (id, owner, name, revision, title, draft, current, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    revision = excluded.revision,
+    title = excluded.title,
+    draft = excluded.draft,
+    current = excluded.current,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at
+WHERE updated_at IS NOT excluded.updated_at OR current != excluded.current
+"""
+
+
+def get_index_config(cli_path: pathlib.PosixPath) -> dict[str, object]:
+    """Get the settings of the index from the config file.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+
+    Returns:
+        dict[str, object]: The settings, `enabled` is False if the index has
+            not been enabled.
+    """
+    try:
+        with open(cli_path / "config/config.json", "r") as f:
+            settings = json.load(f).get("index", {})
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {"enabled": False, "maxAge": INDEX_MAX_AGE, **settings}
+
+
+def get_index_file(cli_path: pathlib.PosixPath, server: str = None) -> pathlib.Path:
+    """Get the path of the index of a server profile.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Returns:
+        pathlib.Path: The path of the SQLite database.
+    """
+    if server is None or server == DEFAULT_SERVER:
+        return cli_path / "config/index.db"
+    return cli_path / f"config/index-{server}.db"
+
+
+def open_index(
+    cli_path: pathlib.PosixPath, server: str = None
+) -> Optional["PublicationIndex"]:
+    """Open the index of a server profile if the index has been enabled.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Returns:
+        Optional[PublicationIndex]: The index, or None if it is not enabled.
+    """
+    settings = get_index_config(cli_path)
+    if not settings["enabled"]:
+        return None
+    return PublicationIndex(get_index_file(cli_path, server), settings["maxAge"])
+
+
+def get_index(ctx: click.core.Context) -> Optional["PublicationIndex"]:
+    """Get the index shared by the commands of an invocation of the CLI.
+
+    Args:
+        ctx (click.core.Context): Context object to share global variables with
+            subcommands.
+
+    Returns:
+        Optional[PublicationIndex]: The index, or None if it is not enabled.
+    """
+    if "INDEX" not in ctx.obj:
+        ctx.obj["INDEX"] = open_index(ctx.obj["CLI_PATH"], ctx.obj.get("SERVER"))
+    return ctx.obj["INDEX"]
+
+
+class PublicationIndex:
+    """Local SQLite index of the publications and revisions of users.
+
+    The index answers name lookups and listings without a round trip to the
+    server while it is fresh, that is for `max_age` seconds after it was last
+    synced. The current revisions of a user are synced together, the other
+    revisions of a publication are only synced when they are looked up. Rows
+    whose `updatedAt` did not change are left untouched by a sync.
+
+    Args:
+        index_file (pathlib.PosixPath): Path to the SQLite database.
+        max_age (float, optional): Seconds for which the index is fresh.
+    """
+
+    def __init__(
+        self, index_file: pathlib.PosixPath, max_age: float = INDEX_MAX_AGE
+    ) -> None:
+        self.index_file = index_file
+        self.max_age = max_age
+        self._db = sqlite3.connect(index_file)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def _scope(owner: str, name: str = None) -> str:
+        return owner if name is None else f"{owner}/{name}"
+
+    def synced_at(self, owner: str, name: str = None) -> Optional[float]:
+        """Get the time the publications or revisions of a user were synced.
+
+        Args:
+            owner (str): The username of the owner.
+            name (str, optional): The name of the publication whose revisions
+                were synced, the current publications are meant if it is None.
+
+        Returns:
+            Optional[float]: The time of the last sync, or None if they were
+                not synced since the last invalidation.
+        """
+        row = self._db.execute(
+            "SELECT synced_at FROM syncs WHERE scope = ?", (self._scope(owner, name),)
+        ).fetchone()
+        return None if row is None else row["synced_at"]
+
+    def syncs(self) -> list[Tuple[str, float]]:
+        """List the scopes of the index and the time they were last synced.
+
+        Returns:
+            list[Tuple[str, float]]: The scopes, which are either the username
+                of an owner or `<owner>/<name>` for the revisions of a
+                publication, and their sync times.
+        """
+        rows = self._db.execute("SELECT scope, synced_at FROM syncs ORDER BY scope")
+        return [(row["scope"], row["synced_at"]) for row in rows]
+
+    def is_fresh(self, owner: str, name: str = None) -> bool:
+        synced_at = self.synced_at(owner, name)
+        return synced_at is not None and time.time() - synced_at <= self.max_age
+
+    def invalidate(self, owner: str, name: str = None) -> None:
+        """Make the next lookup sync the publications of a user again.
+
+        The rows are kept so that they can still be listed offline.
+
+        Args:
+            owner (str): The username of the owner.
+            name (str, optional): The name of the publication which changed,
+                the revisions of all publications are invalidated if it is None.
+        """
+        with self._db:
+            self._db.execute("DELETE FROM syncs WHERE scope = ?", (owner,))
+            if name is None:
+                self._db.execute(
+                    "DELETE FROM syncs WHERE substr(scope, 1, ?) = ?",
+                    (len(owner) + 1, f"{owner}/"),
+                )
+            else:
+                self._db.execute(
+                    "DELETE FROM syncs WHERE scope = ?", (self._scope(owner, name),)
+                )
+
+    def _upsert(self, owner: str, publications: list[dict[str, object]]) -> int:
+        cursor = self._db.executemany(
+            UPSERT,
+            [
+                (
+                    pub["id"],
+                    owner,
+                    pub["name"],
+                    pub["revision"],
+                    pub.get("title"),
+                    pub.get("draft", False),
+                    pub.get("current", True),
+                    pub.get("createdAt"),
+                    pub.get("updatedAt"),
+                )
+                for pub in publications
+            ],
+        )
+        return cursor.rowcount
+
+    def _mark_synced(self, owner: str, name: str = None) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO syncs (scope, synced_at) VALUES (?, ?)",
+            (self._scope(owner, name), time.time()),
+        )
+
+    @staticmethod
+    def _pages(
+        fetch: Callable, page_size: int = PAGE_SIZE
+    ) -> Iterator[dict[str, object]]:
+        skip = 0
+        while True:
+            page = fetch(skip=skip, take=page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            skip += page_size
+
+    def sync(self, client: IamusClient, owner: str = None) -> int:
+        """Sync the current revisions of the publications of a user.
+
+        Publications which are no longer listed are removed from the index
+        with all their revisions, and revisions which are no longer current
+        are marked as such.
+
+        Args:
+            client (IamusClient): The authenticated client.
+            owner (str, optional): The username of the owner, defaults to the
+                logged in user.
+
+        Raises:
+            IamusError: Error raised if the server cannot list the publications.
+
+        Returns:
+            int: The number of rows which changed.
+        """
+        owner = owner or client.username
+        publications = list(self._pages(partial(client.list_publications, owner)))
+
+        with self._db:
+            current = [pub["id"] for pub in publications]
+            names = [pub["name"] for pub in publications]
+            changed = self._db.execute(
+                f"DELETE FROM publications WHERE owner = ? AND name NOT IN "
+                f"({', '.join('?' * len(names))})",
+                (owner, *names),
+            ).rowcount
+            changed += self._db.execute(
+                f"UPDATE publications SET current = 0 WHERE owner = ? AND current "
+                f"AND id NOT IN ({', '.join('?' * len(current))})",
+                (owner, *current),
+            ).rowcount
+            changed += self._upsert(owner, publications)
+            self._mark_synced(owner)
+        return changed
+
+    def sync_revisions(self, client: IamusClient, name: str, owner: str = None) -> int:
+        """Sync all revisions of a publication of a user.
+
+        Args:
+            client (IamusClient): The authenticated client.
+            name (str): The name of the publication.
+            owner (str, optional): The username of the owner, defaults to the
+                logged in user.
+
+        Raises:
+            IamusError: Error raised if the server cannot list the revisions.
+
+        Returns:
+            int: The number of rows which changed.
+        """
+        owner = owner or client.username
+        revisions = list(self._pages(partial(client.list_revisions, name, owner)))
+
+        with self._db:
+            ids = [rev["id"] for rev in revisions]
+            changed = self._db.execute(
+                f"DELETE FROM publications WHERE owner = ? AND name = ? AND id NOT IN "
+                f"({', '.join('?' * len(ids))})",
+                (owner, name, *ids),
+            ).rowcount
+            changed += self._upsert(owner, revisions)
+            self._mark_synced(owner, name)
+        return changed
+
+    @staticmethod
+    def _project(row: sqlite3.Row) -> dict[str, object]:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "revision": row["revision"],
+            "title": row["title"],
+            "draft": bool(row["draft"]),
+            "current": bool(row["current"]),
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+
+    def publications(self, owner: str) -> list[dict[str, object]]:
+        """List the current revisions of the publications of a user.
+
+        Args:
+            owner (str): The username of the owner.
+
+        Returns:
+            list[dict[str, object]]: The publications, newest first.
+        """
+        rows = self._db.execute(
+            "SELECT * FROM publications WHERE owner = ? AND current "
+            "ORDER BY created_at DESC",
+            (owner,),
+        )
+        return [self._project(row) for row in rows]
+
+    def revisions(self, owner: str, name: str) -> list[dict[str, object]]:
+        """List the revisions of a publication of a user.
+
+        Args:
+            owner (str): The username of the owner.
+            name (str): The name of the publication.
+
+        Returns:
+            list[dict[str, object]]: The revisions, newest first.
+        """
+        rows = self._db.execute(
+            "SELECT * FROM publications WHERE owner = ? AND name = ? "
+            "ORDER BY created_at DESC",
+            (owner, name),
+        )
+        return [self._project(row) for row in rows]
+
+    def lookup(
+        self, owner: str, name: str, revision: str = None
+    ) -> Optional[dict[str, object]]:
+        """Find a publication of a user in the index.
+
+        Args:
+            owner (str): The username of the owner.
+            name (str): The name of the publication.
+            revision (str, optional): The revision of the publication, the
+                current revision is looked up if it is not specified.
+
+        Returns:
+            Optional[dict[str, object]]: The publication, or None if it is not
+                in the index.
+        """
+        if revision is None:
+            row = self._db.execute(
+                "SELECT * FROM publications WHERE owner = ? AND name = ? AND current",
+                (owner, name),
+            ).fetchone()
+        else:
+            row = self._db.execute(
+                "SELECT * FROM publications WHERE owner = ? AND name = ? "
+                "AND revision = ?",
+                (owner, name, revision),
+            ).fetchone()
+        return None if row is None else self._project(row)
+
+    def resolve(
+        self, client: IamusClient, name: str, revision: str = None
+    ) -> Optional[dict[str, object]]:
+        """Find a publication of the logged in user, syncing the index if it is
+        stale.
+
+        Args:
+            client (IamusClient): The authenticated client.
+            name (str): The name of the publication.
+            revision (str, optional): The revision of the publication, the
+                current revision is looked up if it is not specified.
+
+        Raises:
+            IamusError: Error raised if the server cannot list the publications.
+
+        Returns:
+            Optional[dict[str, object]]: The publication, or None if the user
+                has no such publication.
+        """
+        owner = client.username
+        if revision is None:
+            if not self.is_fresh(owner):
+                self.sync(client)
+            return self.lookup(owner, name)
+
+        publication = self.lookup(owner, name, revision)
+        if publication is None and not self.is_fresh(owner, name):
+            self.sync_revisions(client, name)
+            publication = self.lookup(owner, name, revision)
+        return publication
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import pathlib
+import requests
+from typing import Callable, Iterator, Optional, Tuple
+
+from utils.client import DEFAULT_SERVER, IamusClient, IamusError
+
+# Seconds between polls while notifications arrive, the interval is doubled
+# after every poll without new notifications up to `MAX_INTERVAL`
+MIN_INTERVAL = 2.0
+MAX_INTERVAL = 60.0
+
+# Number of notifications requested per page, the server allows at most 200
+PAGE_SIZE = 50
+
+
+def get_cursor_file(cli_path: pathlib.PosixPath, server: str = None) -> pathlib.Path:
+    """Get the path of the file which the notification cursor is kept in.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Returns:
+        pathlib.Path: The path of the cursor file.
+    """
+    if server is None or server == DEFAULT_SERVER:
+        return cli_path / "config/notifications.json"
+    return cli_path / f"config/notifications-{server}.json"
+
+
+def load_cursor(cursor_file: pathlib.PosixPath) -> Optional[dict[str, object]]:
+    """Load the cursor, or None if no notification was seen yet."""
+    try:
+        with open(cursor_file, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_cursor(cursor_file: pathlib.PosixPath, cursor: dict[str, object]) -> None:
+    """Save the cursor, replacing the file at once so it is never left partial."""
+    partial = cursor_file.with_suffix(".tmp")
+    with open(partial, "w") as f:
+        json.dump(cursor, f)
+    os.replace(partial, cursor_file)
+
+
+def is_retryable(error: IamusError) -> bool:
+    """Whether a later poll may succeed where a request failed with an error.
+
+    Those are the errors of a server which is overloaded or failing, and of a
+    token refresh which failed, which the next request attempts again.
+    """
+    return error.status_code in (401, 408, 429) or (error.status_code or 0) >= 500
+
+
+def fetch_new(
+    client: IamusClient, cursor: Optional[dict[str, object]], take: int = PAGE_SIZE
+) -> Tuple[list[dict[str, object]], Optional[dict[str, object]]]:
+    """Fetch the notifications which arrived after the cursor.
+
+    The cursor is the newest notification seen, `{"id"}`. The server lists the
+    notifications which are not viewed in the order they were created, only
+    those created after the notification of the `after` id, so every page is
+    read after the last notification of the previous one and an idle poll
+    returns an empty page.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        cursor (Optional[dict[str, object]]): The cursor, all the notifications
+            are new if it is None.
+        take (int, optional): The number of notifications per page.
+
+    Returns:
+        Tuple[list[dict[str, object]], Optional[dict[str, object]]]: The new
+            notifications, oldest first, and the cursor after them.
+    """
+    after = cursor.get("id") if cursor is not None else None
+    notifications = []
+    while True:
+        page = client.list_notifications(take=take, after=after)
+        notifications += page
+        if page:
+            after = page[-1]["id"]
+        if len(page) < take:
+            break
+
+    if notifications:
+        cursor = {"id": after}
+    return notifications, cursor
+
+
+def follow_notifications(
+    client: IamusClient,
+    cursor: Optional[dict[str, object]],
+    take: int = PAGE_SIZE,
+    min_interval: float = MIN_INTERVAL,
+    max_interval: float = MAX_INTERVAL,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[Tuple[list[dict[str, object]], Optional[dict[str, object]]]]:
+    """Poll the notifications which arrive after the cursor, forever.
+
+    The interval between polls is reset to `min_interval` when notifications
+    arrive, and doubled after every poll without any, up to `max_interval`. A
+    poll which fails because the server is unreachable or answers with an
+    error which may be transient, see `is_retryable`, counts as idle.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        cursor (Optional[dict[str, object]]): The cursor to start from.
+        take (int, optional): The number of notifications per page.
+        min_interval (float, optional): The shortest interval between polls.
+        max_interval (float, optional): The longest interval between polls.
+        sleep (Callable[[float], None], optional): Function waiting between
+            polls.
+
+    Yields:
+        Tuple[list[dict[str, object]], Optional[dict[str, object]]]: Every
+            batch of new notifications, oldest first, and the cursor after it.
+    """
+    interval = min_interval
+    while True:
+        try:
+            new, cursor = fetch_new(client, cursor, take)
+        except requests.exceptions.RequestException:
+            new = []
+        except IamusError as e:
+            if not is_retryable(e):
+                raise
+            new = []
+
+        if new:
+            interval = min_interval
+            yield new, cursor
+        else:
+            interval = min(interval * 2, max_interval)
+        sleep(interval)
@@ -0,0 +1,302 @@
+import sys
+import json
+import time
+import threading
+from typing import Callable, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Environment variable which enables profiling, like the `--profile` option
+PROFILE_ENVVAR = "IAMUS_PROFILE"
+
+# Number of functions and imports listed in the report, the raw profile keeps
+# every function
+REPORT_SIZE = 50
+
+# Seconds between two samples of the stacks of the threads
+SAMPLE_INTERVAL = 0.005
+
+
+def profiling_requested(argv: list[str], environ: dict[str, str]) -> bool:
+    """Check whether a command is run with profiling, before it is parsed."""
+    return bool(environ.get(PROFILE_ENVVAR)) or any(
+        arg == "--profile" or arg.startswith("--profile=") for arg in argv
+    )
+
+
+class _TimedLoader:
+    """Loader timing the creation and execution of a module for `ImportTimer`."""
+
+    def __init__(self, timer: "ImportTimer", loader: object) -> None:
+        self._timer = timer
+        self._loader = loader
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: object) -> object:
+        create_module = getattr(self._loader, "create_module", None)
+        if create_module is None:
+            return None
+        return self._timer.time(spec.name, create_module, spec)
+
+    def exec_module(self, module: object) -> None:
+        self._timer.time(module.__name__, self._loader.exec_module, module)
+
+
+class ImportTimer:
+    """Record the time spent loading every module which is not yet loaded.
+
+    The timer is a finder at the front of `sys.meta_path` which wraps the
+    loaders found by the other finders, so it has to be started before the
+    modules of interest are imported. The time of a module excludes the time
+    of the modules it imports itself, which are recorded separately.
+    """
+
+    def __init__(self) -> None:
+        self.imports: dict[str, dict[str, float]] = {}
+        self._local = threading.local()
+
+    def start(self) -> "ImportTimer":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def stop(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname: str, path=None, target=None) -> object:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def time(self, name: str, func: Callable, *args) -> object:
+        """Call a function loading a module, adding its time to the module."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            times = self.imports.setdefault(name, {"self": 0.0, "cumulative": 0.0})
+            times["self"] += elapsed - children
+            times["cumulative"] += elapsed
+
+    def report(self) -> list[dict[str, object]]:
+        """List the slowest imports, with their times in milliseconds."""
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1]["self"])
+        return [
+            {
+                "module": name,
+                "self": times["self"] * 1000,
+                "cumulative": times["cumulative"] * 1000,
+            }
+            for name, times in slowest[:REPORT_SIZE]
+        ]
+
+
+def get_peak_memory() -> Optional[int]:
+    """Get the peak resident memory of the process in bytes, if it is known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # the peak is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StackSampler:
+    """Sample the stacks of every thread of the process at a fixed interval.
+
+    A background thread reads the current frame of every other thread, so the
+    work of thread pools is profiled as well as that of the main thread, and
+    the profiled code is not traced at all. Every sample is weighted by the
+    time since the previous one, so the times are wall-clock estimates which
+    include the time spent waiting on the network or disk.
+
+    Args:
+        interval (float, optional): Seconds between two samples.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        # samples with the function on the stack, its self and cumulative time
+        self.functions: dict[Tuple[str, int, str], list] = {}
+        # samples and time of every function by its callers
+        self.callers: dict[Tuple[str, int, str], dict[Tuple[str, int, str], list]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - last)
+            last = now
+
+    def sample(self, weight: float) -> None:
+        """Add the current stacks of the other threads to the profile."""
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+
+            seen, callee = set(), None
+            while frame is not None:
+                code = frame.f_code
+                function = (code.co_filename, code.co_firstlineno, code.co_name)
+                stats = self.functions.setdefault(function, [0, 0.0, 0.0])
+                if callee is None:
+                    stats[1] += weight
+                # recursive functions are only counted once per sample
+                if function not in seen:
+                    seen.add(function)
+                    stats[0] += 1
+                    stats[2] += weight
+                if callee is not None:
+                    edge = self.callers.setdefault(callee, {}).setdefault(
+                        function, [0, 0.0]
+                    )
+                    edge[0] += 1
+                    edge[1] += weight
+                callee = function
+                frame = frame.f_back
+
+    def dump_stats(self, path: str) -> None:
+        """Write the profile in the format of `pstats`, with samples as calls."""
+        import marshal
+
+        stats = {
+            function: (
+                samples,
+                samples,
+                self_time,
+                cumulative,
+                {
+                    caller: (count, count, time_, time_)
+                    for caller, (count, time_) in self.callers.get(function, {}).items()
+                },
+            )
+            for function, (samples, self_time, cumulative) in self.functions.items()
+        }
+        with open(path, "wb") as f:
+            marshal.dump(stats, f)
+
+
+class Profiler:
+    """Profile a CLI command and write a report which can be attached to a ticket.
+
+    The report is a JSON file with the slowest functions of the command, the
+    import times and the peak memory of the process. The raw profile of every
+    function is written next to it with a `.prof` suffix in the format of
+    cProfile, so it can be loaded with `pstats` or a viewer such as snakeviz.
+
+    The stacks of every thread are sampled by a `StackSampler` instead of
+    tracing every call, so the overhead stays small enough to profile real
+    publishes, and the work of thread pools is included. Python allocations
+    are only traced where the peak resident memory is not available from the
+    OS.
+
+    Args:
+        import_timer (ImportTimer, optional): Timer which was started before
+            the commands were imported.
+    """
+
+    def __init__(
+        self, import_timer: ImportTimer = None, interval: float = SAMPLE_INTERVAL
+    ) -> None:
+        self.import_timer = import_timer
+        self.sampler = StackSampler(interval)
+        self.started = None
+        self.elapsed = None
+
+    def start(self) -> None:
+        if resource is None:
+            import tracemalloc
+
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.started
+        if self.import_timer is not None:
+            self.import_timer.stop()
+
+    def report(self, argv: list[str]) -> dict[str, object]:
+        """Summarise the profile of the command.
+
+        Args:
+            argv (list[str]): The arguments the command was run with.
+
+        Returns:
+            dict[str, object]: The report, times are in milliseconds and
+                memory in bytes.
+        """
+        # the profiling modules are imported here, so that they do not slow down
+        # the start of every command which is not profiled
+        import platform
+        import tracemalloc
+
+        functions = sorted(self.sampler.functions.items(), key=lambda item: -item[1][2])
+        if resource is None:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            peak_memory = get_peak_memory()
+
+        return {
+            "argv": argv,
+            "python": sys.version,
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "elapsed": self.elapsed * 1000,
+            "peakMemory": peak_memory,
+            "sampleInterval": self.sampler.interval * 1000,
+            "functions": [
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "samples": samples,
+                    "self": self_time * 1000,
+                    "cumulative": cumulative * 1000,
+                }
+                for (filename, line, name), (samples, self_time, cumulative) in (
+                    functions[:REPORT_SIZE]
+                )
+            ],
+            "imports": (
+                self.import_timer.report() if self.import_timer is not None else []
+            ),
+        }
+
+    def write(self, path: str, argv: list[str]) -> None:
+        """Stop profiling and write the report and the raw profile.
+
+        Args:
+            path (str): The path of the JSON report.
+            argv (list[str]): The arguments the command was run with.
+        """
+        self.stop()
+        with open(path, "w") as f:
+            json.dump(self.report(argv), f, indent=2)
+        self.sampler.dump_stats(f"{path}.prof")
@@ -1,49 +1,77 @@
-import sys
 import click
 from typing import Tuple
-from posixpath import join as urljoin
 
-from utils.call_api import call_api
+from utils.index import PublicationIndex
+from utils.client import IamusClient, IamusError
 
 
 def get_id_name(
-    base_url: str,
-    username: str,
-    headers: dict[str, str],
+    client: IamusClient,
     pub_id: str = None,
     name: str = None,
+    index: PublicationIndex = None,
 ) -> Tuple[str, str]:
-    """Get publication id and name from the server.
+    """Get publication id and name from the index or the server.
 
     It expects at least one of id or name not being None and return both id and
     name of the most recent publication.
 
     Args:
-        base_url (str): The base URL of the server.
-        username (str): The username obtained from the auth file.
-        headers (dict[str, str]): The headers obtained from the auth file, which
-            contains token for sending the request.
+        client (IamusClient): The authenticated client.
         pub_id (str, optional): The id of the publication specified by the user,
             it is required if `name` is not specified.
         name (str, optional): The name of the publication specified by the user,
             it is required if `pub_id` is not specified.
+        index (PublicationIndex, optional): The index the name is resolved
+            with, the server is asked directly if it is None.
 
     Returns:
-        Tuple[str, str]: _description_
+        Tuple[str, str]: The id and name of the publication, the one which was
+            not specified is None if the publication could not be found.
     """
-    parameter = f"{username}/{name}" if name else f"{pub_id}"
-    get_pub_api = urljoin(base_url, f"publication/{parameter}")
+    publication = get_publication(client, pub_id, name, index=index)
+    if publication is not None:
+        pub_id, name = publication["id"], publication["name"]
+    return pub_id, name
 
-    try:
-        get_pub_res = call_api("GET", get_pub_api, headers=headers)
-        pub_id, name = (
-            get_pub_res["publication"]["id"],
-            get_pub_res["publication"]["name"],
-        )
-    except KeyError:
-        click.echo(f"Response Error: {get_pub_res['message']}")
-    except Exception as e:
-        click.echo(f"Unexpected error occurs: {e}")
-        sys.exit(1)
 
-    return pub_id, name
+def get_publication(
+    client: IamusClient,
+    pub_id: str = None,
+    name: str = None,
+    revision: str = None,
+    index: PublicationIndex = None,
+) -> dict[str, object]:
+    """Get a publication by its id, or by its name and revision.
+
+    A name is resolved with the index if one is given, so no request is sent
+    while the index is fresh. The server is asked if the name is not found in
+    the index, so that it reports why.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        pub_id (str, optional): The id of the publication specified by the user,
+            it is required if `name` is not specified.
+        name (str, optional): The name of the publication specified by the user,
+            it is required if `pub_id` is not specified.
+        revision (str, optional): The revision of the publication, the current
+            revision is used if it is not specified. It is ignored if `pub_id`
+            is specified since the id already refers to a single revision.
+        index (PublicationIndex, optional): The index the name is resolved
+            with, the server is asked directly if it is None.
+
+    Returns:
+        dict[str, object]: The publication, or None if it could not be found.
+    """
+    if index is not None and not pub_id:
+        try:
+            publication = index.resolve(client, name, revision)
+        except IamusError:
+            publication = None
+        if publication is not None:
+            return publication
+
+    try:
+        return client.resolve(pub_id, name, revision)
+    except IamusError as e:
+        click.echo(f"Response Error: {e}")
@@ -0,0 +1,84 @@
+import io
+import struct
+import zipfile
+
+from utils.client import IamusClient
+
+# Bytes read from the end of a zipfile at first, which is enough for the end
+# records and the central directory of most publications
+TAIL_SIZE = 8 * 1024
+
+END_RECORD = struct.Struct("<4s4H2LH")
+END_RECORD_SIGNATURE = b"PK\x05\x06"
+# The longest end record, with a comment of the maximum size
+MAX_END_RECORD_SIZE = END_RECORD.size + 0xFFFF
+
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+
+
+def _read(
+    client: IamusClient, pub_id: str, start: int, end: int, cache: tuple
+) -> bytes:
+    """Read bytes of the zipfile, from the bytes already read if they have them."""
+    data, offset, _ = cache
+    if start >= offset:
+        return data[start - offset : end - offset]
+    head, _, _ = client.download_range(pub_id, start, offset - 1)
+    return (head + data)[: end - start]
+
+
+def read_central_directory(client: IamusClient, pub_id: str) -> list[zipfile.ZipInfo]:
+    """List the members of the zipfile of a publication without downloading it.
+
+    Only the end of the zipfile is downloaded, with ranged reads, which is
+    usually a few kilobytes even for very large publications. The whole
+    zipfile is downloaded if the server does not support ranges.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        pub_id (str): The id of the publication.
+
+    Raises:
+        zipfile.BadZipFile: Error raised if the zipfile is malformed.
+        IamusError: Error raised if the publication has no sources.
+
+    Returns:
+        list[zipfile.ZipInfo]: The members, their `header_offset` is the offset
+            of their local header within the zipfile.
+    """
+    cache = client.download_range(pub_id, -TAIL_SIZE)
+    tail, offset, size = cache
+    position = tail.rfind(END_RECORD_SIGNATURE)
+    if position < 0 and offset > 0:
+        # the end record has a long comment, read the longest possible one
+        cache = client.download_range(pub_id, -MAX_END_RECORD_SIZE)
+        tail, offset, size = cache
+        position = tail.rfind(END_RECORD_SIGNATURE)
+    if position < 0 or len(tail) - position < END_RECORD.size:
+        raise zipfile.BadZipFile("File is not a zip file")
+
+    end_offset = offset + position
+    *_, cd_size, _, _ = END_RECORD.unpack_from(tail, position)
+    locator = b""
+    if end_offset >= ZIP64_LOCATOR.size:
+        locator = _read(
+            client, pub_id, end_offset - ZIP64_LOCATOR.size, end_offset, cache
+        )
+    if locator.startswith(ZIP64_LOCATOR_SIGNATURE):
+        # the sizes and offsets of the central directory are in the zip64 record
+        end_offset -= ZIP64_LOCATOR.size + ZIP64_END_RECORD.size
+        record = _read(
+            client, pub_id, end_offset, end_offset + ZIP64_END_RECORD.size, cache
+        )
+        *_, cd_size, _ = ZIP64_END_RECORD.unpack(record)
+
+    # the central directory is right before the end records, even if data was
+    # prepended to the zipfile and `cd_offset` is off by its length
+    start = end_offset - cd_size
+    archive = zipfile.ZipFile(io.BytesIO(_read(client, pub_id, start, size, cache)))
+    members = archive.infolist()
+    for info in members:
+        info.header_offset += start
+    return members
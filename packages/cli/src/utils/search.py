@@ -0,0 +1,168 @@
+import json
+import time
+import pathlib
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from utils.client import DEFAULT_SERVER, IamusClient
+
+# Seconds for which a page of search results is answered from the cache
+SEARCH_CACHE_TTL = 60
+
+# Number of results requested per page, the server allows at most 200
+PAGE_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    kind TEXT NOT NULL,
+    query TEXT NOT NULL,
+    skip INTEGER NOT NULL,
+    take INTEGER NOT NULL,
+    results TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    cached_at REAL NOT NULL,
+    PRIMARY KEY (kind, query, skip, take)
+);
+"""
+
+
+def get_search_cache_file(
+    cli_path: pathlib.PosixPath, server: str = None
+) -> pathlib.Path:
+    """Get the path of the search cache of a server profile.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+        server (str, optional): The name of the server profile, the default
+            server is used if it is not specified.
+
+    Returns:
+        pathlib.Path: The path of the SQLite database.
+    """
+    if server is None or server == DEFAULT_SERVER:
+        return cli_path / "config/search.db"
+    return cli_path / f"config/search-{server}.db"
+
+
+def normalise_query(query: str) -> str:
+    """Normalise a query so that it is cached regardless of case and spacing.
+
+    The text search of the server ignores both, so the results are the same.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Local SQLite cache of recently fetched pages of search results.
+
+    Pages are answered from the cache for `ttl` seconds after they were
+    fetched, expired pages are removed when the cache is opened.
+
+    Args:
+        cache_file (pathlib.PosixPath): Path to the SQLite database.
+        ttl (float, optional): Seconds for which a page is answered.
+    """
+
+    def __init__(
+        self, cache_file: pathlib.PosixPath, ttl: float = SEARCH_CACHE_TTL
+    ) -> None:
+        self.ttl = ttl
+        self._db = sqlite3.connect(cache_file)
+        with self._db:
+            self._db.executescript(SCHEMA)
+            self._db.execute(
+                "DELETE FROM pages WHERE cached_at < ?", (time.time() - ttl,)
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get(
+        self, kind: str, query: str, skip: int, take: int
+    ) -> Optional[Tuple[list[dict[str, object]], int]]:
+        """Get a page of results if it is cached and has not expired."""
+        row = self._db.execute(
+            "SELECT results, total FROM pages WHERE kind = ? AND query = ? "
+            "AND skip = ? AND take = ? AND cached_at >= ?",
+            (kind, normalise_query(query), skip, take, time.time() - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(
+        self,
+        kind: str,
+        query: str,
+        skip: int,
+        take: int,
+        results: list[dict[str, object]],
+        total: int,
+    ) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    normalise_query(query),
+                    skip,
+                    take,
+                    json.dumps(results),
+                    total,
+                    time.time(),
+                ),
+            )
+
+
+def search_pages(
+    client: IamusClient,
+    kind: str,
+    query: str,
+    take: int = PAGE_SIZE,
+    limit: int = None,
+    cache: SearchCache = None,
+) -> Iterator[Tuple[list[dict[str, object]], int]]:
+    """Search page by page, fetching the next page while the current is used.
+
+    Pages are answered from the cache while it has them, the others are
+    fetched in a background thread and then added to the cache. The cache is
+    only used by the calling thread.
+
+    Args:
+        client (IamusClient): The client.
+        kind (str): Either `publication` or `user`.
+        query (str): The text searched for.
+        take (int, optional): The number of results per page.
+        limit (int, optional): The maximum number of results, all of them are
+            listed if it is None.
+        cache (SearchCache, optional): The cache of pages.
+
+    Yields:
+        Tuple[list[dict[str, object]], int]: Every page of results and the total
+            number of results.
+    """
+
+    def fetch(executor: ThreadPoolExecutor, skip: int) -> Future:
+        page = cache.get(kind, query, skip, take) if cache is not None else None
+        if page is not None:
+            future = Future()
+            future.set_result((page, False))
+            return future
+        return executor.submit(lambda: (client.search(kind, query, skip, take), True))
+
+    if limit is not None:
+        take = min(take, limit)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        skip, future = 0, fetch(executor, 0)
+        while future is not None:
+            (results, total), fetched = future.result()
+            if fetched and cache is not None:
+                cache.put(kind, query, skip, take, results, total)
+
+            if limit is not None:
+                results = results[: max(limit - skip, 0)]
+            skip += len(results)
+            end = total if limit is None else min(total, limit)
+            future = fetch(executor, skip) if results and skip < end else None
+            yield results, total
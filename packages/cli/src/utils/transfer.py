@@ -0,0 +1,244 @@
+import io
+import os
+import json
+import time
+import uuid
+import click
+import threading
+from collections import deque
+from typing import BinaryIO
+
+# Time window over which the current throughput is measured, in seconds
+RATE_WINDOW = 3.0
+
+UNITS = ["B", "KiB", "MiB", "GiB", "TiB"]
+
+
+def format_size(size: float) -> str:
+    """Format a number of bytes in a human readable way, e.g. 1.5 MiB."""
+    for unit in UNITS[:-1]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} {UNITS[-1]}"
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as [hh:]mm:ss."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class TokenBucket:
+    """Token bucket limiting the rate at which bytes are sent.
+
+    Every byte sent consumes a token and tokens are refilled at `rate` tokens
+    per second up to `capacity`, which bounds the burst after an idle period.
+    The bucket is allowed to go into debt so that chunks larger than the
+    capacity can still be sent, the caller then waits until the debt is repaid.
+
+    Args:
+        rate (float): Number of bytes allowed per second.
+        capacity (float, optional): Maximum burst in bytes, defaults to a
+            quarter of a second worth of bytes.
+    """
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate / 4
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """Take `amount` tokens from the bucket, sleeping while it is in debt."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.timestamp) * self.rate
+            )
+            self.timestamp = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ProgressReporter:
+    """Report the progress of a transfer with its throughput and ETA.
+
+    The progress is drawn as a single updating line on stderr, or when `quiet`
+    is set, emitted every `interval` seconds as a JSON line on stdout so that it
+    can be followed in CI logs.
+
+    Args:
+        total (int, optional): Total number of bytes to be transferred, it is
+            set by `MultipartFile` when reporting the progress of an upload.
+        label (str, optional): Label of the transfer.
+        quiet (bool, optional): Whether to emit JSON events instead of drawing
+            the progress line.
+        interval (float, optional): Seconds between JSON events.
+    """
+
+    def __init__(
+        self,
+        total: int = 0,
+        label: str = "",
+        quiet: bool = False,
+        interval: float = 5.0,
+    ) -> None:
+        self.total = total
+        self.label = label
+        self.quiet = quiet
+        self.interval = interval if quiet else 0.1
+        self.sent = 0
+        self.started = time.monotonic()
+        self._last_report = 0.0
+        self._samples = deque([(self.started, 0)])
+
+    @property
+    def average_rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def current_rate(self) -> float:
+        then, sent = self._samples[0]
+        elapsed = time.monotonic() - then
+        return (self.sent - sent) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        rate = self.current_rate or self.average_rate
+        return (self.total - self.sent) / rate if rate > 0 else None
+
+    def update(self, amount: int) -> None:
+        """Record that `amount` more bytes were transferred."""
+        self.sent += amount
+        now = time.monotonic()
+        self._samples.append((now, self.sent))
+        while len(self._samples) > 1 and now - self._samples[0][0] > RATE_WINDOW:
+            self._samples.popleft()
+
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, event: str = "progress") -> None:
+        eta = self.eta
+        if self.quiet:
+            progress = {
+                "event": event,
+                "label": self.label,
+                "sent": self.sent,
+                "total": self.total,
+                "rate": round(self.current_rate),
+                "averageRate": round(self.average_rate),
+                "eta": round(eta, 1) if eta is not None else None,
+            }
+            click.echo(json.dumps(progress))
+            return
+
+        percent = self.sent / self.total * 100 if self.total else 100.0
+        line = (
+            f"{self.label} {percent:5.1f}% "
+            f"{format_size(self.sent)}/{format_size(self.total)} "
+            f"{format_size(self.current_rate)}/s "
+            f"(avg {format_size(self.average_rate)}/s) "
+            f"ETA {format_duration(eta) if eta is not None else '--:--'}"
+        )
+        click.echo(f"\r{line.strip()}\033[K", nl=event == "done", err=True)
+
+    def finish(self) -> None:
+        """Report the final state of the transfer."""
+        self.report("done")
+
+
+class MultipartFile:
+    """Stream a file as a `multipart/form-data` request body.
+
+    Unlike passing `files` to requests, the body is never held in memory as a
+    whole, so it can be throttled by a `TokenBucket` and its progress can be
+    reported while it is being sent.
+
+    Args:
+        field (str): Name of the form field.
+        path (str): Path of the file to be sent.
+        content_type (str): Content type of the file.
+        bucket (TokenBucket, optional): Bucket limiting the upload rate.
+        progress (ProgressReporter, optional): Reporter of the upload progress.
+        data (bytes, optional): Content of the file if it is built in memory,
+            such as the zipfile of a delta upload. The file is read if it is
+            None.
+        fields (dict[str, str], optional): Form fields sent before the file.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        path: str,
+        content_type: str,
+        bucket: TokenBucket = None,
+        progress: ProgressReporter = None,
+        data: bytes = None,
+        fields: dict[str, str] = None,
+    ) -> None:
+        boundary = uuid.uuid4().hex
+        filename = os.path.basename(path)
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.head = "".join(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+            for name, value in (fields or {}).items()
+        ).encode()
+        self.head += (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{boundary}--\r\n".encode()
+        self.size = os.path.getsize(path) if data is None else len(data)
+        self.bucket = bucket
+        self.progress = progress
+        if progress is not None:
+            progress.total = len(self)
+        self._file: BinaryIO = open(path, "rb") if data is None else io.BytesIO(data)
+        self._parts = [io.BytesIO(self.head), self._file, io.BytesIO(self.tail)]
+
+    def __len__(self) -> int:
+        return len(self.head) + self.size + len(self.tail)
+
+    def __enter__(self) -> "MultipartFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self)
+
+        chunks, remaining = [], size
+        while remaining > 0 and self._parts:
+            data = self._parts[0].read(remaining)
+            if not data:
+                self._parts.pop(0)
+                continue
+            chunks.append(data)
+            remaining -= len(data)
+
+        chunk = b"".join(chunks)
+        if chunk:
+            if self.bucket is not None:
+                self.bucket.consume(len(chunk))
+            if self.progress is not None:
+                self.progress.update(len(chunk))
+        return chunk
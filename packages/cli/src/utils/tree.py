@@ -0,0 +1,219 @@
+import os
+import json
+import pathlib
+import posixpath
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils.client import IamusClient
+
+
+class ListingCache:
+    """Thread-safe LRU cache of the entries of a publication archive.
+
+    Entries are keyed by the publication id, its revision and the path within
+    the archive. The sources of a published revision cannot be modified, so the
+    cache can optionally be persisted to a file and shared between invocations.
+
+    Args:
+        cache_file (pathlib.PosixPath, optional): File the cache is loaded from
+            and saved to. The cache is only kept in memory if it is None.
+        max_entries (int, optional): Number of entries kept before the least
+            recently used one is evicted.
+    """
+
+    def __init__(
+        self, cache_file: pathlib.PosixPath = None, max_entries: int = 512
+    ) -> None:
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if cache_file is not None:
+            try:
+                with open(cache_file, "r") as f:
+                    for key, entry in json.load(f):
+                        self._entries[key] = entry
+            except (FileNotFoundError, ValueError):
+                pass
+            # the file may have been saved with a larger limit
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def key(pub_id: str, revision: str, path: str) -> str:
+        return f"{pub_id}@{revision}:{path}"
+
+    def get(self, key: str) -> Optional[dict[str, object]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: dict[str, object]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write the cache to its file, if it has one.
+
+        The file is replaced at once, so that other invocations reading it
+        never see it partially written.
+        """
+        if self.cache_file is None:
+            return
+
+        with self._lock:
+            items = list(self._entries.items())
+        partial = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+        with open(partial, "w") as f:
+            json.dump(items, f)
+        os.replace(partial, self.cache_file)
+
+
+class TreeBrowser:
+    """Browse the archive of a publication without downloading all of it.
+
+    Listings are fetched on a pool of worker threads so that sibling
+    directories can be fetched concurrently, and the child directories of every
+    listed directory are prefetched in the background.
+
+    Args:
+        client (IamusClient): The authenticated client.
+        publication (dict[str, object]): The publication to browse.
+        cache (ListingCache): Cache of the fetched listings.
+        max_workers (int, optional): Number of concurrent requests.
+    """
+
+    def __init__(
+        self,
+        client: IamusClient,
+        publication: dict[str, object],
+        cache: ListingCache,
+        max_workers: int = 8,
+    ) -> None:
+        self.client = client
+        self.pub_id = publication["id"]
+        self.revision = publication["revision"]
+        self.cache = cache
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "TreeBrowser":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop prefetching and save the fetched listings to the cache."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.cache.save()
+
+    def _load(self, path: str, key: str) -> dict[str, object]:
+        try:
+            entry = self.client.tree(self.pub_id, path)
+            self.cache.put(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _fetch(self, path: str) -> Future:
+        key = ListingCache.key(self.pub_id, self.revision, path)
+        with self._lock:
+            # share the request of a listing which is already being fetched
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+
+            entry = self.cache.get(key)
+            if entry is None:
+                future = self._executor.submit(self._load, path, key)
+                self._pending[key] = future
+                return future
+
+        future = Future()
+        future.set_result(entry)
+        return future
+
+    def _children(self, path: str, entry: dict[str, object]) -> list[str]:
+        return [
+            posixpath.join(path, child["filename"])
+            for child in entry.get("entries", [])
+            if child["type"] == "directory"
+        ]
+
+    def listing(self, path: str = "") -> dict[str, object]:
+        """Get an entry of the archive, prefetching the child directories.
+
+        Args:
+            path (str, optional): Path within the archive, the root of the
+                archive is used if it is not specified.
+
+        Raises:
+            IamusError: Error raised if the server cannot list the path.
+
+        Returns:
+            dict[str, object]: The entry of the path, it contains the listing
+                under `entries` if the path is a directory.
+        """
+        path = path.strip("/")
+        entry = self._fetch(path).result()
+        for child in self._children(path, entry):
+            self._fetch(child)
+        return entry
+
+    def walk(self, path: str = "") -> Iterator[Tuple[str, list[dict[str, object]]]]:
+        """Walk the directories under a path in depth-first order.
+
+        The listings of all children of a directory are requested as soon as
+        the directory is listed, so siblings are fetched concurrently while the
+        caller consumes the earlier ones.
+
+        Args:
+            path (str, optional): Path within the archive to start from.
+
+        Raises:
+            IamusError: Error raised if the server cannot list a path.
+
+        Yields:
+            Tuple[str, list[dict[str, object]]]: The path of each directory and
+                its entries.
+        """
+        path = path.strip("/")
+        stack = [(path, self._fetch(path))]
+        while stack:
+            current, future = stack.pop()
+            entry = future.result()
+            if entry["type"] != "directory":
+                yield current, [entry]
+                continue
+
+            yield current, entry["entries"]
+            children = [
+                (child, self._fetch(child)) for child in self._children(current, entry)
+            ]
+            stack.extend(reversed(children))
+
+    def read(self, path: str) -> bytes:
+        """Download the raw content of a file in the archive.
+
+        Args:
+            path (str): Path of the file within the archive.
+
+        Raises:
+            IamusError: Error raised if the server cannot read the file.
+
+        Returns:
+            bytes: The content of the file.
+        """
+        return self.client.download(self.pub_id, path)
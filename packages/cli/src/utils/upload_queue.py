@@ -0,0 +1,397 @@
+import os
+import sys
+import json
+import time
+import uuid
+import click
+import shutil
+import pathlib
+import subprocess
+from pathlib import Path
+from functools import wraps
+from typing import Callable, Iterator
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from utils.fanout import get_targets
+
+# Number of finished jobs kept in the journal when it is compacted
+KEPT_RESULTS = 100
+
+
+def lock_fd(fd: int, blocking: bool = True) -> bool:
+    """Take an exclusive lock on an open file.
+
+    The lock is held until it is released with `unlock_fd` or the file is
+    closed, the operating system releases it as well when the process dies.
+
+    Args:
+        fd (int): The file descriptor of the file to lock.
+        blocking (bool, optional): Whether to wait for the lock if another
+            process holds it.
+
+    Returns:
+        bool: Whether the lock was acquired.
+    """
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            # LK_LOCK only retries for 10 seconds before giving up
+            if not blocking:
+                return False
+
+
+def unlock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class QueueLock:
+    """Lock making sure that a single worker drains the queue at a time.
+
+    The lock file is locked exclusively while the worker runs. It is left in
+    place when the lock is released, so that no other worker can remove a lock
+    which was just taken, and the lock of a worker which was killed is released
+    by the operating system.
+
+    Args:
+        lock_file (pathlib.PosixPath): Path to the lock file.
+    """
+
+    def __init__(self, lock_file: pathlib.PosixPath) -> None:
+        self.lock_file = lock_file
+        self._fd = None
+
+    def acquire(self) -> bool:
+        """Try to acquire the lock without blocking.
+
+        Returns:
+            bool: Whether the lock was acquired.
+        """
+        fd = os.open(self.lock_file, os.O_CREAT | os.O_RDWR)
+        if not lock_fd(fd, blocking=False):
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        unlock_fd(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+
+class UploadQueue:
+    """Durable queue of uploads which are sent when the server is reachable.
+
+    The queue is an append-only journal of JSON lines in the config directory.
+    Every change of a job is appended as a new record and synced to disk, so
+    queued jobs survive a crash of the CLI. The archive of a job is copied next
+    to the journal when it is queued, the upload does not depend on the build
+    output still being there when the queue is drained. Appending to the
+    journal and compacting it are serialised with a lock file, so that jobs
+    queued by other processes while the journal is rewritten are not lost.
+
+    Args:
+        cli_path (pathlib.PosixPath): Path to the directory of the CLI.
+    """
+
+    def __init__(self, cli_path: pathlib.PosixPath) -> None:
+        self.directory = cli_path / "config/queue"
+        self.journal = self.directory / "journal.jsonl"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def lock(self) -> QueueLock:
+        return QueueLock(self.directory / "worker.lock")
+
+    @contextmanager
+    def _journal_lock(self) -> Iterator[None]:
+        # the journal itself is replaced by `compact`, so the lock is taken on a
+        # separate file which is never removed
+        fd = os.open(self.directory / "journal.lock", os.O_CREAT | os.O_RDWR)
+        try:
+            lock_fd(fd)
+            try:
+                yield
+            finally:
+                unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+    def _append(self, record: dict[str, object]) -> None:
+        with self._journal_lock(), open(self.journal, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def enqueue(
+        self,
+        file: str,
+        pub_id: str = None,
+        name: str = None,
+        max_rate: int = None,
+        server: str = None,
+    ) -> str:
+        """Add an upload to the queue.
+
+        Args:
+            file (str): The path of the zipfile to be uploaded.
+            pub_id (str, optional): The id of the publication to upload to, it
+                is required if `name` is not specified.
+            name (str, optional): The name of the publication to upload to, it
+                is required if `pub_id` is not specified.
+            max_rate (int, optional): The maximum upload rate in bytes per second.
+            server (str, optional): The name of the server profile to upload to,
+                the default server is used if it is not specified.
+
+        Returns:
+            str: The id of the queued job.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        archive = self.directory / f"{job_id}.zip"
+        shutil.copyfile(file, archive)
+        self._append(
+            {
+                "op": "enqueue",
+                "id": job_id,
+                "time": time.time(),
+                "job": {
+                    "file": str(Path(file).resolve()),
+                    "archive": str(archive),
+                    "pubId": pub_id,
+                    "name": name,
+                    "maxRate": max_rate,
+                    "server": server,
+                },
+            }
+        )
+        return job_id
+
+    def record(
+        self, job_id: str, status: str, attempts: int, message: str = ""
+    ) -> None:
+        """Record the result of an attempt to upload a job.
+
+        Args:
+            job_id (str): The id of the job.
+            status (str): One of `done` and `failed` if the job is finished, or
+                `pending` if it should be attempted again later.
+            attempts (int): The number of attempts made so far.
+            message (str, optional): A message describing the result.
+        """
+        self._append(
+            {
+                "op": "result",
+                "id": job_id,
+                "time": time.time(),
+                "status": status,
+                "attempts": attempts,
+                "message": message,
+            }
+        )
+        if status != "pending":
+            try:
+                os.remove(self.directory / f"{job_id}.zip")
+            except FileNotFoundError:
+                pass
+
+    def jobs(self) -> dict[str, dict[str, object]]:
+        """Replay the journal to get the current state of every job.
+
+        Returns:
+            dict[str, dict[str, object]]: The jobs by id in the order they were
+                queued, with their latest status, attempts and message.
+        """
+        jobs = {}
+        try:
+            with open(self.journal, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the last record may be truncated by a crash
+                        continue
+
+                    if record["op"] == "enqueue":
+                        jobs[record["id"]] = {
+                            "server": None,
+                            **record["job"],
+                            "id": record["id"],
+                            "queuedAt": record["time"],
+                            "status": "pending",
+                            "attempts": 0,
+                            "message": "",
+                        }
+                    elif record["id"] in jobs:
+                        jobs[record["id"]].update(
+                            status=record["status"],
+                            attempts=record["attempts"],
+                            message=record["message"],
+                            updatedAt=record["time"],
+                        )
+        except FileNotFoundError:
+            pass
+        return jobs
+
+    def pending(self) -> list[dict[str, object]]:
+        return [job for job in self.jobs().values() if job["status"] == "pending"]
+
+    def compact(self) -> None:
+        """Rewrite the journal keeping pending jobs and the latest results.
+
+        It must only be called by the worker holding the lock. The journal is
+        locked from reading it until the compacted journal replaces it, so that
+        jobs appended in the meantime are not dropped.
+        """
+        with self._journal_lock():
+            self._compact()
+
+    def _compact(self) -> None:
+        jobs = list(self.jobs().values())
+        finished = [job for job in jobs if job["status"] != "pending"]
+        kept = set(job["id"] for job in finished[-KEPT_RESULTS:])
+
+        records = []
+        for job in jobs:
+            if job["status"] != "pending" and job["id"] not in kept:
+                continue
+            records.append(
+                {
+                    "op": "enqueue",
+                    "id": job["id"],
+                    "time": job["queuedAt"],
+                    "job": {
+                        key: job[key]
+                        for key in (
+                            "file",
+                            "archive",
+                            "pubId",
+                            "name",
+                            "maxRate",
+                            "server",
+                        )
+                    },
+                }
+            )
+            if "updatedAt" in job:
+                records.append(
+                    {
+                        "op": "result",
+                        "id": job["id"],
+                        "time": job["updatedAt"],
+                        "status": job["status"],
+                        "attempts": job["attempts"],
+                        "message": job["message"],
+                    }
+                )
+
+        compacted = self.journal.with_suffix(".tmp")
+        with open(compacted, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted, self.journal)
+
+
+def start_worker() -> None:
+    """Start a detached `flush` process which drains the upload queue."""
+    if getattr(sys, "frozen", False):
+        command = [sys.executable, "flush", "--quiet"]
+    else:
+        command = [
+            sys.executable,
+            str(Path(__file__).parents[1] / "cli.py"),
+            "flush",
+            "--quiet",
+        ]
+
+    if os.name == "nt":
+        detach = {
+            "creationflags": subprocess.DETACHED_PROCESS
+            | subprocess.CREATE_NEW_PROCESS_GROUP
+        }
+    else:
+        detach = {"start_new_session": True}
+
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **detach,
+    )
+
+
+def queueable(func: Callable) -> Callable:
+    """Decorator for the upload command to add the upload to the queue.
+
+    If the `queue` option is set, the upload is added to the queue and a worker
+    is started to send it in the background, instead of sending it straight
+    away. An upload to several servers with the `to` option is queued as one
+    job per server. It must be applied before `pass_base_url`, so that the upload can be
+    queued while the server is not reachable.
+
+    Args:
+        func (Callable): Function to be decorated.
+
+    Returns:
+        Callable: Decorated function which handles the `queue` option.
+    """
+
+    @wraps(func)
+    def wrapper(ctx: click.core.Context, *args, queue: bool = False, **kwargs):
+        if not queue:
+            return func(ctx, *args, **kwargs)
+
+        servers = [ctx.obj.get("SERVER")]
+        if kwargs.get("to") is not None:
+            if kwargs.get("pub_id"):
+                raise click.UsageError(
+                    "Publication ids differ between servers, use --name"
+                )
+            try:
+                servers = get_targets(ctx.obj["CLI_PATH"], kwargs["to"])
+            except FileNotFoundError:
+                click.echo(
+                    "No config.json found. Please create one using `config` command."
+                )
+                sys.exit(1)
+
+        upload_queue = UploadQueue(ctx.obj["CLI_PATH"])
+        for server in servers:
+            job_id = upload_queue.enqueue(
+                kwargs["file"],
+                kwargs.get("pub_id"),
+                kwargs.get("name"),
+                kwargs.get("max_rate"),
+                server,
+            )
+            click.echo(f"Upload queued as job {job_id}")
+        start_worker()
+
+    return wrapper
@@ -1,4 +1,6 @@
 import { afterEach, beforeAll, beforeEach, describe, expect, it } from '@jest/globals';
+import AdmZip from 'adm-zip';
+import mongoose from 'mongoose';
 import { agent as supertest } from 'supertest';
 
 import app from '../../../src/app';
@@ -37,9 +39,9 @@ describe('Uploading source code tests', () => {
         pubID = response.body.publication.id;
     });
 
-    /** Delete the publication after each test to clean up all resources */
+    /** Delete the publication and its revisions after each test to clean up all resources */
     afterEach(async () => {
-        await request.delete(`/publication/${mockedOwner.username}/${mockedPublication.name}`);
+        await request.delete(`/publication/${mockedOwner.username}/${mockedPublication.name}/all`);
     });
 
     it('should upload source code to publication', async () => {
@@ -69,4 +71,64 @@ describe('Uploading source code tests', () => {
         expect(reUpload.body.errors).toHaveProperty('file');
         expect(reUpload.body.errors.file.code).toBe(CODES.PUBLICATION_ARCHIVE_EXISTS);
     });
+
+    it('should rebuild the sources of a revision from a delta', async () => {
+        const sourceUpload = await request
+            .post(`/resource/upload/publication/${pubID}`)
+            .attach('file', '__tests__/resources/sampleCode.zip');
+
+        expect(sourceUpload.status).toBe(200);
+
+        const revision = await request
+            .post(`/publication-by-id/${pubID}/revise`)
+            .send({ revision: 'v2', changelog: 'Changed sample1' });
+
+        expect(revision.status).toBe(200);
+        const revisionID = revision.body.publication.id;
+
+        const delta = new AdmZip();
+        delta.addFile('sampleCode/sample1.html', Buffer.from('<p>changed</p>'));
+        delta.addFile('new.txt', Buffer.from('new'));
+
+        const deltaUpload = await request
+            .post(`/resource/upload/publication/${revisionID}/delta`)
+            .field(
+                'manifest',
+                JSON.stringify({ base: pubID, removed: ['sampleCode/sample2.html'] }),
+            )
+            .attach('file', delta.toBuffer(), 'delta.zip');
+
+        expect(deltaUpload.status).toBe(200);
+
+        // The unchanged entries come from the base revision, the others from the delta
+        const changed = await request.get(
+            `/publication-by-id/${revisionID}/tree/sampleCode/sample1.html`,
+        );
+        expect(changed.status).toBe(200);
+        expect(changed.body.entry.contents).toBe('<p>changed</p>');
+
+        const added = await request.get(`/publication-by-id/${revisionID}/tree/new.txt`);
+        expect(added.status).toBe(200);
+
+        const removed = await request.get(
+            `/publication-by-id/${revisionID}/tree/sampleCode/sample2.html`,
+        );
+        expect(removed.status).toBe(404);
+    });
+
+    it('should fail to upload a delta against a base of another publication', async () => {
+        const delta = new AdmZip();
+        delta.addFile('new.txt', Buffer.from('new'));
+
+        const deltaUpload = await request
+            .post(`/resource/upload/publication/${pubID}/delta`)
+            .field(
+                'manifest',
+                JSON.stringify({ base: new mongoose.Types.ObjectId().toString(), removed: [] }),
+            )
+            .attach('file', delta.toBuffer(), 'delta.zip');
+
+        expect(deltaUpload.status).toBe(400);
+        expect(deltaUpload.body.errors).toHaveProperty('base');
+    });
 });
@@ -21,11 +21,13 @@ const router = express.Router();
  * https://cs3099user06.host.cs.st-andrews.ac.uk/api/notifications
  *
  * @description This endpoint is used to all of the notifications for the requester
- * that they have not viewed yet.
+ * that they have not viewed yet, oldest first. If 'after' is specified, only the
+ * notifications created after the notification with that id are listed, so that
+ * clients can poll for new notifications with the id of the last one they read.
  */
 registerRoute(router, '/', {
     method: 'get',
-    query: PaginationQuerySchema,
+    query: PaginationQuerySchema.extend({ after: ObjectIdSchema.optional() }),
     params: z.object({}),
     headers: z.object({}),
     permission: { level: IUserRole.Default },
@@ -35,7 +37,9 @@ registerRoute(router, '/', {
             tagging: req.requester._id.toString(),
             isLive: true,
             viewed: false,
+            ...(typeof req.query.after !== 'undefined' && { _id: { $gt: req.query.after } }),
         })
+            .sort({ _id: 1 })
             .populate<{ author: IUser }>('author')
             .populate<{ tagging: IUser }>('tagging')
             .limit(req.query.take)
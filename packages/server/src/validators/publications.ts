@@ -1,5 +1,6 @@
 import { z } from 'zod';
 
+import { ObjectIdSchema } from './requests';
 import { ExistUsernameSchema, UsernameSchema } from './user';
 
 const PublicationNameSchema = z
@@ -52,3 +53,9 @@ export const IRevisionSchema = z.object({
     revision: PublicationRevisionSchema,
     changelog: z.string(),
 });
+
+/** Schema for the manifest of a delta upload of publication sources */
+export const IDeltaManifestSchema = z.object({
+    base: ObjectIdSchema,
+    removed: z.array(z.string()),
+});